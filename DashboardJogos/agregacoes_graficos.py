@@ -0,0 +1,112 @@
+# --- Agregações usadas pelos gráficos das Abas 1 a 6 do dashboard ---
+# Cada função recebe o DataFrame da aba (uma linha por jogo ou uma linha por gênero do jogo,
+# já filtrado pelos filtros globais) e devolve exatamente o que o gráfico desenha. O dashboard e
+# os benchmarks usam as mesmas funções.
+
+
+# --- Tab 1: Visão Geral de Lançamentos e Gêneros (df explodido por gênero) ---
+def jogos_por_ano(df_genres):
+    """Gráfico 1: número de lançamentos por ano."""
+    return df_genres.groupby('release_year').size().reset_index(name='count')
+
+
+def top_generos(df_genres, n=10):
+    """Gráfico 2: top N gêneros por número de lançamentos."""
+    df_generos_count = df_genres['genre'].value_counts().nlargest(n).reset_index()
+    df_generos_count.columns = ['genre', 'count']
+    return df_generos_count
+
+
+def precos_top_generos(df_genres, n=10):
+    """Gráfico 3: linhas dos N gêneros mais frequentes, para o box plot de preços."""
+    top_genres = df_genres['genre'].value_counts().nlargest(n).index
+    return df_genres[df_genres['genre'].isin(top_genres)]
+
+
+# --- Tab 2: Análise por Plataforma e Desenvolvedor (uma linha por jogo) ---
+def lancamentos_plataforma_por_ano(df_games):
+    """Gráfico 4: lançamentos por plataforma ao longo do tempo."""
+    return df_games.groupby(['release_year', 'platform']).size().reset_index(name='count')
+
+
+def top_desenvolvedores(df_games, n=10):
+    """Gráfico 5: top N desenvolvedores por número de lançamentos."""
+    df_dev_count = df_games['developers'].value_counts().nlargest(n).reset_index()
+    df_dev_count.columns = ['developers', 'count']
+    return df_dev_count
+
+
+def precos_top_plataformas(df_games, n=10):
+    """Gráfico 6: linhas das N plataformas mais frequentes, para o box plot de preços."""
+    top_platforms = df_games['platform'].value_counts().nlargest(n).index
+    return df_games[df_games['platform'].isin(top_platforms)]
+
+
+# --- Tab 3: Distribuição de Preços e Tendências ---
+# O gráfico 7 (histograma) recebe as linhas filtradas diretamente, sem agregação prévia.
+def tendencia_precos(df_tab, df_genres, por='Plataforma'):
+    """Gráfico 8: preço médio por ano e plataforma (da base escolhida) ou por ano e gênero."""
+    if por == 'Plataforma':
+        return df_tab.groupby(['release_year', 'platform'])['preco_dolar'].mean().reset_index()
+    return df_genres.groupby(['release_year', 'genre'])['preco_dolar'].mean().reset_index()
+
+
+# --- Tab 4: Tendências de Lançamento por Período (df explodido por gênero) ---
+def lancamentos_genero_por_ano(df_genres):
+    """Gráfico 9: lançamentos anuais por gênero."""
+    return df_genres.groupby(['release_year', 'genre']).size().reset_index(name='count')
+
+
+def top_generos_por_periodo(df_genres, n=5):
+    """Gráfico 10: top N gêneros em cada período da pandemia, preservando a coluna 'periodo'."""
+    df_genre_period = df_genres.groupby(['periodo', 'genre']).size().reset_index(name='count')
+    return df_genre_period.sort_values(by=['periodo', 'count'], ascending=[True, False]) \
+                          .groupby('periodo') \
+                          .head(n)
+
+
+# --- Tab 5: Visão Hierárquica (df explodido por gênero) ---
+def lancamentos_genero_plataforma(df_genres):
+    """Gráfico 11: sunburst Gênero -> Plataforma."""
+    return df_genres.groupby(['genre', 'platform']).size().reset_index(name='count')
+
+
+def lancamentos_periodo_genero(df_genres):
+    """Gráfico 12: sunburst Período -> Gênero."""
+    return df_genres.groupby(['periodo', 'genre']).size().reset_index(name='count')
+
+
+def lancamentos_desenvolvedor_genero(df_genres):
+    """Gráfico 13: sunburst Desenvolvedor -> Gênero."""
+    return df_genres.groupby(['developers', 'genre']).size().reset_index(name='count')
+
+
+def total_precos_genero(df_genres):
+    """Gráfico 14: soma dos preços por gênero."""
+    return df_genres.groupby('genre')['preco_dolar'].sum().reset_index()
+
+
+# --- Tab 6: Heatmap de Preços (df explodido por gênero) ---
+def preco_medio_ano_genero(df_genres):
+    """Heatmap: preço médio por ano e gênero."""
+    return df_genres.groupby(['release_year', 'genre'])['preco_dolar'].mean().reset_index()
+
+
+# Base de cada agregação: 'jogo' (df_global_filtered) ou 'genero' (df_genres_global_filtered)
+AGREGACOES_TABS = {
+    'grafico_1': ('genero', jogos_por_ano),
+    'grafico_2': ('genero', top_generos),
+    'grafico_3': ('genero', precos_top_generos),
+    'grafico_4': ('jogo', lancamentos_plataforma_por_ano),
+    'grafico_5': ('jogo', top_desenvolvedores),
+    'grafico_6': ('jogo', precos_top_plataformas),
+    'grafico_8_plataforma': ('jogo', lambda df: tendencia_precos(df, None, 'Plataforma')),
+    'grafico_8_genero': ('genero', lambda df: tendencia_precos(None, df, 'Gênero')),
+    'grafico_9': ('genero', lancamentos_genero_por_ano),
+    'grafico_10': ('genero', top_generos_por_periodo),
+    'grafico_11': ('genero', lancamentos_genero_plataforma),
+    'grafico_12': ('genero', lancamentos_periodo_genero),
+    'grafico_13': ('genero', lancamentos_desenvolvedor_genero),
+    'grafico_14': ('genero', total_precos_genero),
+    'heatmap': ('genero', preco_medio_ano_genero),
+}
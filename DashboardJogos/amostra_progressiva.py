@@ -0,0 +1,161 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import instrumentacao
+import pipeline_dados
+import registro_graficos
+
+# --- Renderização progressiva: prévia dos gráficos a partir de uma amostra estratificada ---
+# Na carga, sorteamos uma vez uma amostra estratificada do df principal: estratos por plataforma e
+# gênero principal (o primeiro da lista), cada um com round(fração * tamanho) linhas (no mínimo
+# uma, para nenhuma plataforma/gênero sumir da prévia). Cada linha sorteada carrega o peso do seu
+# estrato (tamanho / sorteadas), então contagens e somas da amostra estimam as do df inteiro.
+# Nos gráficos progressivos (configuracao.GRAFICOS_PROGRESSIVOS) com seleções grandes, o dashboard
+# desenha primeiro a figura da amostra filtrada, com o erro estimado no título, e a substitui pela
+# exata quando o pool de pipeline_graficos termina. Gráficos de linhas (histograma, box plots)
+# usam as linhas sorteadas sem peso: a forma da distribuição é a mesma.
+
+COLUNA_PESO = '__peso'
+SEMENTE = 42
+Z_95 = 1.96
+
+
+class AmostraEstratificada:
+    """Linhas sorteadas do df principal (na ordem original), com a coluna de peso."""
+
+    def __init__(self, df_main, fracao, semente=SEMENTE):
+        if not 0 < fracao <= 1:
+            raise ValueError(f"A fração da amostra deve estar entre 0 e 1 (recebido: {fracao}).")
+        self.fracao = fracao
+        with instrumentacao.etapa('amostra_estratificada', linhas=len(df_main)):
+            genero_principal = df_main['genre_list'].str[0]
+            estrato = df_main.groupby([df_main['platform'], genero_principal], sort=False).ngroup().to_numpy()
+            tamanhos = np.bincount(estrato)
+            sorteadas = np.maximum(1, np.rint(fracao * tamanhos)).astype(np.int64)
+
+            # Ordem aleatória dentro de cada estrato; ficam as `sorteadas` primeiras de cada um
+            aleatorio = np.random.default_rng(semente).random(len(estrato))
+            ordem = np.lexsort((aleatorio, estrato))
+            inicio_estrato = np.cumsum(tamanhos) - tamanhos
+            posto = np.arange(len(ordem)) - inicio_estrato[estrato[ordem]]
+            posicoes = np.sort(ordem[posto < sorteadas[estrato[ordem]]])
+
+            self.df = df_main.iloc[posicoes].copy()
+            self.df[COLUNA_PESO] = (tamanhos / sorteadas)[estrato[posicoes]]
+
+    def __len__(self):
+        return len(self.df)
+
+    def resultados(self, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                   min_overall_year, max_overall_year):
+        """ResultadosAmostra da amostra com os filtros globais (os mesmos de pipeline_dados)."""
+        df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(
+            self.df, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+            min_overall_year, max_overall_year
+        )
+        return ResultadosAmostra({'jogo': df_games, 'genero': df_genres}, self.fracao)
+
+
+class ResultadosAmostra:
+    """Mesma interface de ResultadosPlano (`obter`), com contagens e somas ponderadas pelos pesos da amostra."""
+
+    def __init__(self, bases, fracao):
+        self.bases = bases
+        self.fracao = fracao
+        self._erros = {}
+
+    def obter(self, id_grafico, base=None, top_n=None):
+        espec = registro_graficos.GRAFICOS[id_grafico]
+        base = base or espec.bases[0]
+        df_base = self.bases[base]
+        if espec.dimensoes is None:
+            return df_base
+        if df_base.empty:
+            return pd.DataFrame(columns=list(espec.dimensoes))
+
+        dimensoes = list(espec.dimensoes)
+        dados = df_base[dimensoes].copy()
+        dados['__n'] = df_base[COLUNA_PESO]
+        dados['__amostra'] = 1
+        for coluna in registro_graficos._colunas_medidas(espec.medidas):
+            dados[f'{coluna}__soma'] = df_base[coluna] * df_base[COLUNA_PESO]
+            dados[f'{coluna}__n'] = df_base[COLUNA_PESO].where(df_base[coluna].notna(), 0)
+        tabela = dados.groupby(dimensoes, observed=True).sum().reset_index()
+
+        saida = registro_graficos._aplicar_medidas(tabela, espec.dimensoes, espec.medidas)
+        if 'count' in saida.columns:
+            saida['count'] = np.rint(saida['count']).astype(np.int64)
+        saida = registro_graficos._aplicar_top_n(espec, saida, top_n or espec.top_n)
+        # Erro relativo (95%) da contagem de cada grupo mostrado: z * sqrt((1 - f) / linhas sorteadas)
+        sorteadas = saida[dimensoes].merge(tabela[dimensoes + ['__amostra']], on=dimensoes)['__amostra']
+        self._erros[(id_grafico, base, top_n)] = float(np.median(Z_95 * np.sqrt((1 - self.fracao) / sorteadas)))
+        if espec.linhas:
+            dimensao = espec.dimensoes[0]
+            return df_base[df_base[dimensao].isin(saida[dimensao])]
+        return saida
+
+    def erro(self, id_grafico, base=None, top_n=None):
+        """Erro relativo estimado (mediana entre os grupos) do último `obter` do gráfico; None se não houve."""
+        return self._erros.get((id_grafico, base or registro_graficos.GRAFICOS[id_grafico].bases[0], top_n))
+
+
+def figura_previa(resultados, id_grafico, base=None, top_n=None):
+    """(DataFrame, figura) da prévia do gráfico, com a amostra e o erro estimado no título; figura None sem dados."""
+    df = resultados.obter(id_grafico, base=base, top_n=top_n)
+    if df.empty:
+        return df, None
+    parametros = {'top_n': top_n} if top_n is not None else {}
+    fig = registro_graficos.figura(id_grafico, df, **parametros)
+    espec = registro_graficos.GRAFICOS[id_grafico]
+    descricao = f"amostra de {resultados.fracao:.0%}"
+    if espec.dimensoes is not None and not espec.linhas:
+        descricao += f", erro estimado ±{resultados.erro(id_grafico, base, top_n):.0%}"
+    fig.update_layout(title_text=f"{fig.layout.title.text} (prévia: {descricao})")
+    return df, fig
+
+
+if __name__ == '__main__':
+    import configuracao
+    import dados_sinteticos
+
+    parser = argparse.ArgumentParser(description='Compara a prévia da amostra estratificada com os gráficos exatos.')
+    parser.add_argument('csv', nargs='?', help='CSV no formato do DB_completo (padrão: dataset sintético).')
+    parser.add_argument('--linhas', type=int, default=200_000, help='Tamanho do dataset sintético.')
+    parser.add_argument('--fracao', type=float, default=configuracao.FRACAO_AMOSTRA, help='Fração da amostra.')
+    args = parser.parse_args()
+
+    caminho = args.csv or dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho)
+    inicio = time.perf_counter()
+    amostra = AmostraEstratificada(df_main, args.fracao)
+    print(f'{len(amostra)} linhas sorteadas de {len(df_main)} em {time.perf_counter() - inicio:.2f}s')
+
+    filtros = ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year))
+    inicio = time.perf_counter()
+    df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)
+    exatos = registro_graficos.ResultadosPlano(registro_graficos.PLANO, {'jogo': df_games, 'genero': df_genres})
+    tempo_filtros = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    previas = amostra.resultados(*filtros, min_year, max_year)
+    print(f'filtros: exato {tempo_filtros * 1000:.0f} ms, amostra {(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+    for id_grafico, espec in registro_graficos.GRAFICOS.items():
+        inicio = time.perf_counter()
+        exato = exatos.obter(id_grafico)
+        registro_graficos.figura(id_grafico, exato).to_json()
+        tempo_exato = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        previa, figura = figura_previa(previas, id_grafico)
+        figura.to_json()
+        tempo_previa = time.perf_counter() - inicio
+        linha = f'{id_grafico:<22} exato {tempo_exato * 1000:7.1f} ms  prévia {tempo_previa * 1000:7.1f} ms'
+        if espec.dimensoes is not None and not espec.linhas:
+            # Erro relativo observado da primeira medida nos grupos presentes nas duas
+            medida = exato.columns[len(espec.dimensoes)]
+            juntos = exato.merge(previa, on=list(espec.dimensoes), suffixes=('', '_previa'))
+            observado = (juntos[f'{medida}_previa'] / juntos[medida] - 1).abs().median()
+            linha += f'  erro estimado ±{previas.erro(id_grafico):.1%}, observado {observado:.1%} (mediana)'
+        print(linha)
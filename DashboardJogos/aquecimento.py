@@ -0,0 +1,163 @@
+import argparse
+import collections
+import json
+import os
+import threading
+import time
+
+import configuracao
+import pipeline_dados
+
+# --- Pré-aquecimento dos caches: estado padrão dos filtros e os estados mais usados ---
+# O primeiro usuário depois de um deploy pagava a carga do dataset, os filtros globais do estado
+# padrão e todas as agregações e figuras. Cada rerun com um estado de filtros novo na sessão
+# acrescenta uma linha ao log de uso (configuracao.ARQUIVO_USO, JSONL); `estados_frequentes` lê as
+# linhas mais recentes e devolve os K estados mais vistos. O dashboard, ao carregar cada versão do
+# dataset (gerenciador_dataset, na thread de fundo, antes de a versão virar a atual), percorre o
+# estado padrão e esses K estados pelo mesmo caminho do script (filtros, agregações e figuras,
+# dados_dashboard.warm_up_version). Subindo com `python servidor.py`, a primeira versão é carregada
+# e aquecida no início do processo, antes da primeira sessão; com `streamlit run` tudo começa no
+# primeiro rerun, que paga a carga e só os reruns seguintes encontram os caches prontos.
+# Os caches do Streamlit vivem na memória de cada processo: `python aquecimento.py`, rodado no
+# deploy, não aquece o servidor. Ele prepara o que fica em disco (banco DuckDB, dataset
+# particionado, arquivos do motor configurado) e mostra quanto custa cada estado a frio e com os
+# caches quentes.
+
+LINHAS_USO = 100_000
+
+# O log não cresce sem limite: quando passa de 2 * LINHAS_USO linhas ele é reescrito só com as
+# LINHAS_USO mais recentes (as que `estados_frequentes` lê), de uma vez a cada LINHAS_USO registros.
+# A contagem é do processo (começa pelas linhas já no arquivo); registros de outros processos
+# gravados entre a leitura e a troca do arquivo se perdem, o que só afeta as estatísticas.
+_linhas_registradas = {}
+_trava_uso = threading.Lock()
+
+
+def _aparar_log(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        linhas = collections.deque(arquivo, maxlen=LINHAS_USO)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas)
+    os.replace(temporario, caminho)
+    return len(linhas)
+
+
+def registrar_uso(platform_filter, genre_filter, pandemic_periods_filter, current_years_filter, caminho=None):
+    """Acrescenta um estado de filtros ao log de uso (nada com o log desligado ou sem permissão de escrita)."""
+    caminho = configuracao.ARQUIVO_USO if caminho is None else caminho
+    if not caminho:
+        return
+    registro = {
+        'plataforma': platform_filter,
+        'generos': list(genre_filter),
+        'periodos': list(pandemic_periods_filter),
+        'anos': [int(ano) for ano in current_years_filter],
+        'timestamp': time.time(),
+    }
+    try:
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        with _trava_uso:
+            if caminho not in _linhas_registradas:
+                with open(caminho, 'a+', encoding='utf-8') as arquivo:
+                    arquivo.seek(0)
+                    _linhas_registradas[caminho] = sum(1 for _ in arquivo)
+            with open(caminho, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            _linhas_registradas[caminho] += 1
+            if _linhas_registradas[caminho] > 2 * LINHAS_USO:
+                _linhas_registradas[caminho] = _aparar_log(caminho)
+    except OSError:
+        pass
+
+
+def estados_frequentes(k, caminho=None):
+    """Os `k` estados mais registrados nas últimas LINHAS_USO linhas do log, do mais ao menos frequente.
+
+    Cada estado é (plataforma, gêneros, períodos, (ano inicial, ano final)), com as listas na ordem
+    em que os widgets as devolvem (a mesma das chaves dos caches).
+    """
+    caminho = configuracao.ARQUIVO_USO if caminho is None else caminho
+    if k <= 0 or not caminho or not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as arquivo:
+        linhas = collections.deque(arquivo, maxlen=LINHAS_USO)
+    contagem = collections.Counter()
+    for linha in linhas:
+        try:
+            registro = json.loads(linha)
+            contagem[(registro['plataforma'], tuple(registro['generos']), tuple(registro['periodos']),
+                      tuple(registro['anos']))] += 1
+        except (ValueError, KeyError, TypeError):
+            continue  # linha truncada (escrita interrompida) ou de um formato anterior
+    return [(plataforma, list(generos), list(periodos), anos)
+            for (plataforma, generos, periodos, anos), _ in contagem.most_common(k)]
+
+
+if __name__ == '__main__':
+    import backend_duckdb
+    import cubo_anos
+    import dataset_particionado
+    import motor_polars
+    import pipeline_graficos
+    import registro_graficos
+
+    parser = argparse.ArgumentParser(
+        description='Prepara os artefatos em disco e mede o estado padrão e os estados mais usados (log de uso).'
+    )
+    parser.add_argument('csv', nargs='?', default=pipeline_dados.CAMINHO_DADOS, help='CSV no formato do DB_completo.')
+    parser.add_argument('--estados', type=int, default=configuracao.ESTADOS_AQUECIMENTO,
+                        help='Quantos estados mais frequentes do log aquecer além do padrão.')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if configuracao.BACKEND_CONSULTAS == 'duckdb':
+        banco = backend_duckdb.abrir(args.csv)
+        min_year, max_year = banco.min_year, banco.max_year
+        generos = banco.generos()
+    else:
+        motor = {'polars': motor_polars, 'particionado': dataset_particionado}.get(configuracao.MOTOR_DADOS, pipeline_dados)
+        df_main, min_year, max_year = motor.load_and_preprocess_data(args.csv)
+        generos = motor.all_genres(df_main)
+        cubo = None
+        if configuracao.CUBO_ANOS and motor is pipeline_dados:
+            cubo = cubo_anos.CuboAnos(df_main, configuracao.ERRO_QUANTIS, configuracao.PRECISAO_HLL)
+    print(f'carga ({configuracao.MOTOR_DADOS}/{configuracao.BACKEND_CONSULTAS}): {time.perf_counter() - inicio:.2f}s')
+
+    estados = [('Todas', ['Todos'] + generos, list(pipeline_dados.PERIODOS_PANDEMIA), None)]
+    estados += estados_frequentes(args.estados)
+    vistos = set()
+    for plataforma, generos_estado, periodos, anos in estados:
+        inicio = time.perf_counter()
+        if configuracao.BACKEND_CONSULTAS == 'duckdb':
+            anos = anos or banco.intervalo_anos(plataforma, generos_estado, periodos) or (min_year, max_year)
+        elif anos is None:
+            _, _, ano_inicial, ano_final = motor.apply_all_global_filters(
+                df_main, plataforma, generos_estado, periodos, (min_year, max_year), min_year, max_year
+            )
+            anos = (ano_inicial, ano_final) if ano_inicial is not None else (min_year, max_year)
+        anos = (int(anos[0]), int(anos[1]))
+        if (plataforma, tuple(generos_estado), tuple(periodos), anos) in vistos:
+            continue  # o estado padrão também costuma ser o mais frequente do log
+        vistos.add((plataforma, tuple(generos_estado), tuple(periodos), anos))
+        if configuracao.BACKEND_CONSULTAS == 'duckdb':
+            resultados = banco.resultados(plataforma, generos_estado, periodos, anos)
+        else:
+            df_games, df_genres, _, _ = motor.apply_all_global_filters(
+                df_main, plataforma, generos_estado, periodos, anos, min_year, max_year
+            )
+            resultados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, {'jogo': df_games, 'genero': df_genres})
+            if cubo is not None:
+                resultados = cubo_anos.ResultadosCubo(cubo, (plataforma, generos_estado, periodos, anos), resultados)
+        tempo_filtros = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for id_grafico in registro_graficos.GRAFICOS:
+            pipeline_graficos.construir_grafico(resultados, id_grafico)
+        tempo_frio = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for id_grafico in registro_graficos.GRAFICOS:
+            pipeline_graficos.construir_grafico(resultados, id_grafico)
+        tempo_quente = time.perf_counter() - inicio
+        print(f'{plataforma} / {len(generos_estado)} gênero(s) / {len(periodos)} período(s) / {anos[0]}-{anos[1]}: '
+              f'filtros {tempo_filtros * 1000:.0f} ms, gráficos {tempo_frio * 1000:.0f} ms a frio, '
+              f'{tempo_quente * 1000:.2f} ms aquecidos')
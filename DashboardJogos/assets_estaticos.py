@@ -0,0 +1,98 @@
+import argparse
+import hashlib
+import os
+import shutil
+
+try:
+    from PIL import Image
+except ImportError:  # dependência opcional: sem ela as imagens são publicadas sem recompressão
+    Image = None
+
+# --- Imagens de fundo servidas como arquivos estáticos (server.enableStaticServing) ---
+# Em vez de embutir a imagem em base64 no <style> de cada rerun (os bytes da imagem iam de novo
+# em cada delta, para cada sessão), a imagem é publicada uma vez na pasta `static/` ao lado do
+# script, que o Streamlit serve em `app/static/<nome>` quando a opção server.enableStaticServing
+# está ligada (.streamlit/config.toml). O nome leva o hash do conteúdo de origem e dos parâmetros
+# de conversão: a URL muda quando a imagem muda, então o navegador pode manter a cópia em cache
+# (o Streamlit manda ETag/Last-Modified; o Cache-Control dessa rota não é configurável). Com o
+# Pillow, a imagem é reduzida à largura alvo e regravada em WebP; sem ele, é copiada como está.
+# Com a opção desligada, o dashboard continua com o data URI em base64.
+
+PASTA_ESTATICOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+URL_ESTATICOS = 'app/static'
+QUALIDADE_WEBP = 80
+
+# Imagens publicadas: nome lógico -> (arquivo de origem, largura máxima em pixels)
+IMAGENS = {
+    'fundo_app': ('Background_app.jpg', 1920),
+    'fundo_sidebar': ('background_sidebar.jpg', 640),
+}
+
+
+def disponivel():
+    return Image is not None
+
+
+def _hash_conteudo(caminho, *parametros):
+    hash_arquivo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            hash_arquivo.update(bloco)
+    hash_arquivo.update(repr(parametros).encode())
+    return hash_arquivo.hexdigest()[:12]
+
+
+def _gravar(origem, destino, largura_maxima, webp):
+    """Grava a imagem publicada num arquivo temporário e troca de uma vez (leitores nunca veem meia imagem)."""
+    temporario = f'{destino}.tmp'
+    if webp:
+        with Image.open(origem) as imagem:
+            if imagem.width > largura_maxima:
+                altura = round(imagem.height * largura_maxima / imagem.width)
+                imagem = imagem.resize((largura_maxima, altura), Image.LANCZOS)
+            imagem.save(temporario, format='WEBP', quality=QUALIDADE_WEBP, method=6)
+    else:
+        shutil.copyfile(origem, temporario)
+    os.replace(temporario, destino)
+
+
+def publicar(caminho_origem, largura_maxima, pasta=PASTA_ESTATICOS, webp=None):
+    """Publica a imagem em `pasta` com nome por hash (uma vez por versão) e devolve a URL relativa.
+
+    Devolve None se a origem não existir. Versões antigas da mesma imagem são removidas.
+    """
+    if not os.path.exists(caminho_origem):
+        return None
+    webp = disponivel() if webp is None else webp
+    base, extensao = os.path.splitext(os.path.basename(caminho_origem))
+    extensao = '.webp' if webp else extensao.lower()
+    nome = f'{base}-{_hash_conteudo(caminho_origem, largura_maxima, webp, QUALIDADE_WEBP)}{extensao}'
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, nome)
+    if not os.path.exists(destino):
+        _gravar(caminho_origem, destino, largura_maxima, webp)
+        for antigo in os.listdir(pasta):
+            if antigo != nome and antigo.startswith(f'{base}-') and not antigo.endswith('.tmp'):
+                os.remove(os.path.join(pasta, antigo))
+    return f'{URL_ESTATICOS}/{nome}'
+
+
+def publicar_imagens(pasta=PASTA_ESTATICOS):
+    """URL de cada imagem de IMAGENS (None para as que não existem)."""
+    return {nome: publicar(origem, largura, pasta) for nome, (origem, largura) in IMAGENS.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publica as imagens de fundo na pasta static/ e mostra os tamanhos.')
+    parser.add_argument('--pasta', default=PASTA_ESTATICOS, help='Pasta servida pelo Streamlit (padrão: static/).')
+    args = parser.parse_args()
+
+    for nome, url in publicar_imagens(args.pasta).items():
+        origem = IMAGENS[nome][0]
+        if url is None:
+            print(f'{nome}: {origem} não encontrado')
+            continue
+        publicado = os.path.join(args.pasta, os.path.basename(url))
+        print(f'{nome}: {origem} ({os.path.getsize(origem) / 1024:.1f} KiB, '
+              f'{os.path.getsize(origem) * 4 / 3 / 1024:.1f} KiB em base64 por rerun) -> '
+              f'{url} ({os.path.getsize(publicado) / 1024:.1f} KiB, uma vez por navegador)')
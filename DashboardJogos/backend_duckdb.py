@@ -0,0 +1,417 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import configuracao
+import instrumentacao
+import pipeline_dados
+import registro_graficos
+
+try:
+    import duckdb
+except ImportError:  # dependência opcional: sem ela o dashboard usa o backend pandas
+    duckdb = None
+
+# --- Backend de consultas em DuckDB (opcional, DASH_BACKEND=duckdb) ---
+# O dataset pré-processado (pelo próprio pipeline_dados, que continua sendo a referência) é
+# gravado uma vez em um arquivo DuckDB na pasta de cache. Depois disso cada processo do
+# Streamlit só abre o arquivo em modo leitura: os filtros globais e a agregação de cada gráfico
+# do registro_graficos são compilados para SQL e só os resultados (pequenos) voltam ao Python,
+# então a memória por processo não cresce com o dataset.
+# `python backend_duckdb.py` confere os resultados contra o caminho pandas em vários filtros.
+
+ARQUIVO_BANCO = "jogos.duckdb"
+
+# Colunas do df principal usadas pelo dashboard; as colunas genre_* viram a lista genre_list
+COLUNAS_BANCO = pipeline_dados.COLUNAS_TEXTO + [
+    'release_year', 'release_month', 'periodo', 'preco_dolar', 'preco_euro', 'genre_list',
+]
+
+
+def disponivel():
+    return duckdb is not None
+
+
+def _exigir_duckdb():
+    if duckdb is None:
+        raise ImportError("O backend DuckDB precisa do pacote duckdb (pip install duckdb).")
+
+
+def _identificador(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+
+# --- Construção do arquivo ---
+def construir_banco(caminho_csv, caminho_banco):
+    """Pré-processa o CSV com o pipeline pandas e grava a tabela `jogos` (escrita atômica)."""
+    _exigir_duckdb()
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho_csv)
+    with instrumentacao.etapa('duckdb_gravar', linhas=len(df_main)):
+        df_jogos = df_main[COLUNAS_BANCO].reset_index(drop=True)
+        df_jogos['genre_list'] = df_jogos['genre_list'].map(list)
+        # __linha guarda a ordem do df principal (as linhas devolvidas saem na mesma ordem)
+        df_jogos.insert(0, '__linha', np.arange(len(df_jogos), dtype=np.int64))
+        del df_main
+
+        temporario = f"{caminho_banco}.{os.getpid()}.tmp"
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        conexao = duckdb.connect(temporario)
+        try:
+            conexao.register('df_jogos', df_jogos)
+            conexao.execute("CREATE TABLE jogos AS SELECT * FROM df_jogos ORDER BY __linha")
+            conexao.unregister('df_jogos')
+            conexao.execute("CREATE TABLE metadados (chave VARCHAR, valor VARCHAR)")
+            conexao.executemany("INSERT INTO metadados VALUES (?, ?)", [
+                ('assinatura', json.dumps(configuracao.assinatura_arquivo(caminho_csv), sort_keys=True)),
+                ('min_year', str(min_year)),
+                ('max_year', str(max_year)),
+            ])
+        finally:
+            conexao.close()
+        os.replace(temporario, caminho_banco)
+    return caminho_banco
+
+
+def _assinatura_gravada(caminho_banco):
+    try:
+        conexao = duckdb.connect(caminho_banco, read_only=True)
+    except duckdb.Error:
+        return None
+    try:
+        linha = conexao.execute("SELECT valor FROM metadados WHERE chave = 'assinatura'").fetchone()
+    except duckdb.Error:
+        return None
+    finally:
+        conexao.close()
+    return linha[0] if linha else None
+
+
+def abrir(caminho_csv=pipeline_dados.CAMINHO_DADOS, caminho_banco=None):
+    """BancoDuckDB do CSV, (re)construindo o arquivo quando o CSV mudou desde a última gravação."""
+    _exigir_duckdb()
+    if not os.path.exists(caminho_csv):
+        raise FileNotFoundError(caminho_csv)
+    caminho_banco = caminho_banco or os.path.join(configuracao.pasta_cache('duckdb'), ARQUIVO_BANCO)
+    assinatura = json.dumps(configuracao.assinatura_arquivo(caminho_csv), sort_keys=True)
+    if not os.path.exists(caminho_banco) or _assinatura_gravada(caminho_banco) != assinatura:
+        construir_banco(caminho_csv, caminho_banco)
+    return BancoDuckDB(caminho_banco)
+
+
+def caminho_versao(caminho_csv):
+    """Arquivo DuckDB próprio da versão atual do CSV (recarga a quente pelo gerenciador_dataset).
+
+    O DuckDB reaproveita a instância já aberta de um mesmo caminho no processo: um arquivo novo no
+    mesmo caminho continuaria mostrando a versão antiga, então cada versão tem o seu.
+    """
+    assinatura = json.dumps(configuracao.assinatura_arquivo(caminho_csv), sort_keys=True)
+    nome, extensao = os.path.splitext(ARQUIVO_BANCO)
+    resumo = hashlib.sha1(assinatura.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(configuracao.pasta_cache('duckdb'), f'{nome}-{resumo}{extensao}')
+
+
+# --- Filtros globais em SQL ---
+def compilar_filtros(platform_filter, genre_filter, pandemic_periods_filter, current_years_filter=None):
+    """(cláusula WHERE, parâmetros) equivalentes a pipeline_dados.apply_all_global_filters.
+
+    Sem período selecionado a cláusula não aceita nenhuma linha, como no caminho pandas.
+    """
+    condicoes, parametros = [], []
+    if platform_filter != 'Todas':
+        condicoes.append("platform = ?")
+        parametros.append(platform_filter)
+    if pandemic_periods_filter:
+        condicoes.append("list_contains(?::VARCHAR[], periodo)")
+        parametros.append(list(pandemic_periods_filter))
+    else:
+        condicoes.append("FALSE")
+    if genre_filter and 'Todos' not in genre_filter:
+        condicoes.append("list_has_any(genre_list, ?::VARCHAR[])")
+        parametros.append(list(genre_filter))
+    if current_years_filter is not None:
+        condicoes.append("release_year BETWEEN ? AND ?")
+        parametros.extend([int(current_years_filter[0]), int(current_years_filter[1])])
+    return " AND ".join(condicoes) if condicoes else "TRUE", parametros
+
+
+class BancoDuckDB:
+    """Arquivo DuckDB aberto em modo leitura; cada consulta usa um cursor próprio (seguro entre threads)."""
+
+    def __init__(self, caminho_banco):
+        _exigir_duckdb()
+        self.caminho = caminho_banco
+        self._conexao = duckdb.connect(caminho_banco, read_only=True)
+        metadados = dict(self._conexao.execute("SELECT chave, valor FROM metadados").fetchall())
+        self.min_year = int(metadados['min_year'])
+        self.max_year = int(metadados['max_year'])
+        self.colunas = [linha[0] for linha in self._conexao.execute("DESCRIBE jogos").fetchall()]
+        self._plataformas = None
+        self._generos = None
+
+    def consultar(self, sql, parametros=()):
+        """DataFrame com o resultado da consulta."""
+        cursor = self._conexao.cursor()
+        try:
+            return cursor.execute(sql, list(parametros)).df()
+        finally:
+            cursor.close()
+
+    def _valor(self, sql, parametros=()):
+        cursor = self._conexao.cursor()
+        try:
+            return cursor.execute(sql, list(parametros)).fetchone()
+        finally:
+            cursor.close()
+
+    def plataformas(self):
+        """Plataformas únicas, ordenadas (o arquivo é só leitura: calculadas uma vez)."""
+        if self._plataformas is None:
+            self._plataformas = self.consultar(
+                "SELECT DISTINCT platform FROM jogos ORDER BY platform"
+            )['platform'].tolist()
+        return self._plataformas
+
+    def generos(self):
+        """Gêneros únicos, como pipeline_dados.all_genres."""
+        if self._generos is None:
+            self._generos = self.consultar(
+                "SELECT DISTINCT UNNEST(genre_list) AS genre FROM jogos ORDER BY genre"
+            )['genre'].tolist()
+        return self._generos
+
+    def intervalo_anos(self, platform_filter, genre_filter, pandemic_periods_filter):
+        """Anos mínimo e máximo dinâmicos (antes do filtro de ano), como no caminho pandas."""
+        if not pandemic_periods_filter:
+            return None, None
+        onde, parametros = compilar_filtros(platform_filter, genre_filter, pandemic_periods_filter)
+        minimo, maximo = self._valor(f"SELECT min(release_year), max(release_year) FROM jogos WHERE {onde}", parametros)
+        if minimo is None:
+            return self.min_year, self.max_year
+        return int(minimo), int(maximo)
+
+    def resultados(self, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                   plano=registro_graficos.PLANO):
+        return ResultadosDuckDB(self, plano, compilar_filtros(
+            platform_filter, genre_filter, pandemic_periods_filter, current_years_filter
+        ))
+
+    def fechar(self, remover=False):
+        """Fecha a conexão; com `remover`, apaga também o arquivo (versão substituída)."""
+        self._conexao.close()
+        if remover and os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+
+# --- Agregações dos gráficos em SQL ---
+class ResultadosDuckDB:
+    """Mesma interface de registro_graficos.ResultadosPlano (`obter`), com cada gráfico em uma consulta.
+
+    Os resultados ficam guardados por pedido (gráfico, base, top-N), então reruns que só mudam
+    widgets das abas não voltam ao banco.
+    """
+
+    def __init__(self, banco, plano, filtros):
+        self.banco = banco
+        self.plano = plano
+        self.onde, self.parametros = filtros
+        self._resultados = {}
+        self._trava = threading.Lock()
+
+    def _base(self, base, colunas):
+        """Subconsulta da base: jogos filtrados ('jogo') ou uma linha por gênero do jogo ('genero')."""
+        selecao = [_identificador(coluna) for coluna in colunas if coluna not in ('__linha', 'genre')]
+        if base == 'jogo':
+            selecao = ["__linha", "0 AS __posicao"] + selecao
+        else:
+            # A posição na lista mantém a ordem do explode do pandas dentro de cada jogo
+            selecao = ["__linha", "UNNEST(range(len(genre_list))) AS __posicao"] + selecao + \
+                      ["UNNEST(genre_list) AS genre"]
+        return f"(SELECT {', '.join(selecao)} FROM jogos WHERE {self.onde})"
+
+    def quantidade(self, base='jogo'):
+        """Número de linhas da base filtrada."""
+        chave = ('quantidade', base)
+        with self._trava:
+            if chave in self._resultados:
+                return self._resultados[chave]
+        quantidade = int(self.banco._valor(f"SELECT count(*) FROM {self._base(base, [])}", self.parametros)[0])
+        with self._trava:
+            return self._resultados.setdefault(chave, quantidade)
+
+    def distintos(self, coluna):
+        """Valores distintos (não nulos) de `coluna` nos jogos filtrados; exato (o approx_count_distinct erra demais)."""
+        chave = ('distintos', coluna)
+        with self._trava:
+            if chave in self._resultados:
+                return self._resultados[chave]
+        sql = f"SELECT count(DISTINCT {_identificador(coluna)}) FROM {self._base('jogo', [coluna])}"
+        distintos = int(self.banco._valor(sql, self.parametros)[0])
+        with self._trava:
+            return self._resultados.setdefault(chave, distintos)
+
+    def colunas_jogos(self, colunas):
+        """Colunas das linhas filtradas (uma por jogo), na ordem do df principal."""
+        return self.banco.consultar(
+            f"SELECT {', '.join(map(_identificador, colunas))} FROM {self._base('jogo', colunas)} ORDER BY __linha",
+            self.parametros,
+        )
+
+    def _sql_agregacao(self, espec, base, top_n):
+        dimensoes = [_identificador(dimensao) for dimensao in espec.dimensoes]
+        colunas_medidas = sorted(registro_graficos._colunas_medidas(espec.medidas))
+        expressoes, nomes = [], []
+        for medida in espec.medidas:
+            if medida == registro_graficos.CONTAGEM:
+                expressoes.append("count(*) AS count")
+                nomes.append('count')
+            elif medida[0] == 'soma':
+                expressoes.append(f"coalesce(sum({_identificador(medida[1])}), 0) AS {_identificador(medida[1])}")
+                nomes.append(medida[1])
+            else:
+                expressoes.append(f"avg({_identificador(medida[1])}) AS {_identificador(medida[1])}")
+                nomes.append(medida[1])
+        # Chaves nulas ficam de fora, como no groupby do pandas
+        nao_nulos = " AND ".join(f"{dimensao} IS NOT NULL" for dimensao in dimensoes)
+        sql = (f"SELECT {', '.join(dimensoes)}, {', '.join(expressoes)} "
+               f"FROM {self._base(base, list(espec.dimensoes) + colunas_medidas)} "
+               f"WHERE {nao_nulos} GROUP BY {', '.join(dimensoes)}")
+        ordem_dimensoes = ", ".join(dimensoes)
+        if not top_n:
+            return f"{sql} ORDER BY {ordem_dimensoes}"
+        # Empates no top-N são decididos pelas dimensões, como no sort estável sobre o groupby
+        medida = _identificador(nomes[0])
+        if espec.top_por:
+            por = _identificador(espec.top_por)
+            return (f"{sql} QUALIFY row_number() OVER (PARTITION BY {por} ORDER BY {medida} DESC, "
+                    f"{ordem_dimensoes}) <= {int(top_n)} ORDER BY {por}, {medida} DESC, {ordem_dimensoes}")
+        return f"{sql} ORDER BY {medida} DESC, {ordem_dimensoes} LIMIT {int(top_n)}"
+
+    def _consultar(self, espec, base, top_n):
+        colunas = list(espec.colunas) if espec.colunas is not None else \
+            [coluna for coluna in self.banco.colunas if coluna != '__linha'] + (['genre'] if base == 'genero' else [])
+        if espec.dimensoes is None:
+            sql = f"SELECT {', '.join(map(_identificador, colunas))} FROM {self._base(base, colunas)} " \
+                  f"ORDER BY __linha, __posicao"
+        elif espec.linhas:
+            dimensao = _identificador(espec.dimensoes[0])
+            sql = (f"SELECT {', '.join(map(_identificador, colunas))} FROM {self._base(base, colunas)} "
+                   f"WHERE {dimensao} IN (SELECT {dimensao} FROM ({self._sql_agregacao(espec, base, top_n)})) "
+                   f"ORDER BY __linha, __posicao")
+            # A subconsulta do top-N usa os mesmos filtros: parâmetros duas vezes
+            return self.banco.consultar(sql, self.parametros * 2)
+        else:
+            sql = self._sql_agregacao(espec, base, top_n)
+        return self.banco.consultar(sql, self.parametros)
+
+    def obter(self, id_grafico, base=None, top_n=None):
+        """DataFrame que o gráfico desenha; `base` e `top_n` substituem os padrões da especificação."""
+        espec = self.plano.especificacoes[id_grafico]
+        base = base or espec.bases[0]
+        if base not in espec.bases:
+            raise ValueError(f"O gráfico '{id_grafico}' não aceita a base '{base}' (aceita: {espec.bases}).")
+        top_n = top_n or espec.top_n
+        chave = (id_grafico, base, top_n)
+        with self._trava:
+            if chave in self._resultados:
+                return self._resultados[chave]
+        with instrumentacao.etapa(f"duckdb[{id_grafico}:{base}]"):
+            df = self._consultar(espec, base, top_n)
+        with self._trava:
+            return self._resultados.setdefault(chave, df)
+
+
+# --- Equivalência com o caminho pandas (referência) ---
+CENARIOS_FILTROS = [
+    ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, None),
+    ('Todas', ['Action', 'Indie'], pipeline_dados.PERIODOS_PANDEMIA, None),
+    ('Todas', ['Todos'], ['Pandemia'], None),
+    ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (2015, 2019)),
+    ('Todas', [], ['Pré-Pandemia', 'Pós-Pandemia'], (2010, 2030)),
+    ('Todas', ['Todos'], [], None),
+]
+
+
+def _cenarios(df_main):
+    cenarios = list(CENARIOS_FILTROS)
+    plataformas = df_main['platform'].value_counts()
+    if len(plataformas):
+        cenarios.append((plataformas.index[0], ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, None))
+        cenarios.append((plataformas.index[-1], ['Todos'], ['Pandemia'], None))
+    return cenarios
+
+
+def verificar_equivalencia(caminho_csv, caminho_banco=None):
+    """Compara intervalo de anos, contagens e o DataFrame de cada gráfico entre DuckDB e pandas.
+
+    Devolve a lista de divergências (cenário, gráfico, mensagem); vazia quando tudo confere.
+    """
+    banco = abrir(caminho_csv, caminho_banco)
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho_csv)
+    divergencias = []
+    try:
+        if banco.plataformas() != sorted(df_main['platform'].unique().tolist()):
+            divergencias.append(('-', 'plataformas', 'lista de plataformas diferente'))
+        if banco.generos() != pipeline_dados.all_genres(df_main):
+            divergencias.append(('-', 'generos', 'lista de gêneros diferente'))
+
+        for platform_filter, genre_filter, periods_filter, years_filter in _cenarios(df_main):
+            cenario = f"{platform_filter} | {genre_filter} | {periods_filter} | {years_filter}"
+            _, _, dyn_min, dyn_max = pipeline_dados.apply_all_global_filters(
+                df_main, platform_filter, genre_filter, periods_filter, (min_year, max_year), min_year, max_year
+            )
+            if banco.intervalo_anos(platform_filter, genre_filter, periods_filter) != (dyn_min, dyn_max):
+                divergencias.append((cenario, 'intervalo_anos', f'pandas ({dyn_min}, {dyn_max})'))
+            years_filter = years_filter or (dyn_min or min_year, dyn_max or max_year)
+            df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(
+                df_main, platform_filter, genre_filter, periods_filter, years_filter, min_year, max_year
+            )
+            referencia = registro_graficos.ResultadosPlano(
+                registro_graficos.PLANO, {'jogo': df_games, 'genero': df_genres}
+            )
+            resultados = banco.resultados(platform_filter, genre_filter, periods_filter, years_filter)
+            if resultados.quantidade() != len(df_games) or resultados.quantidade('genero') != len(df_genres):
+                divergencias.append((cenario, 'quantidade', f'pandas {len(df_games)} / {len(df_genres)}'))
+            if df_games.empty:
+                continue
+            for coluna in ('developers', 'publishers'):
+                if resultados.distintos(coluna) != referencia.distintos(coluna):
+                    divergencias.append((cenario, f'distintos[{coluna}]', f'pandas {referencia.distintos(coluna)}'))
+            for id_grafico, espec in registro_graficos.GRAFICOS.items():
+                for base in espec.bases:
+                    obtido = resultados.obter(id_grafico, base=base)
+                    esperado = referencia.obter(id_grafico, base=base)
+                    if espec.colunas is not None:
+                        esperado = esperado[list(espec.colunas)]
+                    try:
+                        pd.testing.assert_frame_equal(
+                            registro_graficos.normalizar(obtido), registro_graficos.normalizar(esperado),
+                            check_dtype=False, check_index_type=False,
+                        )
+                    except AssertionError as erro:
+                        divergencias.append((cenario, f'{id_grafico}[{base}]', str(erro).splitlines()[0]))
+    finally:
+        banco.fechar()
+    return divergencias
+
+
+if __name__ == '__main__':
+    import dados_sinteticos
+
+    parser = argparse.ArgumentParser(description='Confere o backend DuckDB contra o caminho pandas.')
+    parser.add_argument('csv', nargs='?', help='CSV no formato do DB_completo (padrão: dataset sintético).')
+    parser.add_argument('--linhas', type=int, default=20_000, help='Tamanho do dataset sintético.')
+    args = parser.parse_args()
+
+    _exigir_duckdb()
+    caminho = args.csv or dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    caminho_banco = os.path.join(configuracao.pasta_cache('duckdb'), 'conferencia.duckdb')
+    divergencias = verificar_equivalencia(caminho, caminho_banco)
+    for cenario, alvo, mensagem in divergencias:
+        print(f'DIVERGÊNCIA [{cenario}] {alvo}: {mensagem}')
+    print('DuckDB confere com o caminho pandas.' if not divergencias else f'{len(divergencias)} divergência(s).')
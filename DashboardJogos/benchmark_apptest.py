@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.testing.v1 import AppTest
+
+import configuracao
+import dados_sinteticos
+
+# --- Benchmark de reruns do dashboard sem navegador (streamlit.testing AppTest) ---
+# Reproduz "traces" de interação (arquivos JSON em traces_benchmark/) sobre o script do
+# dashboard: cada passo altera um widget e dispara um rerun. Para cada rerun são registrados o
+# tempo total, o tempo de cada bloco de gráfico (do fim do gráfico anterior até o fim do
+# st.plotly_chart atual) e o tamanho do JSON de cada figura. Como os traces são arquivos, a
+# mesma carga de trabalho pode ser repetida para comparar versões do código.
+
+PASTA_DASHBOARD = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PADRAO = os.path.join(PASTA_DASHBOARD, 'dashboard_jogos_streamlit_v11.py')
+PASTA_TRACES = os.path.join(PASTA_DASHBOARD, 'traces_benchmark')
+ARQUIVO_RESULTADOS = 'benchmark_apptest.jsonl'
+
+
+class CronometroGraficos:
+    """Substitui o plotly_chart durante o benchmark para marcar o fim de cada bloco de gráfico.
+
+    Cobre st.plotly_chart e o método de DeltaGenerator: o dashboard desenha os gráficos em espaços
+    st.empty() (instrumentacao.plotly_chart com `container`), e st.plotly_chart já vem ligado ao
+    container principal na importação do Streamlit, sem passar pelo atributo da classe.
+    """
+
+    def __init__(self):
+        self.original = st.plotly_chart
+        self.original_metodo = DeltaGenerator.plotly_chart
+        self.registros = []
+        self.ultimo_fim = None
+
+    def iniciar_rerun(self):
+        self.registros = []
+        self.ultimo_fim = time.perf_counter()
+
+    def __call__(self, figure_or_data, *args, **kwargs):
+        return self._medir(self.original, figure_or_data, *args, **kwargs)
+
+    def _medir(self, desenhar, figure_or_data, *args, **kwargs):
+        inicio_chamada = time.perf_counter()
+        resultado = desenhar(figure_or_data, *args, **kwargs)
+        fim = time.perf_counter()
+        titulo = getattr(getattr(getattr(figure_or_data, 'layout', None), 'title', None), 'text', None)
+        self.registros.append({
+            'grafico': titulo,
+            'bloco_s': fim - self.ultimo_fim,
+            'plotly_chart_s': fim - inicio_chamada,
+        })
+        self.ultimo_fim = fim
+        return resultado
+
+    def __enter__(self):
+        cronometro = self
+
+        def plotly_chart(container, figure_or_data, *args, **kwargs):
+            return cronometro._medir(lambda *a, **k: cronometro.original_metodo(container, *a, **k),
+                                     figure_or_data, *args, **kwargs)
+
+        st.plotly_chart = self
+        DeltaGenerator.plotly_chart = plotly_chart
+        return self
+
+    def __exit__(self, *exc):
+        st.plotly_chart = self.original
+        DeltaGenerator.plotly_chart = self.original_metodo
+        return False
+
+
+def _tamanhos_figuras(at):
+    """Tamanho (bytes) do JSON de cada figura renderizada, indexado pelo título."""
+    tamanhos = {}
+    for posicao, elemento in enumerate(at.get('plotly_chart')):
+        spec = elemento.proto.spec
+        try:
+            titulo = json.loads(spec).get('layout', {}).get('title', {}).get('text')
+        except (ValueError, AttributeError):
+            titulo = None
+        tamanhos[titulo if titulo is not None else f'#{posicao}'] = len(spec.encode())
+    return tamanhos
+
+
+def aplicar_passo(at, passo):
+    """Altera o widget descrito no passo do trace (sem passo de widget: apenas rerun)."""
+    if 'widget' not in passo:
+        return
+    widget = getattr(at, passo['widget'])(key=passo['key'])
+    if 'faixa_relativa' in passo:
+        minimo, maximo = widget.min, widget.max
+        inicio, fim = passo['faixa_relativa']
+        widget.set_range(int(round(minimo + inicio * (maximo - minimo))), int(round(minimo + fim * (maximo - minimo))))
+    elif 'opcao' in passo:
+        widget.select_index(passo['opcao'])
+    elif 'desmarcar' in passo:
+        widget.unselect(passo['desmarcar'])
+    elif 'desmarcar_opcao' in passo:
+        widget.unselect(widget.options[passo['desmarcar_opcao']])
+    elif 'marcar' in passo:
+        widget.select(passo['marcar'])
+    else:
+        widget.set_value(passo['valor'])
+
+
+def executar_trace(caminho_trace, script=SCRIPT_PADRAO, timeout=600, limpar_cache=True):
+    """Reproduz um trace e devolve um registro por rerun."""
+    with open(caminho_trace, encoding='utf-8') as arquivo:
+        conteudo = arquivo.read()
+    trace = json.loads(conteudo)
+    hash_trace = hashlib.sha1(conteudo.encode()).hexdigest()[:12]
+
+    if limpar_cache:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+
+    registros = []
+    at = AppTest.from_file(script, default_timeout=timeout)
+    with CronometroGraficos() as cronometro:
+        for indice, passo in enumerate(trace['passos']):
+            if indice > 0:
+                aplicar_passo(at, passo)
+            cronometro.iniciar_rerun()
+            inicio = time.perf_counter()
+            at.run()
+            segundos = time.perf_counter() - inicio
+
+            tamanhos = _tamanhos_figuras(at)
+            graficos = [dict(registro, json_bytes=tamanhos.get(registro['grafico'])) for registro in cronometro.registros]
+            registros.append({
+                'trace': os.path.basename(caminho_trace),
+                'trace_hash': hash_trace,
+                'passo': indice,
+                'nome_passo': passo.get('nome', f'passo_{indice}'),
+                'rerun_s': segundos,
+                'n_graficos': len(graficos),
+                'json_bytes_total': sum(tamanhos.values()),
+                'graficos': graficos,
+                'excecoes': [excecao.value for excecao in at.exception],
+            })
+    return registros
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de reruns do dashboard via AppTest.')
+    parser.add_argument('traces', nargs='*', help='Arquivos de trace (padrão: todos em traces_benchmark/).')
+    parser.add_argument('--script', default=SCRIPT_PADRAO)
+    parser.add_argument('--linhas', type=int, default=None,
+                        help='Usa um DB_completo sintético com este número de linhas em vez do CSV real.')
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--manter-cache', action='store_true', help='Não limpa st.cache_data entre traces.')
+    args = parser.parse_args()
+
+    traces = args.traces or sorted(
+        os.path.join(PASTA_TRACES, nome) for nome in os.listdir(PASTA_TRACES) if nome.endswith('.json')
+    )
+    saida = os.path.abspath(args.saida)
+    if args.linhas:
+        caminho_dados = os.path.abspath(dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas))
+        os.environ['DASH_DB_CSV'] = caminho_dados
+        configuracao.CAMINHO_DB_COMPLETO = caminho_dados
+
+    # O script usa caminhos relativos (imagens, CSV), então roda a partir da pasta dele
+    os.chdir(os.path.dirname(os.path.abspath(args.script)))
+    execucao = uuid.uuid4().hex[:12]
+    with open(saida, 'a', encoding='utf-8') as arquivo:
+        for caminho_trace in traces:
+            for registro in executar_trace(os.path.abspath(caminho_trace), os.path.abspath(args.script),
+                                           limpar_cache=not args.manter_cache):
+                registro.update({'execucao': execucao, 'linhas': args.linhas, 'script': os.path.basename(args.script)})
+                arquivo.write(json.dumps(registro) + '\n')
+                print(f"{registro['trace']:<28} {registro['nome_passo']:<24} {registro['rerun_s']:8.3f}s "
+                      f"{registro['n_graficos']:3d} gráficos {registro['json_bytes_total'] / 1024:9.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+import configuracao
+import dados_sinteticos
+import dataset_particionado
+import motor_polars
+import pipeline_dados
+import registro_graficos
+from metricas import rss_atual_bytes
+
+# --- Benchmark do pipeline de dados com datasets sintéticos ---
+# Mede, para cada tamanho de dataset, o tempo e o pico de memória (RSS) de cada etapa:
+# load_and_preprocess_data, apply_all_global_filters (estado padrão e um estado seletivo) e as
+# agregações dos gráficos das Abas 1-6 pelo plano do registro_graficos (o caminho do dashboard).
+# Os resultados são acrescentados, um JSON por linha, a um arquivo de resultados para comparar
+# execuções e detectar regressões. Com --motor polars ou particionado, a carga e os filtros usam
+# motor_polars/dataset_particionado (mesmo contrato); as agregações rodam sobre a saída em pandas.
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000, 10_000_000]
+ARQUIVO_RESULTADOS = 'benchmark_resultados.jsonl'
+INTERVALO_AMOSTRAGEM_RSS = 0.005
+MOTORES = {'pandas': pipeline_dados, 'polars': motor_polars, 'particionado': dataset_particionado}
+
+
+class MedidorEtapa:
+    """Mede tempo de parede e pico de RSS (amostrado em uma thread) de um bloco `with`."""
+
+    def __init__(self):
+        self.segundos = None
+        self.rss_inicial = None
+        self.rss_pico = None
+        self._parar = threading.Event()
+
+    def _amostrar(self):
+        while not self._parar.wait(INTERVALO_AMOSTRAGEM_RSS):
+            self.rss_pico = max(self.rss_pico, rss_atual_bytes())
+
+    def __enter__(self):
+        self.rss_inicial = self.rss_pico = rss_atual_bytes()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self._inicio
+        self._parar.set()
+        self._thread.join()
+        self.rss_pico = max(self.rss_pico, rss_atual_bytes())
+        return False
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _linhas(resultado):
+    if isinstance(resultado, tuple):
+        resultado = resultado[0]
+    return len(resultado) if hasattr(resultado, '__len__') else None
+
+
+def estado_seletivo(df_main):
+    """Filtros típicos de uso: plataforma mais comum, dois gêneros, dois períodos e cinco anos (df do pandas)."""
+    plataforma = df_main['platform'].value_counts().index[0]
+    generos = pipeline_dados.all_genres(df_main)[:2]
+    ano_max = int(df_main['release_year'].max())
+    return plataforma, generos, ['Pandemia', 'Pós-Pandemia'], (ano_max - 4, ano_max)
+
+
+def executar_benchmark(n_linhas, pasta_dados, repeticoes=1, motor='pandas'):
+    """Executa todas as etapas para um tamanho de dataset e devolve uma lista de registros."""
+    modulo = MOTORES[motor]
+    caminho = dados_sinteticos.obter_dataset(pasta_dados, n_linhas)
+    registros = []
+
+    def medir(etapa, funcao, *args):
+        for repeticao in range(repeticoes):
+            with MedidorEtapa() as medidor:
+                resultado = funcao(*args)
+            registros.append({
+                'motor': motor,
+                'n_linhas': n_linhas,
+                'etapa': etapa,
+                'repeticao': repeticao,
+                'segundos': medidor.segundos,
+                'rss_pico_mb': medidor.rss_pico / 2 ** 20,
+                'rss_delta_mb': (medidor.rss_pico - medidor.rss_inicial) / 2 ** 20,
+                'linhas_resultado': _linhas(resultado),
+            })
+        return resultado
+
+    df_main, min_year, max_year = medir('load_and_preprocess_data', modulo.load_and_preprocess_data, caminho)
+
+    estado_padrao = ('Todas', ['Todos'] + modulo.all_genres(df_main), pipeline_dados.PERIODOS_PANDEMIA,
+                     (min_year, max_year))
+    df_games, df_genres, _, _ = medir('apply_all_global_filters[padrao]', modulo.apply_all_global_filters,
+                                      df_main, *estado_padrao, min_year, max_year)
+    bases = {'jogo': df_games, 'genero': df_genres}
+
+    # Mesmo caminho do dashboard: o plano compartilhado (registro_graficos), um ResultadosPlano novo
+    # por medida. agregacoes[plano] são todos os gráficos na ordem de exibição, com os agrupamentos
+    # reaproveitados entre eles; agregacao[...] é cada gráfico sozinho, com os agrupamentos que usa
+    def todas_agregacoes():
+        resultados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, bases)
+        return [resultados.obter(id_grafico) for id_grafico in registro_graficos.GRAFICOS]
+
+    medir('agregacoes[plano]', todas_agregacoes)
+    for grafico in registro_graficos.GRAFICOS:
+        medir(f'agregacao[{grafico}]',
+              lambda grafico: registro_graficos.ResultadosPlano(registro_graficos.PLANO, bases).obter(grafico), grafico)
+    # O estado padrão mantém todas as linhas: o seletivo é escolhido sobre a saída dele (pandas em qualquer motor)
+    medir('apply_all_global_filters[seletivo]', modulo.apply_all_global_filters,
+          df_main, *estado_seletivo(df_games), min_year, max_year)
+    return registros
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline do dashboard com dados sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--pasta-dados', default=None, help='Onde guardar os CSVs sintéticos gerados.')
+    parser.add_argument('--motor', choices=sorted(MOTORES), default='pandas',
+                        help='Motor da carga e dos filtros (polars exige o pacote polars; particionado, o pyarrow).')
+    args = parser.parse_args()
+    if args.motor != 'pandas' and not MOTORES[args.motor].disponivel():
+        parser.error(f"o motor {args.motor} exige um pacote opcional não instalado (ver requirements.txt)")
+
+    pasta_dados = args.pasta_dados or configuracao.pasta_cache('benchmark')
+    contexto = {
+        'execucao': uuid.uuid4().hex[:12],
+        'inicio': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'polars': motor_polars.pl.__version__ if motor_polars.disponivel() else None,
+        'cpus': os.cpu_count(),
+    }
+    with open(args.saida, 'a', encoding='utf-8') as saida:
+        for n_linhas in args.tamanhos:
+            for registro in executar_benchmark(n_linhas, pasta_dados, args.repeticoes, args.motor):
+                saida.write(json.dumps({**contexto, **registro}) + '\n')
+                print(f"{registro['motor']:<7} {registro['n_linhas']:>10} {registro['etapa']:<45} "
+                      f"{registro['segundos']:9.4f}s {registro['rss_pico_mb']:9.1f} MB")
+            saida.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import configuracao
+
+# --- Representação CSR das bibliotecas de jogos (purchased_games.library) ---
+# Cada jogador tem uma lista de gameids. Em vez de "explodir" a coluna (uma linha por jogo
+# comprado), guardamos tudo em dois arrays no formato CSR:
+#   indptr[i]:indptr[i+1] -> fatia de `indices` com os jogos do jogador i
+#   indices               -> índice (int32) do jogo no catálogo `game_ids`
+# Os arrays ficam em disco e são abertos com np.memmap, então várias sessões do Streamlit
+# (e vários processos) compartilham as mesmas páginas via cache do sistema operacional.
+
+VERSAO_FORMATO = 1
+LIMITE_INT32 = np.iinfo(np.int32).max
+
+
+def parse_id_lists(series):
+    """Converte uma coluna de listas em texto ("[1, 2, 3]") em (tamanhos, ids) sem usar eval por linha."""
+    texto = series.fillna("").astype(str).str.strip().str.strip("[] ")
+    nao_vazias = texto.str.len() > 0
+    tamanhos = np.where(nao_vazias, texto.str.count(",") + 1, 0).astype(np.int64)
+    juntado = ",".join(texto[nao_vazias].tolist())
+    if juntado:
+        ids = np.fromstring(juntado, dtype=np.int64, sep=",")
+    else:
+        ids = np.empty(0, dtype=np.int64)
+    if len(ids) != tamanhos.sum():
+        raise ValueError("Coluna de listas com formato inesperado: o número de ids não confere com as vírgulas.")
+    return tamanhos, ids
+
+
+def parse_text_lists(series):
+    """Converte uma coluna de listas de textos ("['Action', 'Indie']") em uma Series de listas."""
+    texto = series.fillna("").astype(str).str.strip().str.strip("[] ")
+    listas = texto.str.replace("'", "", regex=False).str.replace('"', "", regex=False).str.split(r"\s*,\s*")
+    return listas.apply(lambda itens: [item for item in itens if item])
+
+
+def _indptr_de_tamanhos(tamanhos):
+    total = int(tamanhos.sum())
+    dtype = np.int32 if total <= LIMITE_INT32 else np.int64
+    indptr = np.zeros(len(tamanhos) + 1, dtype=dtype)
+    np.cumsum(tamanhos, out=indptr[1:])
+    return indptr
+
+
+def salvar_array(pasta, nome, array):
+    """Grava `nome`.npy num arquivo temporário e o renomeia por cima do anterior (os.replace).
+
+    Sessões e processos que já abriram a versão anterior com memmap continuam lendo o arquivo antigo
+    (o inode não é truncado) até fecharem.
+    """
+    caminho = os.path.join(pasta, f"{nome}.npy")
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        np.save(arquivo, np.ascontiguousarray(array))
+    os.replace(temporario, caminho)
+
+
+def salvar_json(caminho, dados):
+    """Grava um JSON de metadados de forma atômica (temporário + os.replace)."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, caminho)
+
+
+def salvar_csv(caminho, df):
+    """Grava um DataFrame em CSV de forma atômica (temporário + os.replace)."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    df.to_csv(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def invalidar(caminho_meta):
+    """Remove os metadados antes de regravar os arrays: uma gravação interrompida no meio deixa a
+    pasta sem meta.json (reconstruída na próxima carga) em vez de arrays novos com metadados antigos."""
+    if os.path.exists(caminho_meta):
+        os.remove(caminho_meta)
+
+
+def _abrir_array(pasta, nome):
+    return np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")
+
+
+class BibliotecasCSR:
+    """Bibliotecas de jogos por jogador em formato CSR (jogador x jogo), com operações vetorizadas."""
+
+    def __init__(self, indptr, indices, player_ids, game_ids, ids_desconhecidos=0):
+        self.indptr = indptr
+        self.indices = indices
+        self.player_ids = player_ids
+        self.game_ids = game_ids
+        self.ids_desconhecidos = ids_desconhecidos
+
+    @property
+    def n_jogadores(self):
+        return len(self.player_ids)
+
+    @property
+    def n_jogos(self):
+        return len(self.game_ids)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def linhas_das_entradas(self):
+        """Índice do jogador dono de cada entrada de `indices` (mesmo tamanho de `indices`)."""
+        return np.repeat(np.arange(self.n_jogadores, dtype=np.int32), np.diff(self.indptr))
+
+    def biblioteca(self, posicao_jogador):
+        """Índices dos jogos do jogador na posição informada (fatia sem cópia)."""
+        return self.indices[self.indptr[posicao_jogador]:self.indptr[posicao_jogador + 1]]
+
+    def posicoes_jogos(self, gameids):
+        """Converte gameids originais em índices do catálogo (-1 para ids desconhecidos)."""
+        gameids = np.asarray(gameids, dtype=np.int64)
+        posicoes = np.searchsorted(self.game_ids, gameids)
+        posicoes = np.clip(posicoes, 0, max(self.n_jogos - 1, 0))
+        encontrados = (self.n_jogos > 0) & (self.game_ids[posicoes] == gameids)
+        return np.where(encontrados, posicoes, -1)
+
+    # --- Agregações ---
+    def owners_per_game(self):
+        """Número de jogadores que possuem cada jogo (alinhado a `game_ids`)."""
+        return np.bincount(self.indices, minlength=self.n_jogos)
+
+    def library_sizes(self):
+        """Tamanho da biblioteca de cada jogador (alinhado a `player_ids`)."""
+        return np.diff(self.indptr)
+
+    def library_size_distribution(self):
+        """Histograma dos tamanhos de biblioteca: posição k = número de jogadores com k jogos."""
+        return np.bincount(self.library_sizes())
+
+    def library_size_by_group(self, codigos_grupo, n_grupos=None):
+        """Soma, contagem e média do tamanho de biblioteca por grupo (ex.: país codificado em inteiros)."""
+        codigos_grupo = np.asarray(codigos_grupo)
+        if n_grupos is None:
+            n_grupos = int(codigos_grupo.max()) + 1 if len(codigos_grupo) else 0
+        tamanhos = self.library_sizes()
+        validos = codigos_grupo >= 0
+        soma = np.bincount(codigos_grupo[validos], weights=tamanhos[validos], minlength=n_grupos)
+        contagem = np.bincount(codigos_grupo[validos], minlength=n_grupos)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = np.where(contagem > 0, soma / np.maximum(contagem, 1), np.nan)
+        return soma, contagem, media
+
+    def player_genre_counts(self, mascaras_generos, n_generos):
+        """Matriz (jogadores x gêneros) com quantos jogos de cada gênero há em cada biblioteca."""
+        mascaras_entradas = np.asarray(mascaras_generos, dtype=np.uint64)[self.indices]
+        linhas = self.linhas_das_entradas()
+        resultado = np.zeros((self.n_jogadores, n_generos), dtype=np.int32)
+        for bit in range(n_generos):
+            tem_genero = ((mascaras_entradas >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+            resultado[:, bit] = np.bincount(linhas[tem_genero], minlength=self.n_jogadores)
+        return resultado
+
+    def genre_mix(self, mascaras_generos, n_generos):
+        """Número total de entradas de biblioteca por gênero (mistura de gêneros de todas as bibliotecas)."""
+        mascaras_entradas = np.asarray(mascaras_generos, dtype=np.uint64)[self.indices]
+        mascaras_unicas, inversos = np.unique(mascaras_entradas, return_inverse=True)
+        contagem_por_mascara = np.bincount(inversos, minlength=len(mascaras_unicas))
+        totais = np.zeros(n_generos, dtype=np.int64)
+        for bit in range(n_generos):
+            tem_genero = ((mascaras_unicas >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+            totais[bit] = contagem_por_mascara[tem_genero].sum()
+        return totais
+
+    def owners_per_game_frame(self):
+        """Donos por jogo como DataFrame (gameid, owners), pronto para juntar com a tabela games."""
+        return pd.DataFrame({"gameid": np.asarray(self.game_ids), "owners": self.owners_per_game()})
+
+    # --- Persistência ---
+    def salvar(self, pasta, metadados=None):
+        os.makedirs(pasta, exist_ok=True)
+        invalidar(os.path.join(pasta, "meta.json"))
+        salvar_array(pasta, "indptr", self.indptr)
+        salvar_array(pasta, "indices", self.indices)
+        salvar_array(pasta, "player_ids", self.player_ids)
+        salvar_array(pasta, "game_ids", self.game_ids)
+        meta = dict(metadados or {})
+        meta.update({"versao_formato": VERSAO_FORMATO, "ids_desconhecidos": int(self.ids_desconhecidos)})
+        salvar_json(os.path.join(pasta, "meta.json"), meta)
+
+    @classmethod
+    def abrir(cls, pasta):
+        """Abre os arrays salvos em modo memmap (somente leitura, páginas compartilhadas entre processos)."""
+        with open(os.path.join(pasta, "meta.json"), encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        return cls(
+            _abrir_array(pasta, "indptr"),
+            _abrir_array(pasta, "indices"),
+            _abrir_array(pasta, "player_ids"),
+            _abrir_array(pasta, "game_ids"),
+            meta.get("ids_desconhecidos", 0),
+        )
+
+
+def ler_catalogo_jogos(caminho_games):
+    """Lê os gameids da tabela games (ordenados e únicos), ou None se o arquivo não existir."""
+    if caminho_games is None or not os.path.exists(caminho_games):
+        return None
+    gameids = pd.read_csv(caminho_games, usecols=["gameid"])["gameid"]
+    gameids = pd.to_numeric(gameids, errors="coerce").dropna().astype(np.int64)
+    return np.unique(gameids.to_numpy())
+
+
+def construir_bibliotecas_csr(caminho_purchased, caminho_games=None, chunksize=200_000):
+    """Lê purchased_games em blocos e monta as bibliotecas em CSR sem explodir a coluna `library`."""
+    blocos_ids = []
+    blocos_tamanhos = []
+    blocos_jogadores = []
+    for bloco in pd.read_csv(caminho_purchased, usecols=["playerid", "library"], chunksize=chunksize):
+        # Linhas sem playerid válido não têm a quem pertencer: ficam de fora
+        jogadores = pd.to_numeric(bloco["playerid"], errors="coerce")
+        validos = jogadores.notna().to_numpy()
+        tamanhos, ids = parse_id_lists(bloco["library"][validos])
+        blocos_tamanhos.append(tamanhos)
+        blocos_ids.append(ids)
+        blocos_jogadores.append(jogadores[validos].astype(np.int64).to_numpy())
+
+    tamanhos = np.concatenate(blocos_tamanhos) if blocos_tamanhos else np.empty(0, dtype=np.int64)
+    ids_brutos = np.concatenate(blocos_ids) if blocos_ids else np.empty(0, dtype=np.int64)
+    player_ids = np.concatenate(blocos_jogadores) if blocos_jogadores else np.empty(0, dtype=np.int64)
+    del blocos_ids
+
+    # Catálogo de jogos: a tabela games quando existir; senão, os ids que aparecem nas bibliotecas
+    game_ids = ler_catalogo_jogos(caminho_games)
+    if game_ids is None:
+        game_ids = np.unique(ids_brutos)
+    if len(game_ids) > LIMITE_INT32:
+        raise ValueError("Catálogo de jogos grande demais para índices int32.")
+
+    posicoes = np.searchsorted(game_ids, ids_brutos)
+    posicoes = np.clip(posicoes, 0, max(len(game_ids) - 1, 0))
+    conhecidos = (len(game_ids) > 0) & (game_ids[posicoes] == ids_brutos)
+    ids_desconhecidos = int((~conhecidos).sum())
+
+    if ids_desconhecidos:
+        # Recalcula os tamanhos sem os ids fora do catálogo
+        linhas = np.repeat(np.arange(len(tamanhos)), tamanhos)
+        tamanhos = np.bincount(linhas[conhecidos], minlength=len(tamanhos))
+        posicoes = posicoes[conhecidos]
+
+    return BibliotecasCSR(
+        _indptr_de_tamanhos(tamanhos),
+        posicoes.astype(np.int32),
+        player_ids,
+        game_ids,
+        ids_desconhecidos,
+    )
+
+
+def origem_bibliotecas(plataforma="steam"):
+    """Assinaturas das tabelas de onde sai o CSR da plataforma (guardadas nos metadados dos derivados)."""
+    return {
+        "purchased_games": configuracao.assinatura_arquivo(configuracao.caminho_tabela(plataforma, "purchased_games")),
+        "games": configuracao.assinatura_arquivo(configuracao.caminho_tabela(plataforma, "games")),
+    }
+
+
+def carregar_bibliotecas_csr(plataforma="steam", reconstruir=False):
+    """Abre o CSR em cache (memmap) para a plataforma, reconstruindo-o se o CSV de origem mudou."""
+    caminho_purchased = configuracao.caminho_tabela(plataforma, "purchased_games")
+    caminho_games = configuracao.caminho_tabela(plataforma, "games")
+    pasta = configuracao.pasta_cache("bibliotecas", plataforma)
+    origem = origem_bibliotecas(plataforma)
+    if origem["purchased_games"] is None:
+        raise FileNotFoundError(f"Tabela purchased_games não encontrada em '{caminho_purchased}'.")
+
+    caminho_meta = os.path.join(pasta, "meta.json")
+    if not reconstruir and os.path.exists(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        if meta.get("versao_formato") == VERSAO_FORMATO and meta.get("origem") == origem:
+            return BibliotecasCSR.abrir(pasta)
+
+    csr = construir_bibliotecas_csr(caminho_purchased, caminho_games)
+    csr.salvar(pasta, {"origem": origem})
+    return BibliotecasCSR.abrir(pasta)
+
+
+def construir_mascaras_generos(caminho_games, game_ids, max_generos=64):
+    """Bitmask (uint64) de gêneros para cada jogo do catálogo, a partir da coluna `genres` da tabela games."""
+    games = pd.read_csv(caminho_games, usecols=["gameid", "genres"])
+    games["gameid"] = pd.to_numeric(games["gameid"], errors="coerce")
+    games = games.dropna(subset=["gameid"])
+    games["genres"] = parse_text_lists(games["genres"])
+    explodido = games.explode("genres").dropna(subset=["genres"])
+
+    # Os gêneros mais frequentes ficam com os bits disponíveis
+    nomes_generos = explodido["genres"].value_counts().index[:max_generos].tolist()
+    bits = pd.Series(np.arange(len(nomes_generos), dtype=np.uint64), index=nomes_generos)
+    explodido = explodido[explodido["genres"].isin(nomes_generos)]
+
+    posicoes = np.searchsorted(game_ids, explodido["gameid"].astype(np.int64).to_numpy())
+    posicoes = np.clip(posicoes, 0, max(len(game_ids) - 1, 0))
+    no_catalogo = (len(game_ids) > 0) & (np.asarray(game_ids)[posicoes] == explodido["gameid"].astype(np.int64).to_numpy())
+
+    mascaras = np.zeros(len(game_ids), dtype=np.uint64)
+    valores = np.left_shift(np.uint64(1), bits.loc[explodido["genres"]].to_numpy())
+    np.bitwise_or.at(mascaras, posicoes[no_catalogo], valores[no_catalogo])
+    return mascaras, nomes_generos
+
+
+def carregar_mascaras_generos(csr, plataforma="steam"):
+    """Abre (ou constrói) as máscaras de gênero alinhadas ao catálogo do CSR da plataforma."""
+    caminho_games = configuracao.caminho_tabela(plataforma, "games")
+    pasta = configuracao.pasta_cache("bibliotecas", plataforma)
+    caminho_nomes = os.path.join(pasta, "generos.json")
+    assinatura = configuracao.assinatura_arquivo(caminho_games)
+    if assinatura is None:
+        raise FileNotFoundError(f"Tabela games não encontrada em '{caminho_games}'.")
+
+    if os.path.exists(caminho_nomes):
+        with open(caminho_nomes, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        if meta.get("origem") == assinatura and meta.get("n_jogos") == csr.n_jogos:
+            return _abrir_array(pasta, "mascaras_generos"), meta["generos"]
+
+    mascaras, nomes_generos = construir_mascaras_generos(caminho_games, np.asarray(csr.game_ids))
+    invalidar(caminho_nomes)
+    salvar_array(pasta, "mascaras_generos", mascaras)
+    salvar_json(caminho_nomes, {"origem": assinatura, "n_jogos": csr.n_jogos, "generos": nomes_generos})
+    return _abrir_array(pasta, "mascaras_generos"), nomes_generos
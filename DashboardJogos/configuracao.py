@@ -0,0 +1,83 @@
+import os
+
+# --- Configuração compartilhada pelos módulos auxiliares do dashboard ---
+# Todos os caminhos são relativos à pasta do dashboard (de onde o `streamlit run` é executado)
+# e podem ser sobrescritos por variáveis de ambiente.
+
+# Dataset principal do dashboard (DB_completo.csv)
+CAMINHO_DB_COMPLETO = os.environ.get("DASH_DB_CSV", "DB_completo.csv")
+
+# Pasta com as tabelas originais do Steam/PlayStation/Xbox (ex.: dados/steam/purchased_games.csv)
+DIRETORIO_DADOS = os.environ.get("DASH_DADOS_DIR", "dados")
+
+# Pasta onde ficam os artefatos pré-computados (arrays .npy mapeados em memória, índices, etc.)
+DIRETORIO_CACHE = os.environ.get("DASH_CACHE_DIR", ".cache_dados")
+
+# Threads que constroem os gráficos em paralelo (agregação + figura); 0 ou 1 = em série, no script
+WORKERS_GRAFICOS = int(os.environ.get("DASH_GRAFICOS_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Processos da ingestão paralela do CSV (ingestao_paralela); 0 ou 1 = leitura em série
+WORKERS_INGESTAO = int(os.environ.get("DASH_INGESTAO_WORKERS", 0))
+
+# Segundos entre as consultas ao CSV de origem pelo gerenciador_dataset: quando o arquivo muda, a
+# nova versão é carregada em segundo plano e trocada sem reiniciar o servidor; 0 = não vigia
+INTERVALO_RECARGA = float(os.environ.get("DASH_RECARGA_SEGUNDOS", 5))
+
+# Motor da carga e dos filtros globais: "pandas" (pipeline_dados), "polars" (motor_polars) ou
+# "particionado" (dataset_particionado: Parquet por plataforma/ano, sem carregar o df principal)
+MOTOR_DADOS = os.environ.get("DASH_MOTOR", "pandas").lower()
+
+# Backend dos filtros globais e agregações dos gráficos: "pandas" (referência) ou "duckdb" (backend_duckdb)
+BACKEND_CONSULTAS = os.environ.get("DASH_BACKEND", "pandas").lower()
+
+# Cubo de somas acumuladas por ano (cubo_anos) para o slider de anos e os gráficos por ano/gênero/
+# plataforma/período; "0" desliga (os gráficos voltam a agrupar os DataFrames filtrados)
+CUBO_ANOS = os.environ.get("DASH_CUBO_ANOS", "1") != "0"
+
+# Erro relativo dos sketches de quantis de preço do cubo (box plots); 0 = box plots sempre pelas linhas
+ERRO_QUANTIS = float(os.environ.get("DASH_ERRO_QUANTIS", 0.01))
+
+# Até quantas linhas os box plots usam os preços exatos (com outliers) em vez dos sketches de quantis
+LIMITE_QUANTIS_EXATOS = int(os.environ.get("DASH_QUANTIS_EXATOS_LINHAS", 20_000))
+
+# Precisão (log2 dos registradores) dos HyperLogLog de desenvolvedores/publicadoras distintos do
+# cubo; 0 = contagem exata sobre os jogos filtrados
+PRECISAO_HLL = int(os.environ.get("DASH_PRECISAO_HLL", 10))
+
+# Gráficos com renderização progressiva (ids do registro_graficos separados por vírgula, ex.:
+# "grafico_5,grafico_7"): com mais de LIMITE_PROGRESSIVO jogos filtrados, desenham primeiro a
+# prévia de uma amostra estratificada com FRACAO_AMOSTRA das linhas (amostra_progressiva)
+GRAFICOS_PROGRESSIVOS = tuple(filter(None, os.environ.get("DASH_GRAFICOS_PROGRESSIVOS", "").split(",")))
+FRACAO_AMOSTRA = float(os.environ.get("DASH_FRACAO_AMOSTRA", 0.05))
+LIMITE_PROGRESSIVO = int(os.environ.get("DASH_PROGRESSIVO_LINHAS", 100_000))
+
+# Séries (plataformas/gêneros) por gráfico de linhas ou barras empilhadas: as de menos lançamentos
+# além desse número são somadas numa série "Outros"; 0 = todas as séries
+MAX_SERIES = int(os.environ.get("DASH_MAX_SERIES", 10))
+
+# Pré-aquecimento dos caches (aquecimento): ao carregar cada versão do dataset, o dashboard calcula
+# em segundo plano os filtros, agregações e figuras do estado padrão e dos ESTADOS_AQUECIMENTO
+# estados de filtros mais frequentes no log de uso ARQUIVO_USO (JSONL; "" desliga o log)
+AQUECIMENTO = os.environ.get("DASH_AQUECIMENTO", "1") != "0"
+ESTADOS_AQUECIMENTO = int(os.environ.get("DASH_AQUECIMENTO_ESTADOS", 5))
+ARQUIVO_USO = os.environ.get("DASH_USO_LOG", os.path.join(DIRETORIO_CACHE, "uso_filtros.jsonl"))
+
+
+def caminho_tabela(plataforma, tabela):
+    """Retorna o caminho do CSV de uma tabela do ERD (ex.: 'steam', 'purchased_games')."""
+    return os.path.join(DIRETORIO_DADOS, plataforma, f"{tabela}.csv")
+
+
+def pasta_cache(*partes):
+    """Retorna (criando se preciso) uma subpasta da pasta de cache."""
+    pasta = os.path.join(DIRETORIO_CACHE, *partes)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def assinatura_arquivo(caminho):
+    """Identifica a versão de um arquivo de origem (caminho, mtime e tamanho) para invalidar caches."""
+    if caminho is None or not os.path.exists(caminho):
+        return None
+    status = os.stat(caminho)
+    return {"caminho": os.path.abspath(caminho), "mtime": status.st_mtime, "tamanho": status.st_size}
@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import bibliotecas_csr
+import configuracao
+
+# --- Análise de coortes de jogadores (players.created / players.country) ---
+# Cada jogador recebe UMA vez um id inteiro de coorte (país x ano/mês de criação da conta).
+# As matrizes coorte x mês são montadas com np.bincount sobre a chave codificada
+# `coorte * n_meses + mes`, lendo a tabela history em blocos. Os resultados ficam salvos no
+# cache (por assinatura das tabelas de origem e parâmetros), então o dashboard desenha os
+# heatmaps sem reprocessar o histórico a cada visualização.
+
+PAIS_OUTROS = "Outros"
+SEM_DATA = "Sem data"
+MES_BASE_CALENDARIO = 2000 * 12  # Janeiro de 2000 é o mês 0 no modo calendário
+
+
+def mes_absoluto(datas):
+    """Índice do mês (ano * 12 + mês - 1) de uma Series de datas em texto; -1 para datas inválidas."""
+    datas = pd.to_datetime(datas, errors="coerce")
+    meses = datas.dt.year * 12 + datas.dt.month - 1
+    return meses.fillna(-1).astype(np.int64).to_numpy()
+
+
+class CoortesJogadores:
+    """Atribuição de cada jogador a uma coorte (país x período de criação da conta)."""
+
+    def __init__(self, player_ids, coorte_por_jogador, mes_criacao, rotulos):
+        self.player_ids = player_ids
+        self.coorte_por_jogador = coorte_por_jogador
+        self.mes_criacao = mes_criacao
+        self.rotulos = rotulos
+
+    @property
+    def n_coortes(self):
+        return len(self.rotulos)
+
+    def tamanhos(self):
+        return np.bincount(self.coorte_por_jogador, minlength=self.n_coortes)
+
+    def coortes_de(self, playerids):
+        """Coorte de cada playerid (-1 para jogadores fora da tabela players)."""
+        playerids = np.asarray(playerids, dtype=np.int64)
+        posicoes = np.clip(np.searchsorted(self.player_ids, playerids), 0, max(len(self.player_ids) - 1, 0))
+        encontrados = (len(self.player_ids) > 0) & (self.player_ids[posicoes] == playerids)
+        return np.where(encontrados, self.coorte_por_jogador[posicoes], -1), np.where(encontrados, posicoes, -1)
+
+
+def construir_coortes(caminho_players, granularidade="ano", com_pais=True, paises_top=10):
+    """Lê a tabela players e codifica cada jogador em uma coorte inteira.
+
+    granularidade: 'ano' ou 'mes' de criação da conta (ignorada se a tabela não tiver `created`,
+    como no PlayStation). Países fora dos `paises_top` mais frequentes viram 'Outros'.
+    """
+    colunas = pd.read_csv(caminho_players, nrows=0).columns
+    usar = ["playerid"] + [coluna for coluna in ("country", "created") if coluna in colunas]
+    players = pd.read_csv(caminho_players, usecols=usar)
+    players["playerid"] = pd.to_numeric(players["playerid"], errors="coerce")
+    players = players.dropna(subset=["playerid"]).drop_duplicates("playerid")
+    players["playerid"] = players["playerid"].astype(np.int64)
+    players = players.sort_values("playerid")
+
+    # Dimensão país
+    if com_pais and "country" in players:
+        paises = players["country"].fillna("Desconhecido").astype(str)
+        principais = paises.value_counts().index[:paises_top]
+        paises = paises.where(paises.isin(principais), PAIS_OUTROS)
+    else:
+        paises = pd.Series("Todos", index=players.index)
+    codigos_pais, nomes_pais = pd.factorize(paises, sort=True)
+
+    # Dimensão período de criação da conta
+    if "created" in players:
+        mes_criacao = mes_absoluto(players["created"])
+    else:
+        mes_criacao = np.full(len(players), -1, dtype=np.int64)
+    if granularidade == "ano":
+        periodo = np.where(mes_criacao >= 0, mes_criacao // 12, -1)
+        rotulo_periodo = lambda valor: str(valor)
+    elif granularidade == "mes":
+        periodo = mes_criacao
+        rotulo_periodo = lambda valor: f"{valor // 12}-{valor % 12 + 1:02d}"
+    else:
+        raise ValueError("granularidade deve ser 'ano' ou 'mes'.")
+    codigos_periodo, valores_periodo = pd.factorize(periodo, sort=True)
+    nomes_periodo = [rotulo_periodo(valor) if valor >= 0 else SEM_DATA for valor in valores_periodo]
+
+    coorte = (codigos_pais * len(nomes_periodo) + codigos_periodo).astype(np.int32)
+    rotulos = [f"{pais} | {periodo_nome}" for pais in nomes_pais for periodo_nome in nomes_periodo]
+    return CoortesJogadores(players["playerid"].to_numpy(), coorte, mes_criacao, rotulos)
+
+
+def matriz_atividade(coortes, caminho_history, relativo=True, max_meses=240, chunksize=500_000):
+    """Conquistas desbloqueadas por coorte x mês, lendo o histórico em blocos.
+
+    relativo=True usa meses desde a criação da conta; False usa meses de calendário a partir
+    de janeiro de 2000. Retorna a matriz (n_coortes x max_meses) de contagens.
+    """
+    contagens = np.zeros(coortes.n_coortes * max_meses, dtype=np.int64)
+    for bloco in pd.read_csv(caminho_history, usecols=["playerid", "date_acquired"], chunksize=chunksize):
+        playerids = pd.to_numeric(bloco["playerid"], errors="coerce").fillna(-1).astype(np.int64).to_numpy()
+        coorte, posicao = coortes.coortes_de(playerids)
+        mes_evento = mes_absoluto(bloco["date_acquired"])
+        if relativo:
+            mes = mes_evento - coortes.mes_criacao[posicao]
+            validos = (coorte >= 0) & (mes_evento >= 0) & (coortes.mes_criacao[posicao] >= 0)
+        else:
+            mes = mes_evento - MES_BASE_CALENDARIO
+            validos = (coorte >= 0) & (mes_evento >= 0)
+        validos &= (mes >= 0) & (mes < max_meses)
+        chave = coorte[validos].astype(np.int64) * max_meses + mes[validos]
+        contagens += np.bincount(chave, minlength=len(contagens))
+    return contagens.reshape(coortes.n_coortes, max_meses)
+
+
+def tamanho_biblioteca_por_coorte(coortes, bibliotecas):
+    """Tamanho médio da biblioteca por coorte (ex.: crescimento da biblioteca por ano de cadastro)."""
+    coorte, _ = coortes.coortes_de(bibliotecas.player_ids)
+    soma, contagem, media = bibliotecas.library_size_by_group(coorte, coortes.n_coortes)
+    return pd.DataFrame({"coorte": coortes.rotulos, "jogadores": contagem, "jogos": soma, "media_jogos": media})
+
+
+def assinatura_origem(plataforma="steam"):
+    """Assinaturas das tabelas de origem das coortes (chave do cache em disco e do dashboard)."""
+    return {tabela: configuracao.assinatura_arquivo(configuracao.caminho_tabela(plataforma, tabela))
+            for tabela in ("players", "history", "purchased_games")}
+
+
+def _chave_cache(plataforma, parametros):
+    texto = json.dumps({"origem": assinatura_origem(plataforma), "parametros": parametros}, sort_keys=True)
+    return hashlib.sha1(texto.encode()).hexdigest()[:16]
+
+
+def calcular_coortes(plataforma="steam", granularidade="ano", com_pais=True, paises_top=10,
+                     relativo=True, max_meses=240):
+    """Calcula (ou lê do cache) a matriz de atividade e o tamanho de biblioteca por coorte."""
+    parametros = {"granularidade": granularidade, "com_pais": com_pais, "paises_top": paises_top,
+                  "relativo": relativo, "max_meses": max_meses}
+    pasta = configuracao.pasta_cache("coortes", plataforma, _chave_cache(plataforma, parametros))
+    caminho_meta = os.path.join(pasta, "meta.json")
+    if os.path.exists(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        atividade = np.load(os.path.join(pasta, "atividade.npy")) if meta["tem_historico"] else None
+        bibliotecas = pd.read_csv(os.path.join(pasta, "bibliotecas.csv")) if meta["tem_bibliotecas"] else None
+        return {"rotulos": meta["rotulos"], "tamanhos": np.array(meta["tamanhos"]),
+                "atividade": atividade, "bibliotecas": bibliotecas, "relativo": relativo}
+
+    caminho_players = configuracao.caminho_tabela(plataforma, "players")
+    if not os.path.exists(caminho_players):
+        raise FileNotFoundError(f"Tabela players não encontrada em '{caminho_players}'.")
+    coortes = construir_coortes(caminho_players, granularidade, com_pais, paises_top)
+
+    caminho_history = configuracao.caminho_tabela(plataforma, "history")
+    atividade = None
+    if os.path.exists(caminho_history):
+        atividade = matriz_atividade(coortes, caminho_history, relativo, max_meses)
+        bibliotecas_csr.salvar_array(pasta, "atividade", atividade)
+
+    bibliotecas = None
+    if os.path.exists(configuracao.caminho_tabela(plataforma, "purchased_games")):
+        bibliotecas = tamanho_biblioteca_por_coorte(coortes, bibliotecas_csr.carregar_bibliotecas_csr(plataforma))
+        bibliotecas_csr.salvar_csv(os.path.join(pasta, "bibliotecas.csv"), bibliotecas)
+
+    # meta.json marca o cache como válido: gravado por último, depois dos arquivos que ele descreve
+    bibliotecas_csr.salvar_json(caminho_meta, {
+        "rotulos": coortes.rotulos, "tamanhos": coortes.tamanhos().tolist(), "parametros": parametros,
+        "tem_historico": atividade is not None, "tem_bibliotecas": bibliotecas is not None,
+    })
+    return {"rotulos": coortes.rotulos, "tamanhos": coortes.tamanhos(), "atividade": atividade,
+            "bibliotecas": bibliotecas, "relativo": relativo}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula as matrizes de coortes de jogadores.")
+    parser.add_argument("--plataforma", default="steam")
+    parser.add_argument("--granularidade", choices=("ano", "mes"), default="ano")
+    parser.add_argument("--paises-top", type=int, default=10)
+    parser.add_argument("--sem-pais", action="store_true")
+    parser.add_argument("--calendario", action="store_true", help="Meses de calendário em vez de meses desde o cadastro.")
+    parser.add_argument("--max-meses", type=int, default=240)
+    args = parser.parse_args()
+    resultado = calcular_coortes(args.plataforma, args.granularidade, not args.sem_pais, args.paises_top,
+                                 not args.calendario, args.max_meses)
+    print(f"{len(resultado['rotulos'])} coortes calculadas para '{args.plataforma}'.")
@@ -0,0 +1,516 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import configuracao
+import instrumentacao
+import pipeline_dados
+import registro_graficos
+import sketches
+
+# --- Índice de somas acumuladas por ano (cubo) para o slider de anos ---
+# Construído uma vez a partir do df principal: as linhas são agrupadas em células
+# (plataforma, período, combinação de gêneros) e, para cada célula, guardamos a contagem de jogos e
+# a soma de preco_dolar acumuladas ao longo dos anos (eixo com os anos distintos do dataset). O total
+# de qualquer faixa de anos é `acumulado[fim] - acumulado[inicio]` (duas leituras e uma subtração) e
+# a série por ano é a diferença entre colunas vizinhas, então mover o slider não reagrupa linhas.
+# Guardar a combinação de gêneros (e não cada gênero) permite responder tanto o filtro de gênero
+# ("algum gênero do jogo está na seleção") quanto a base explodida por gênero: cada combinação
+# conta uma vez em cada um dos seus gêneros.
+# O cubo responde os gráficos do registro que agrupam só por ano/plataforma/gênero/período com
+# contagens e somas/médias de preco_dolar (ResultadosCubo); os demais (box plots, histograma,
+# desenvolvedores) continuam no plano de agregações sobre os DataFrames filtrados. O range dinâmico
+# do slider (primeiro/último ano com jogos na seleção de plataforma/gênero/período) também sai daqui.
+# Para os box plots (gráficos 3 e 6), cada célula guarda ainda um sketch de quantis de preco_dolar
+# (sketches.SketchQuantis) também acumulado por ano, em formato esparso: um acumulado por par
+# (célula, balde) presente. Com a seleção grande, os quartis e cercas saem da soma dos sketches
+# das células; até configuracao.LIMITE_QUANTIS_EXATOS linhas o box plot continua com as linhas.
+# Para os indicadores de desenvolvedores/publicadoras distintos, cada (célula, ano) guarda um
+# HyperLogLog de cada coluna de COLUNAS_DISTINTAS (sketches.SketchHLL), juntado na consulta.
+
+DIMENSOES_CUBO = ('release_year', 'platform', 'periodo', 'genre')
+COLUNA_PRECO = 'preco_dolar'
+COLUNAS_DISTINTAS = ('developers', 'publishers')
+
+
+def _categorias(serie):
+    """Valores distintos ordenados (mesma ordem do groupby do pandas) e o código de cada linha."""
+    valores = sorted(serie.unique().tolist())
+    return valores, pd.Categorical(serie, categories=valores).codes.astype(np.int64)
+
+
+class CuboAnos:
+    """Contagens e somas de preço acumuladas por ano para cada célula (plataforma, período, gêneros).
+
+    Com `erro_quantis` (erro relativo, ex.: 0.01) guarda também os sketches de quantis de preco_dolar e,
+    com `precisao_hll` (ex.: 10), os HyperLogLog das COLUNAS_DISTINTAS.
+    """
+
+    def __init__(self, df_main, erro_quantis=None, precisao_hll=None):
+        with instrumentacao.etapa('cubo_anos', linhas=len(df_main)):
+            self.anos, codigo_ano = np.unique(df_main['release_year'].to_numpy(dtype=np.int64), return_inverse=True)
+            self.plataformas, codigo_plataforma = _categorias(df_main['platform'])
+            self.periodos, codigo_periodo = _categorias(df_main['periodo'])
+            codigo_combo, combos = pd.factorize(df_main['genre_list'])
+
+            # Gêneros de cada combinação em formato CSR: generos_combo[inicio_combo[c]:inicio_combo[c + 1]]
+            self.generos = sorted({genero for combo in combos for genero in combo})
+            posicao = {genero: i for i, genero in enumerate(self.generos)}
+            tamanhos = np.array([len(combo) for combo in combos], dtype=np.int64)
+            self.inicio_combo = np.concatenate([[0], np.cumsum(tamanhos)])
+            self.generos_combo = np.array([posicao[genero] for combo in combos for genero in combo], dtype=np.int64)
+            self.incidencia = np.zeros((len(combos), len(self.generos)), dtype=bool)
+            self.incidencia[np.repeat(np.arange(len(combos)), tamanhos), self.generos_combo] = True
+
+            # Células presentes no dataset (não o produto cartesiano das três dimensões)
+            celula_linha = np.ravel_multi_index((codigo_plataforma, codigo_periodo, codigo_combo),
+                                                (len(self.plataformas), len(self.periodos), len(combos)))
+            celulas, codigo_celula = np.unique(celula_linha, return_inverse=True)
+            self.plataforma_celula, self.periodo_celula, self.combo_celula = np.unravel_index(
+                celulas, (len(self.plataformas), len(self.periodos), len(combos))
+            )
+
+            # Acumulados com uma coluna extra à esquerda (zero): faixa [i, j) = acumulado[:, j] - acumulado[:, i]
+            n_anos = len(self.anos)
+            posicao_linha = codigo_celula * n_anos + codigo_ano
+            contagem = np.bincount(posicao_linha, minlength=len(celulas) * n_anos).reshape(len(celulas), n_anos)
+            soma = np.bincount(posicao_linha, weights=df_main[COLUNA_PRECO].to_numpy(dtype=np.float64),
+                               minlength=len(celulas) * n_anos).reshape(len(celulas), n_anos)
+            self.contagem_acumulada = np.zeros((len(celulas), n_anos + 1), dtype=np.int64)
+            self.soma_acumulada = np.zeros((len(celulas), n_anos + 1), dtype=np.float64)
+            np.cumsum(contagem, axis=1, out=self.contagem_acumulada[:, 1:])
+            np.cumsum(soma, axis=1, out=self.soma_acumulada[:, 1:])
+
+            self.sketch = None
+            if erro_quantis:
+                self.sketch = sketches.SketchQuantis(erro_quantis)
+                baldes = self.sketch.baldes(df_main[COLUNA_PRECO].to_numpy(dtype=np.float64))
+                self.n_baldes = int(baldes.max()) + 1
+                pares, codigo_par = np.unique(codigo_celula * self.n_baldes + baldes, return_inverse=True)
+                self.celula_par, self.balde_par = np.divmod(pares, self.n_baldes)
+                contagem_par = np.bincount(codigo_par * n_anos + codigo_ano,
+                                           minlength=len(pares) * n_anos).reshape(len(pares), n_anos)
+                self.contagem_par_acumulada = np.zeros((len(pares), n_anos + 1), dtype=np.int32)
+                np.cumsum(contagem_par, axis=1, out=self.contagem_par_acumulada[:, 1:])
+
+            self.hll = None
+            self.registros_hll = {}
+            if precisao_hll:
+                self.hll = sketches.SketchHLL(precisao_hll)
+                sketch_linha = codigo_celula * n_anos + codigo_ano
+                for coluna in COLUNAS_DISTINTAS:
+                    self.registros_hll[coluna] = self._registros_hll(df_main[coluna], sketch_linha)
+
+    def _registros_hll(self, serie, sketch_linha):
+        """Registradores não nulos do HyperLogLog de cada (célula, ano): (célula, ano, registrador, posto)."""
+        codigo_valor, valores = pd.factorize(serie)  # nulos (-1) não contam, como no nunique
+        registrador_valor, posto_valor = self.hll.registros(valores)
+        presentes = codigo_valor >= 0
+        chave = sketch_linha[presentes] * self.hll.registradores + registrador_valor[codigo_valor[presentes]]
+        posto = posto_valor[codigo_valor[presentes]]
+        # Um registro por (sketch, registrador), com o maior posto
+        ordem = np.lexsort((posto, chave))
+        chave, posto = chave[ordem], posto[ordem]
+        ultimo = np.append(chave[1:] != chave[:-1], True)
+        sketch, registrador = np.divmod(chave[ultimo], self.hll.registradores)
+        celula, ano = np.divmod(sketch, len(self.anos))
+        return celula.astype(np.int32), ano.astype(np.int16), registrador.astype(np.uint16), posto[ultimo]
+
+    def __len__(self):
+        return len(self.plataforma_celula)
+
+    def nbytes(self):
+        total = self.contagem_acumulada.nbytes + self.soma_acumulada.nbytes + self.incidencia.nbytes
+        if self.sketch is not None:
+            total += self.contagem_par_acumulada.nbytes + self.celula_par.nbytes + self.balde_par.nbytes
+        for registros in self.registros_hll.values():
+            total += sum(array.nbytes for array in registros)
+        return total
+
+    # --- Seleção ---
+    def celulas(self, platform_filter, genre_filter, pandemic_periods_filter):
+        """Índices das células que passam nos filtros de plataforma, gênero e período (mesma regra de pipeline_dados)."""
+        mascara = np.isin(self.periodo_celula, [self.periodos.index(p) for p in pandemic_periods_filter
+                                                if p in self.periodos])
+        if platform_filter != 'Todas':
+            codigo = self.plataformas.index(platform_filter) if platform_filter in self.plataformas else -1
+            mascara &= self.plataforma_celula == codigo
+        if genre_filter and 'Todos' not in genre_filter:
+            codigos = [i for i, genero in enumerate(self.generos) if genero in genre_filter]
+            mascara &= self.incidencia[:, codigos].any(axis=1)[self.combo_celula]
+        return np.flatnonzero(mascara)
+
+    def _faixa(self, current_years_filter):
+        """Colunas [inicio, fim) do eixo de anos dentro do filtro de anos (inclusivo)."""
+        return (int(np.searchsorted(self.anos, current_years_filter[0], side='left')),
+                int(np.searchsorted(self.anos, current_years_filter[1], side='right')))
+
+    def intervalo_anos(self, platform_filter, genre_filter, pandemic_periods_filter):
+        """Anos mínimo e máximo dos jogos que passam nos filtros (None, None sem períodos), como em pipeline_dados."""
+        if not pandemic_periods_filter:
+            return None, None
+        celulas = self.celulas(platform_filter, genre_filter, pandemic_periods_filter)
+        por_ano = np.diff(self.contagem_acumulada[celulas].sum(axis=0))
+        com_jogos = np.flatnonzero(por_ano)
+        if not com_jogos.size:
+            return int(self.anos[0]), int(self.anos[-1])
+        return int(self.anos[com_jogos[0]]), int(self.anos[com_jogos[-1]])
+
+    def quantidade(self, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter):
+        """Número de jogos que passam em todos os filtros globais."""
+        if not pandemic_periods_filter:
+            return 0
+        celulas = self.celulas(platform_filter, genre_filter, pandemic_periods_filter)
+        inicio, fim = self._faixa(current_years_filter)
+        return int((self.contagem_acumulada[celulas, fim] - self.contagem_acumulada[celulas, inicio]).sum())
+
+    def _explodir_generos(self, celulas):
+        """Uma entrada por (célula, gênero da combinação), como no explode de pipeline_dados: (repetição, gênero)."""
+        combos = self.combo_celula[celulas]
+        tamanhos = self.inicio_combo[combos + 1] - self.inicio_combo[combos]
+        repeticao = np.repeat(np.arange(len(celulas)), tamanhos)
+        deslocamento = np.arange(len(repeticao)) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+        return repeticao, self.generos_combo[self.inicio_combo[combos][repeticao] + deslocamento]
+
+    def distintos(self, coluna, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter):
+        """Estimativa (HyperLogLog) dos valores distintos de `coluna` entre os jogos que passam nos filtros."""
+        if not pandemic_periods_filter:
+            return 0
+        selecionada = np.zeros(len(self), dtype=bool)
+        selecionada[self.celulas(platform_filter, genre_filter, pandemic_periods_filter)] = True
+        inicio, fim = self._faixa(current_years_filter)
+        celula, ano, registrador, posto = self.registros_hll[coluna]
+        manter = selecionada[celula] & (ano >= inicio) & (ano < fim)
+        return self.hll.estimar(self.hll.juntar(registrador[manter], posto[manter]))
+
+    # --- Agregação ---
+    def tabela(self, dimensoes, base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter):
+        """Tabela no formato das raízes do plano (dimensões, __n, preco_dolar__soma/__n), ordenada pelas dimensões.
+
+        Só grupos com jogos aparecem, como no groupby; None quando nada passa nos filtros.
+        """
+        if not pandemic_periods_filter:
+            return None
+        celulas = self.celulas(platform_filter, genre_filter, pandemic_periods_filter)
+        inicio, fim = self._faixa(current_years_filter)
+        if not celulas.size or inicio >= fim:
+            return None
+        if 'release_year' in dimensoes:
+            contagem = np.diff(self.contagem_acumulada[celulas, inicio:fim + 1], axis=1)
+            soma = np.diff(self.soma_acumulada[celulas, inicio:fim + 1], axis=1)
+        else:
+            contagem = (self.contagem_acumulada[celulas, fim] - self.contagem_acumulada[celulas, inicio])[:, None]
+            soma = (self.soma_acumulada[celulas, fim] - self.soma_acumulada[celulas, inicio])[:, None]
+
+        generos = None
+        if base == 'genero':
+            repeticao, generos = self._explodir_generos(celulas)
+            celulas, contagem, soma = celulas[repeticao], contagem[repeticao], soma[repeticao]
+
+        codigos, valores = [], []
+        for dimensao in dimensoes:
+            if dimensao == 'release_year':
+                codigos.append(np.arange(fim - inicio)[None, :])
+                valores.append(self.anos[inicio:fim])
+            elif dimensao == 'platform':
+                codigos.append(self.plataforma_celula[celulas][:, None])
+                valores.append(np.array(self.plataformas, dtype=object))
+            elif dimensao == 'periodo':
+                codigos.append(self.periodo_celula[celulas][:, None])
+                valores.append(np.array(self.periodos, dtype=object))
+            else:
+                codigos.append(generos[:, None])
+                valores.append(np.array(self.generos, dtype=object))
+        formato = tuple(len(v) for v in valores)
+        n_grupos = int(np.prod(formato))
+        contagem, soma, *codigos = np.broadcast_arrays(contagem, soma, *codigos)
+        grupo = np.ravel_multi_index(codigos, formato).ravel()
+        contagem_grupo = np.rint(np.bincount(grupo, weights=contagem.ravel(), minlength=n_grupos)).astype(np.int64)
+        soma_grupo = np.bincount(grupo, weights=soma.ravel(), minlength=n_grupos)
+        presentes = np.flatnonzero(contagem_grupo)
+        if not presentes.size:
+            return None
+
+        tabela = pd.DataFrame({dimensao: v[c] for dimensao, v, c in
+                               zip(dimensoes, valores, np.unravel_index(presentes, formato))})
+        tabela['__n'] = contagem_grupo[presentes]
+        tabela[f'{COLUNA_PRECO}__soma'] = soma_grupo[presentes]
+        tabela[f'{COLUNA_PRECO}__n'] = contagem_grupo[presentes]  # preco_dolar não tem nulos após o pré-processamento
+        return tabela
+
+    def histogramas(self, dimensao, base, grupos, platform_filter, genre_filter, pandemic_periods_filter,
+                    current_years_filter):
+        """Sketch de quantis de preco_dolar (grupos, baldes) de cada valor de `dimensao` em `grupos`, com os filtros."""
+        if not pandemic_periods_filter:
+            return np.zeros((len(grupos), self.n_baldes), dtype=np.int64)
+        selecionada = np.zeros(len(self), dtype=bool)
+        selecionada[self.celulas(platform_filter, genre_filter, pandemic_periods_filter)] = True
+        inicio, fim = self._faixa(current_years_filter)
+        pares = np.flatnonzero(selecionada[self.celula_par])
+        contagem = self.contagem_par_acumulada[pares, fim] - self.contagem_par_acumulada[pares, inicio]
+        celulas, baldes = self.celula_par[pares], self.balde_par[pares]
+
+        generos = None
+        if base == 'genero':
+            repeticao, generos = self._explodir_generos(celulas)
+            celulas, baldes, contagem = celulas[repeticao], baldes[repeticao], contagem[repeticao]
+        if dimensao == 'platform':
+            codigos, valores = self.plataforma_celula[celulas], self.plataformas
+        elif dimensao == 'periodo':
+            codigos, valores = self.periodo_celula[celulas], self.periodos
+        else:
+            codigos, valores = generos, self.generos
+
+        # Código da dimensão -> posição em `grupos` (-1 para os valores fora dos grupos pedidos)
+        posicao = np.full(len(valores), -1, dtype=np.int64)
+        for i, valor in enumerate(grupos):
+            if valor in valores:
+                posicao[valores.index(valor)] = i
+        grupo = posicao[codigos]
+        manter = grupo >= 0
+        historicos = np.bincount(grupo[manter] * self.n_baldes + baldes[manter], weights=contagem[manter],
+                                 minlength=len(grupos) * self.n_baldes)
+        return np.rint(historicos).astype(np.int64).reshape(len(grupos), self.n_baldes)
+
+
+def responde(espec, base, quantis=False):
+    """Se o gráfico pode sair do cubo: agrupamento só por dimensões do cubo, medidas de contagem ou de preco_dolar.
+
+    Com `quantis`, aceita também os box plots (linhas de preco_dolar de uma dimensão do cubo).
+    """
+    if espec.dimensoes is None or not set(espec.dimensoes) <= set(DIMENSOES_CUBO):
+        return False
+    if espec.linhas and not (quantis and len(espec.dimensoes) == 1
+                             and set(espec.colunas or ()) <= {espec.dimensoes[0], COLUNA_PRECO}):
+        return False
+    if 'genre' in espec.dimensoes and base != 'genero':
+        return False
+    return registro_graficos._colunas_medidas(espec.medidas) <= {COLUNA_PRECO}
+
+
+class ResultadosCubo:
+    """Mesma interface de ResultadosPlano: gráficos que o cubo responde saem dele, os demais de `resultados_linhas`.
+
+    Os box plots com mais de `limite_exato` linhas devolvem as estatísticas do box (count, q1, median,
+    q3, lowerfence, upperfence) por valor da dimensão, em vez das linhas.
+    """
+
+    def __init__(self, cubo, filtros, resultados_linhas, limite_exato=None):
+        self.cubo = cubo
+        self.filtros = tuple(filtros)
+        self.resultados_linhas = resultados_linhas
+        self.limite_exato = configuracao.LIMITE_QUANTIS_EXATOS if limite_exato is None else limite_exato
+        self._tabelas = {}
+        self._trava = threading.Lock()
+
+    def _tabela(self, base, dimensoes):
+        chave = (base, dimensoes)
+        with self._trava:
+            if chave not in self._tabelas:
+                with instrumentacao.etapa(f"cubo[{base}:{','.join(dimensoes)}]"):
+                    self._tabelas[chave] = self.cubo.tabela(dimensoes, base, *self.filtros)
+            return self._tabelas[chave]
+
+    def obter(self, id_grafico, base=None, top_n=None):
+        espec = registro_graficos.GRAFICOS[id_grafico]
+        base = base or espec.bases[0]
+        if base not in espec.bases:
+            raise ValueError(f"O gráfico '{id_grafico}' não aceita a base '{base}' (aceita: {espec.bases}).")
+        if not responde(espec, base, quantis=self.cubo.sketch is not None):
+            return self.resultados_linhas.obter(id_grafico, base, top_n)
+        tabela = self._tabela(base, espec.dimensoes)
+        if tabela is None:
+            return pd.DataFrame(columns=list(espec.dimensoes))
+        saida = registro_graficos._aplicar_medidas(tabela, espec.dimensoes, espec.medidas)
+        saida = registro_graficos._aplicar_top_n(espec, saida, top_n or espec.top_n)
+        if espec.linhas:
+            # Linhas que o box plot desenharia (as dos grupos do top-N)
+            if saida['count'].sum() <= self.limite_exato:
+                return self.resultados_linhas.obter(id_grafico, base, top_n)
+            return self._estatisticas_box(espec, base, saida)
+        return saida
+
+    def distintos(self, coluna):
+        """Valores distintos de `coluna` nos jogos filtrados: HyperLogLog do cubo ou, sem ele, exato."""
+        if coluna not in self.cubo.registros_hll:
+            return self.resultados_linhas.distintos(coluna)
+        chave = ('distintos', coluna)
+        with self._trava:
+            if chave not in self._tabelas:
+                with instrumentacao.etapa(f'hll[{coluna}]'):
+                    self._tabelas[chave] = self.cubo.distintos(coluna, *self.filtros)
+            return self._tabelas[chave]
+
+    def colunas_jogos(self, colunas):
+        return self.resultados_linhas.colunas_jogos(colunas)
+
+    def _estatisticas_box(self, espec, base, saida):
+        dimensao = espec.dimensoes[0]
+        grupos = saida[dimensao].tolist()
+        with instrumentacao.etapa(f'quantis[{base}:{dimensao}]'):
+            historicos = self.cubo.histogramas(dimensao, base, grupos, *self.filtros)
+            estatisticas = pd.DataFrame({dimensao: grupos, 'count': historicos.sum(axis=1)})
+            for coluna, valores in self.cubo.sketch.estatisticas_box(historicos).items():
+                estatisticas[coluna] = valores
+        return estatisticas
+
+
+# --- Conferência contra pipeline_dados + plano de agregações ---
+def conferir(df_main, min_year, max_year, cubo=None):
+    """Compara range do slider, contagem e gráficos respondidos pelo cubo; devolve a lista de divergências."""
+    cubo = cubo or CuboAnos(df_main)
+    plataformas = df_main['platform'].value_counts().index
+    generos = pipeline_dados.all_genres(df_main)
+    cenarios = [
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year)),
+        ('Todas', generos[:2], pipeline_dados.PERIODOS_PANDEMIA, (max_year - 5, max_year)),
+        ('Todas', ['Todos'], ['Pandemia'], (min_year, max_year)),
+        ('Todas', [], ['Pré-Pandemia', 'Pós-Pandemia'], (min_year + 3, max_year - 3)),
+        (plataformas[0], ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (max_year - 4, max_year)),
+        (plataformas[-1], generos[-1:], ['Pandemia', 'Pós-Pandemia'], (min_year, max_year)),
+        ('Todas', ['Todos'], [], (min_year, max_year)),
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (max_year + 1, max_year + 2)),
+    ]
+    divergencias = []
+    for filtros in cenarios:
+        platform_filter, genre_filter, periods_filter, years_filter = filtros
+        _, _, dyn_min, dyn_max = pipeline_dados.apply_all_global_filters(
+            df_main, platform_filter, genre_filter, periods_filter, (min_year, max_year), min_year, max_year
+        )
+        if cubo.intervalo_anos(platform_filter, genre_filter, periods_filter) != (dyn_min, dyn_max):
+            divergencias.append((filtros, 'intervalo_anos', f'esperado {(dyn_min, dyn_max)}'))
+        df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)
+        if cubo.quantidade(*filtros) != len(df_games):
+            divergencias.append((filtros, 'quantidade', f'esperado {len(df_games)}'))
+        esperados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, {'jogo': df_games, 'genero': df_genres})
+        obtidos = ResultadosCubo(cubo, filtros, esperados)
+        for id_grafico, espec in registro_graficos.GRAFICOS.items():
+            for base in espec.bases:
+                if not responde(espec, base):
+                    continue
+                esperado = esperados.obter(id_grafico, base)
+                obtido = obtidos.obter(id_grafico, base)
+                if esperado.empty:
+                    if not obtido.empty:
+                        divergencias.append((filtros, id_grafico, 'esperado DataFrame vazio'))
+                    continue
+                try:
+                    pd.testing.assert_frame_equal(registro_graficos.normalizar(obtido),
+                                                  registro_graficos.normalizar(esperado),
+                                                  check_dtype=False, check_index_type=False)
+                except AssertionError as erro:
+                    divergencias.append((filtros, f'{id_grafico}:{base}', str(erro).splitlines()[0]))
+        if cubo.sketch is not None:
+            divergencias += _conferir_quantis(cubo, filtros, esperados)
+        for coluna in cubo.registros_hll:
+            # Tolerância de 3 erros padrão do HyperLogLog (mais 1 para as cardinalidades muito pequenas)
+            exato, estimado = esperados.distintos(coluna), obtidos.distintos(coluna)
+            if abs(estimado - exato) > 3 * cubo.hll.erro_padrao() * exato + 1:
+                divergencias.append((filtros, f'distintos[{coluna}]', f'{estimado} != {exato}'))
+    return divergencias
+
+
+def _conferir_quantis(cubo, filtros, esperados):
+    """Box plots pelo sketch (sem o limite exato) contra os quantis das linhas: erro relativo até o alfa do sketch."""
+    divergencias = []
+    obtidos = ResultadosCubo(cubo, filtros, esperados, limite_exato=0)
+    for id_grafico, espec in registro_graficos.GRAFICOS.items():
+        base = espec.bases[0]
+        if not espec.linhas or not responde(espec, base, quantis=True):
+            continue
+        dimensao = espec.dimensoes[0]
+        linhas = esperados.obter(id_grafico, base)
+        estatisticas = obtidos.obter(id_grafico, base)
+        if linhas.empty:
+            if not estatisticas.empty:
+                divergencias.append((filtros, id_grafico, 'esperado DataFrame vazio'))
+            continue
+        if set(estatisticas[dimensao]) != set(linhas[dimensao]):
+            divergencias.append((filtros, id_grafico, 'grupos do top-N diferentes'))
+            continue
+        for _, linha in estatisticas.iterrows():
+            precos = linhas.loc[linhas[dimensao] == linha[dimensao], COLUNA_PRECO].to_numpy()
+            exatos = np.quantile(precos, sketches.QUANTIS_BOX, method='lower')
+            aproximados = linha[['q1', 'median', 'q3']].to_numpy(dtype=np.float64)
+            if linha['count'] != len(precos):
+                divergencias.append((filtros, id_grafico, f"{linha[dimensao]}: {linha['count']} linhas != {len(precos)}"))
+            elif np.any(np.abs(aproximados - exatos) > cubo.sketch.alfa * exatos + sketches.VALOR_MINIMO):
+                divergencias.append((filtros, id_grafico, f'{linha[dimensao]}: quartis {aproximados} != {exatos}'))
+    return divergencias
+
+
+if __name__ == '__main__':
+    import dados_sinteticos
+
+    parser = argparse.ArgumentParser(description='Constrói o cubo de anos e confere contra o pipeline pandas.')
+    parser.add_argument('csv', nargs='?', help='CSV no formato do DB_completo (padrão: dataset sintético).')
+    parser.add_argument('--linhas', type=int, default=20_000, help='Tamanho do dataset sintético.')
+    parser.add_argument('--erro-quantis', type=float, default=configuracao.ERRO_QUANTIS,
+                        help='Erro relativo dos sketches de quantis (0 = sem sketches).')
+    parser.add_argument('--precisao-hll', type=int, default=configuracao.PRECISAO_HLL,
+                        help='Precisão dos HyperLogLog de distintos (0 = sem HyperLogLog).')
+    args = parser.parse_args()
+
+    caminho = args.csv or dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho)
+    inicio = time.perf_counter()
+    cubo = CuboAnos(df_main, args.erro_quantis, args.precisao_hll)
+    print(f'{len(cubo)} células x {len(cubo.anos)} anos ({cubo.nbytes() / 2**20:.1f} MiB) '
+          f'em {time.perf_counter() - inicio:.2f}s para {len(df_main)} linhas.')
+
+    # Custo de um movimento do slider: range dinâmico + agregação por (ano, gênero) com os filtros
+    filtros = ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year + 1, max_year - 1))
+    inicio = time.perf_counter()
+    cubo.intervalo_anos(*filtros[:3])
+    cubo.tabela(('release_year', 'genre'), 'genero', *filtros)
+    tempo_cubo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    _, df_genres, _, _ = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)
+    registro_graficos._agregar_linhas(df_genres, ('release_year', 'genre'), {COLUNA_PRECO})
+    tempo_pandas = time.perf_counter() - inicio
+    print(f'slider: cubo {tempo_cubo * 1000:.1f} ms, filtros + groupby {tempo_pandas * 1000:.1f} ms')
+
+    # O que um rerun do dashboard faz com um range de anos novo (dados_dashboard.filtered_results):
+    # contagem e todos os gráficos, com as linhas filtradas montadas só para os que o cubo não responde
+    def bases_filtradas():
+        df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)
+        return {'jogo': df_games, 'genero': df_genres}
+
+    inicio = time.perf_counter()
+    resultados = ResultadosCubo(cubo, filtros, registro_graficos.ResultadosPlano(registro_graficos.PLANO, bases_filtradas))
+    cubo.quantidade(*filtros)
+    for id_grafico in registro_graficos.GRAFICOS:
+        resultados.obter(id_grafico)
+    tempo_cubo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    resultados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, bases_filtradas())
+    len(resultados.bases['jogo'])
+    for id_grafico in registro_graficos.GRAFICOS:
+        resultados.obter(id_grafico)
+    tempo_pandas = time.perf_counter() - inicio
+    pelas_linhas = [id_grafico for id_grafico, espec in registro_graficos.GRAFICOS.items()
+                    if not responde(espec, espec.bases[0], quantis=cubo.sketch is not None)]
+    print(f'rerun ({len(registro_graficos.GRAFICOS)} gráficos): cubo {tempo_cubo * 1000:.1f} ms, '
+          f'filtros + plano {tempo_pandas * 1000:.1f} ms; pelas linhas filtradas: {", ".join(pelas_linhas)}')
+    if cubo.sketch is not None:
+        print(f'sketches de quantis: {len(cubo.celula_par)} pares (célula, balde), {cubo.n_baldes} baldes, '
+              f'erro relativo {cubo.sketch.alfa:g}')
+    if cubo.hll is not None:
+        print(f'HyperLogLog: {2 ** args.precisao_hll} registradores (erro padrão {cubo.hll.erro_padrao():.1%}), '
+              + ', '.join(f'{coluna} {len(registros[0])} registros' for coluna, registros in cubo.registros_hll.items()))
+        for coluna in cubo.registros_hll:
+            inicio = time.perf_counter()
+            estimado = cubo.distintos(coluna, *filtros)
+            tempo_hll = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            exato = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)[0][coluna].nunique()
+            print(f'  {coluna}: {estimado} (exato {exato}); HyperLogLog {tempo_hll * 1000:.1f} ms, '
+                  f'filtros + nunique {(time.perf_counter() - inicio) * 1000:.1f} ms')
+
+    divergencias = conferir(df_main, min_year, max_year, cubo)
+    for filtros, alvo, mensagem in divergencias:
+        print(f'DIVERGÊNCIA [{filtros}] {alvo}: {mensagem}')
+    print('Cubo confere com o pipeline pandas.' if not divergencias else f'{len(divergencias)} divergência(s).')
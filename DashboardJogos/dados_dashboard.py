@@ -0,0 +1,264 @@
+import os
+import shutil
+import threading
+
+import streamlit as st
+
+import aquecimento
+import backend_duckdb
+import configuracao
+import cubo_anos
+import dataset_particionado
+import gerenciador_dataset
+import metricas
+import motor_polars
+import pipeline_dados
+import pipeline_graficos
+import registro_graficos
+
+# --- Dados do dashboard no nível do processo ---
+# A carga do dataset, as consultas em cache por versão e o pré-aquecimento ficam neste módulo, e
+# não no script do Streamlit, para poderem rodar antes da primeira sessão: o script é reexecutado
+# a cada rerun, mas este módulo é importado uma vez por processo. `python servidor.py` chama
+# `gerenciador()` antes de subir o servidor (a carga termina antes de aceitar conexões e o
+# aquecimento segue em segundo plano); com `streamlit run` a carga acontece no primeiro rerun.
+# Os caches do Streamlit criados antes do runtime são os mesmos que o script usa depois.
+
+
+# --- Motor da carga e dos filtros globais (DASH_MOTOR, ver configuracao) ---
+# pipeline_dados (pandas), motor_polars (o df principal fica no Polars) ou dataset_particionado
+# (o df principal fica em disco e só as partições dos filtros são lidas). Mesmo contrato: os
+# filtros devolvem DataFrames do pandas para os gráficos. Os avisos de pacote ausente ficam em
+# AVISOS para o script mostrar na barra lateral.
+AVISOS = []
+motor_dados = pipeline_dados
+if configuracao.MOTOR_DADOS == 'polars':
+    if motor_polars.disponivel():
+        motor_dados = motor_polars
+    else:
+        AVISOS.append("Motor Polars selecionado, mas o pacote 'polars' não está instalado. Usando pandas.")
+elif configuracao.MOTOR_DADOS == 'particionado':
+    if dataset_particionado.disponivel():
+        motor_dados = dataset_particionado
+    else:
+        AVISOS.append("Dataset particionado selecionado, mas o pacote 'pyarrow' não está instalado. Usando pandas.")
+
+
+# --- Backend das consultas (DASH_BACKEND, ver configuracao) ---
+# Com o backend DuckDB os filtros globais e as agregações dos gráficos rodam em SQL sobre o arquivo
+# gerado por backend_duckdb, e o df principal não é carregado neste processo.
+use_duckdb_backend = configuracao.BACKEND_CONSULTAS == 'duckdb'
+if use_duckdb_backend and not backend_duckdb.disponivel():
+    AVISOS.append("Backend DuckDB selecionado, mas o pacote 'duckdb' não está instalado. Usando pandas.")
+    use_duckdb_backend = False
+
+
+# --- Carregar e Preparar os Dados: versões do dataset (gerenciador_dataset, DASH_RECARGA_SEGUNDOS) ---
+# Uma versão tem tudo o que sai do CSV: o banco DuckDB ou o df principal (do motor escolhido) e,
+# no motor pandas, o cubo de somas acumuladas por ano (cubo_anos, DASH_CUBO_ANOS), que dá o range
+# dinâmico do slider e os gráficos por ano/gênero/plataforma/período sem reagrupar as linhas a cada
+# movimento do slider, os box plots de seleções grandes a partir dos sketches de quantis
+# (DASH_ERRO_QUANTIS) e os indicadores de desenvolvedores/publicadoras distintos a partir dos
+# HyperLogLog (DASH_PRECISAO_HLL). Quando o CSV muda, o gerenciador monta a nova versão em segundo
+# plano e a troca sem reiniciar o servidor; cada rerun usa a versão que pegou até o fim, e o número
+# dela entra na chave dos caches abaixo.
+def load_dataset_version(caminho, inicial):
+    """Dados de uma versão do dataset (roda na carga inicial e na thread de recarga, sem st.*)."""
+    if use_duckdb_backend:
+        caminho_banco = None if inicial else backend_duckdb.caminho_versao(caminho)
+        query_database = backend_duckdb.abrir(caminho, caminho_banco)
+        return {'query_database': query_database, 'df_main': None, 'year_cube': None,
+                'anos': (query_database.min_year, query_database.max_year)}
+    if motor_dados is dataset_particionado:
+        # As partições da versão antiga ficam até ela ser liberada (reruns em andamento ainda as leem)
+        df_main, min_year, max_year = dataset_particionado.load_and_preprocess_data(caminho, remover_anteriores=inicial)
+    else:
+        df_main, min_year, max_year = motor_dados.load_and_preprocess_data(caminho)
+    year_cube = None
+    if configuracao.CUBO_ANOS and motor_dados is pipeline_dados:
+        year_cube = cubo_anos.CuboAnos(df_main, configuracao.ERRO_QUANTIS, configuracao.PRECISAO_HLL)
+    return {'query_database': None, 'df_main': df_main, 'year_cube': year_cube, 'anos': (min_year, max_year)}
+
+
+def release_dataset_version(dados):
+    """Libera os recursos de uma versão substituída que não é mais usada por nenhum rerun."""
+    if dados['query_database'] is not None:
+        # A primeira versão usa o arquivo padrão, reaproveitado na próxima inicialização
+        remover = dados['query_database'].caminho != os.path.join(configuracao.pasta_cache('duckdb'),
+                                                                  backend_duckdb.ARQUIVO_BANCO)
+        dados['query_database'].fechar(remover=remover)
+    elif motor_dados is dataset_particionado:
+        shutil.rmtree(dados['df_main'].pasta, ignore_errors=True)
+
+
+# --- Função para aplicar TODOS os filtros globais (Plataforma, Gênero, Período, Ano) ---
+# O df não entra no hash (prefixo _): o número da versão do dataset identifica os dados (e os anos dela).
+# O st.cache_data não descarta as entradas de uma versão substituída (não há como apagar chaves
+# avulsas): o limite de entradas faz os DataFrames filtrados das versões antigas saírem por LRU,
+# em vez de acumularem a cada recarga. Cabe com folga o estado padrão e os estados do
+# pré-aquecimento (duas entradas por estado: range do slider e filtro final).
+@st.cache_data(max_entries=16, show_spinner="Aplicando filtros e preparando dados para gráficos...")
+def apply_all_global_filters(dataset_number, _df_base, platform_filter, genre_filter, pandemic_periods_filter,
+                             current_years_filter, _overall_years):
+    metricas.registrar_miss()
+    if not pandemic_periods_filter:
+        st.warning("Nenhum 'Período da Pandemia' selecionado nos filtros globais. Isso pode resultar em dados vazios.")
+    return motor_dados.apply_all_global_filters(
+        _df_base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+        *_overall_years
+    )
+
+
+# Equivalente no backend DuckDB: só os anos mínimo e máximo voltam do banco (entradas pequenas)
+@st.cache_data(max_entries=256, show_spinner=False)
+def query_year_range(dataset_number, _query_database, platform_filter, genre_filter, pandemic_periods_filter):
+    metricas.registrar_miss()
+    if not pandemic_periods_filter:
+        st.warning("Nenhum 'Período da Pandemia' selecionado nos filtros globais. Isso pode resultar em dados vazios.")
+    return _query_database.intervalo_anos(platform_filter, genre_filter, pandemic_periods_filter)
+
+
+# --- Agregações compartilhadas pelos gráficos das Abas 1 a 6 (ver registro_graficos) ---
+# Um objeto por estado de filtros: cada agrupamento é calculado sob demanda e uma única vez, e é
+# reaproveitado nos reruns seguintes com os mesmos filtros (ex.: ao mover o slider de Top N).
+# As bases não entram na chave (prefixo _): elas são função da versão do dataset e dos filtros. Com
+# o cubo, `_bases` é uma função: as linhas filtradas só são montadas para o que o cubo não responde.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def chart_aggregations(dataset_number, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                       _bases, _year_cube=None):
+    resultados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, _bases)
+    if _year_cube is None:
+        return resultados
+    # Gráficos por ano/gênero/plataforma/período saem do cubo; os demais, do plano acima
+    filtros = (platform_filter, genre_filter, pandemic_periods_filter, current_years_filter)
+    return cubo_anos.ResultadosCubo(_year_cube, filtros, resultados)
+
+
+# No backend DuckDB cada gráfico vira uma consulta SQL (backend_duckdb.ResultadosDuckDB, mesma interface)
+@st.cache_resource(max_entries=8, show_spinner=False)
+def query_chart_results(dataset_number, _query_database, platform_filter, genre_filter, pandemic_periods_filter,
+                        current_years_filter):
+    return _query_database.resultados(platform_filter, genre_filter, pandemic_periods_filter, current_years_filter)
+
+
+def genre_options(version):
+    """Opções do filtro de gênero: 'Todos' e os gêneros únicos do df principal (não do explodido)."""
+    if version.dados['query_database'] is not None:
+        return ['Todos'] + version.dados['query_database'].generos()
+    return ['Todos'] + motor_dados.all_genres(version.dados['df_main'])
+
+
+def dynamic_year_range(version, platform_filter, genre_filter, pandemic_periods_filter):
+    """(ano mínimo, ano máximo) dos jogos com os filtros de plataforma/gênero/pandemia; (None, None) sem jogos."""
+    dados = version.dados
+    if dados['query_database'] is not None:
+        with metricas.chamada_cache('query_year_range'):
+            return query_year_range(version.numero, dados['query_database'], platform_filter, genre_filter,
+                                    pandemic_periods_filter)
+    if dados['year_cube'] is not None:
+        # Soma das contagens por ano das células selecionadas: sem filtrar o df principal
+        return dados['year_cube'].intervalo_anos(platform_filter, genre_filter, pandemic_periods_filter)
+    with metricas.chamada_cache('apply_all_global_filters'):
+        _, _, dynamic_min_year, dynamic_max_year = apply_all_global_filters(
+            version.numero, dados['df_main'], platform_filter, genre_filter, pandemic_periods_filter,
+            dados['anos'], dados['anos'] # Passa o range completo temporariamente
+        )
+    return dynamic_min_year, dynamic_max_year
+
+
+def filtered_results(version, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter):
+    """(agregações dos gráficos, jogos filtrados, df por jogo, df por gênero); no DuckDB e com o cubo os dfs são None."""
+    dados = version.dados
+    filtros = (platform_filter, genre_filter, pandemic_periods_filter, current_years_filter)
+    if dados['query_database'] is not None:
+        agregacoes = query_chart_results(version.numero, dados['query_database'], *filtros)
+        return agregacoes, agregacoes.quantidade(), None, None
+    if dados['year_cube'] is not None:
+        # Contagem do cubo; os filtros sobre as linhas (cópia + explode dos gêneros) só rodam quando
+        # um gráfico ou indicador que o cubo não responde pede as linhas (em geral na thread do pool)
+        if not pandemic_periods_filter:
+            st.warning("Nenhum 'Período da Pandemia' selecionado nos filtros globais. Isso pode resultar em dados vazios.")
+        numero, df_main, anos = version.numero, dados['df_main'], dados['anos']
+
+        def bases():
+            with metricas.chamada_cache('apply_all_global_filters'):
+                df_games, df_genres, _, _ = apply_all_global_filters(numero, df_main, *filtros, anos)
+            return {'jogo': df_games, 'genero': df_genres}
+
+        agregacoes = chart_aggregations(version.numero, *filtros, bases, dados['year_cube'])
+        return agregacoes, dados['year_cube'].quantidade(*filtros), None, None
+    with metricas.chamada_cache('apply_all_global_filters'):
+        df_games, df_genres, _, _ = apply_all_global_filters(version.numero, dados['df_main'], *filtros, dados['anos'])
+    agregacoes = chart_aggregations(version.numero, *filtros, {'jogo': df_games, 'genero': df_genres})
+    return agregacoes, len(df_games), df_games, df_genres
+
+
+# --- Pedidos dos gráficos das Abas 1 a 6 (ver pipeline_graficos) ---
+TOP_N_DEVS_PADRAO = 10
+
+
+def price_base_key(price_analysis_base_selection):
+    return 'jogo' if price_analysis_base_selection == 'Uma Entrada por Jogo' else 'genero'
+
+
+def trend_chart_request(trend_by_option, price_base):
+    """(id do gráfico, base) do gráfico 8: por Gênero a agregação usa sempre o df explodido."""
+    if trend_by_option == 'Plataforma':
+        return 'grafico_8_plataforma', price_base
+    return 'grafico_8_genero', None
+
+
+def chart_requests(top_n_devs, price_base, trend_by_option):
+    """(id do gráfico, base, top_n) de todos os gráficos das Abas 1 a 6, na ordem de exibição."""
+    return ([(id_grafico, None, None) for id_grafico in ('grafico_1', 'grafico_2', 'grafico_3', 'grafico_4')]
+            + [('grafico_5', None, top_n_devs), ('grafico_6', None, None), ('grafico_7', price_base, None),
+               (*trend_chart_request(trend_by_option, price_base), None)]
+            + [(id_grafico, None, None) for id_grafico in
+               ('grafico_9', 'grafico_10', 'grafico_11', 'grafico_12', 'grafico_13', 'grafico_14', 'heatmap')])
+
+
+# --- Pré-aquecimento dos caches (DASH_AQUECIMENTO, ver aquecimento) ---
+# O gerenciador chama esta função na thread de fundo com a primeira versão, logo depois de
+# carregá-la (ver `gerenciador`), e com cada versão nova antes da troca. Ela percorre o estado
+# padrão dos filtros (o da primeira visita) e os estados mais frequentes do log de uso pelas mesmas
+# funções em cache do script, com os widgets das abas nos valores padrão: o primeiro rerun com
+# esses filtros encontra os filtros, as agregações e as figuras prontos.
+def warm_up_version(version):
+    estados = [('Todas', genre_options(version), list(pipeline_dados.PERIODOS_PANDEMIA), None)]
+    estados += aquecimento.estados_frequentes(configuracao.ESTADOS_AQUECIMENTO)
+    pedidos = chart_requests(TOP_N_DEVS_PADRAO, price_base_key('Uma Entrada por Jogo'), 'Plataforma')
+    for platform_filter, genre_filter, pandemic_periods_filter, current_years_filter in estados:
+        if current_years_filter is None:
+            # Valor inicial do slider: o range dinâmico dos demais filtros
+            dynamic_min_year, dynamic_max_year = dynamic_year_range(version, platform_filter, genre_filter,
+                                                                    pandemic_periods_filter)
+            if dynamic_min_year is None:
+                dynamic_min_year, dynamic_max_year = version.dados['anos']
+            current_years_filter = (int(dynamic_min_year), int(dynamic_max_year))
+        agregacoes, filtered_count, _, _ = filtered_results(
+            version, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter
+        )
+        if filtered_count > 0:
+            for pedido in pedidos:
+                pipeline_graficos.construir_grafico(agregacoes, *pedido)
+
+
+_gerenciador = None
+_trava_gerenciador = threading.Lock()
+
+
+def gerenciador():
+    """Gerenciador do dataset do processo, criado (carga da primeira versão) na primeira chamada.
+
+    Chamadas simultâneas esperam a mesma carga; se ela falhar (ex.: CSV ausente, FileNotFoundError),
+    a próxima chamada tenta de novo.
+    """
+    global _gerenciador
+    with _trava_gerenciador:
+        if _gerenciador is None:
+            metricas.registrar_miss()
+            _gerenciador = gerenciador_dataset.GerenciadorDataset(
+                pipeline_dados.CAMINHO_DADOS, load_dataset_version, release_dataset_version,
+                aquecer=warm_up_version if configuracao.AQUECIMENTO else None
+            ).iniciar()
+    return _gerenciador
@@ -0,0 +1,110 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- Gerador de datasets sintéticos com o esquema do DB_completo.csv ---
+# Reproduz as características que pesam no desempenho do dashboard: colunas genre_* one-hot com
+# jogos de vários gêneros, desenvolvedores/publicadoras/plataformas com distribuição de Zipf
+# (poucos muito frequentes, cauda longa), preços por plataforma, títulos com caracteres não
+# ASCII, linhas duplicadas e alguns valores inválidos que o pré-processamento descarta.
+
+GENEROS = [
+    'Action', 'Indie', 'Adventure', 'Casual', 'RPG', 'Strategy', 'Simulation', 'Early Access',
+    'Free to Play', 'Sports', 'Racing', 'Massively Multiplayer', 'Shooter', 'Puzzle', 'Platformer',
+    'Fighting', 'Horror', 'Survival', 'Open World', 'Sandbox', 'Visual Novel', 'Rhythm',
+    'Education', 'Family', 'Card Game',
+]
+
+# Plataforma -> preço mediano em dólar (distribuição log-normal em torno dele)
+PLATAFORMAS = {
+    'PC': 9.99, 'PS4': 19.99, 'Nintendo Switch': 24.99, 'Xbox One': 19.99, 'PS5': 39.99,
+    'Xbox Series X|S': 34.99, 'PS3': 14.99, 'Xbox 360': 14.99, 'PS Vita': 9.99, 'Nintendo 3DS': 19.99,
+    'Wii U': 19.99, 'iOS': 2.99, 'Android': 1.99, 'Stadia': 29.99, 'Mac': 9.99,
+}
+
+SUFIXOS_TITULO = np.array(['', '', '', '', ' II', ' Remastered', '™', ' Édition', ' 2', ' - Deluxe'])
+
+
+def _zipf(rng, n_itens, tamanho, expoente=1.2):
+    """Índices em [0, n_itens) com frequência proporcional a 1/(k+1)^expoente."""
+    pesos = 1.0 / np.arange(1, n_itens + 1) ** expoente
+    return rng.choice(n_itens, size=tamanho, p=pesos / pesos.sum())
+
+
+def gerar_bloco(rng, n_linhas, inicio_id=0):
+    """Gera um bloco de `n_linhas` jogos com o esquema do DB_completo."""
+    nomes_plataformas = np.array(list(PLATAFORMAS))
+    medianas = np.array(list(PLATAFORMAS.values()))
+    n_desenvolvedores = max(50, (inicio_id + n_linhas) // 8)
+    n_publicadoras = max(20, (inicio_id + n_linhas) // 25)
+
+    plataforma = _zipf(rng, len(nomes_plataformas), n_linhas, 1.0)
+    anos = np.arange(1995, 2025)
+    pesos_ano = np.linspace(1, 12, len(anos)) ** 1.5
+    release_year = rng.choice(anos, size=n_linhas, p=pesos_ano / pesos_ano.sum()).astype(float)
+    release_year[rng.random(n_linhas) < 0.005] = np.nan
+
+    preco = np.round(np.exp(rng.normal(np.log(medianas[plataforma]), 0.6)), 2)
+    preco[rng.random(n_linhas) < 0.10] = 0.0
+    preco[rng.random(n_linhas) < 0.01] = np.nan
+
+    ids = np.arange(inicio_id, inicio_id + n_linhas)
+    titulos = pd.Series(ids).map('Game {}'.format) + SUFIXOS_TITULO[rng.integers(0, len(SUFIXOS_TITULO), n_linhas)]
+
+    df = pd.DataFrame({
+        'title': titulos,
+        'platform': nomes_plataformas[plataforma],
+        'developers': pd.Series(_zipf(rng, n_desenvolvedores, n_linhas)).map('Studio {}'.format),
+        'publishers': pd.Series(_zipf(rng, n_publicadoras, n_linhas)).map('Publisher {}'.format),
+        'release_year': release_year,
+        'release_month': rng.integers(1, 13, n_linhas),
+        'preco_dolar': preco,
+        'preco_euro': np.round(preco * 0.92, 2),
+    })
+
+    # Gêneros: 1 + Poisson(0.8) gêneros por jogo (até 5), escolhidos com popularidade de Zipf;
+    # ~3% dos jogos ficam sem gênero (viram 'Desconhecido' no pré-processamento)
+    n_generos = np.minimum(1 + rng.poisson(0.8, n_linhas), 5)
+    n_generos[rng.random(n_linhas) < 0.03] = 0
+    matriz_generos = np.zeros((n_linhas, len(GENEROS)), dtype=bool)
+    for posicao in range(5):
+        sorteados = _zipf(rng, len(GENEROS), n_linhas, 0.9)
+        ativos = n_generos > posicao
+        matriz_generos[np.flatnonzero(ativos), sorteados[ativos]] = True
+    for coluna, genero in enumerate(GENEROS):
+        df[f'genre_{genero}'] = matriz_generos[:, coluna]
+
+    # ~1% de linhas duplicadas
+    duplicadas = df.sample(frac=0.01, random_state=int(rng.integers(0, 2 ** 31)))
+    return pd.concat([df, duplicadas], ignore_index=True)
+
+
+def gerar_dataset(caminho, n_linhas, semente=42, tamanho_bloco=1_000_000):
+    """Escreve um CSV sintético com `n_linhas` jogos em blocos (memória limitada ao bloco)."""
+    rng = np.random.default_rng(semente)
+    for inicio in range(0, n_linhas, tamanho_bloco):
+        bloco = gerar_bloco(rng, min(tamanho_bloco, n_linhas - inicio), inicio)
+        bloco.to_csv(caminho, mode='w' if inicio == 0 else 'a', header=inicio == 0, index=False)
+    return caminho
+
+
+def obter_dataset(pasta, n_linhas, semente=42):
+    """Caminho de um dataset sintético de `n_linhas`, gerando-o apenas se ainda não existir."""
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f'DB_sintetico_{n_linhas}_{semente}.csv')
+    if not os.path.exists(caminho):
+        gerar_dataset(caminho + '.tmp', n_linhas, semente)
+        os.replace(caminho + '.tmp', caminho)
+    return caminho
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera um DB_completo sintético.')
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('--saida', default='DB_completo_sintetico.csv')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    gerar_dataset(args.saida, args.linhas, args.semente)
+    print(f'{args.linhas} jogos sintéticos escritos em {args.saida}.')
@@ -1,14 +1,37 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import re
 import os
 import base64 # Garanta que base64 está importado!
+import time
+
+import amostra_progressiva
+import aquecimento
+import assets_estaticos
+import configuracao
+import dados_dashboard
+import instrumentacao
+import metricas
+import pipeline_dados
+import pipeline_graficos
+from coortes import MES_BASE_CALENDARIO, assinatura_origem, calcular_coortes
+from dados_dashboard import (TOP_N_DEVS_PADRAO, chart_requests, dynamic_year_range, filtered_results, genre_options,
+                             price_base_key, trend_chart_request)
+from jogos_relacionados import IndiceRelacionados, assinatura_indice
+from pipeline_reviews import agregados_por_titulo, assinatura_reviews, carregar_agregados_reviews
 
 # --- Configuração da página Streamlit ---
 st.set_page_config(layout="wide", page_title="Dashboard de Análise de Jogos")
 
+# Instrumentação por etapa (DASH_DEBUG=1 ou ?debug=1 na URL); desligada, não mede nada
+instrumentacao.iniciar_rerun(st.query_params)
+
+# Métricas no formato Prometheus (DASH_METRICAS_PORTA / DASH_METRICAS_ARQUIVO, ver metricas.py)
+inicio_rerun = time.perf_counter()
+metricas.iniciar_servidor_http()
+
 # --- Adicionar Imagem de Fundo (App e Sidebar) ---
 background_image_app_path = "Background_app.jpg" # Imagem para o fundo do app
 background_image_sidebar_path = "background_sidebar.jpg" # Imagem para o fundo da sidebar
@@ -21,18 +44,32 @@ def get_base64_image(image_path):
             return base64.b64encode(img_file.read()).decode()
     return None
 
-# Obter imagens codificadas
-encoded_background_app = get_base64_image(background_image_app_path)
-encoded_background_sidebar = get_base64_image(background_image_sidebar_path)
+# Com server.enableStaticServing (.streamlit/config.toml) as imagens são publicadas uma vez em
+# static/ com nome por hash (assets_estaticos) e o CSS de cada rerun leva só a URL; sem a opção,
+# continuam embutidas em base64
+@st.cache_resource(show_spinner=False)
+def static_background_urls():
+    return assets_estaticos.publicar_imagens()
+
+if st.get_option("server.enableStaticServing"):
+    background_urls = static_background_urls()
+    background_app_url = background_urls['fundo_app']
+    background_sidebar_url = background_urls['fundo_sidebar']
+else:
+    # Obter imagens codificadas
+    encoded_background_app = get_base64_image(background_image_app_path)
+    encoded_background_sidebar = get_base64_image(background_image_sidebar_path)
+    background_app_url = f"data:image/jpeg;base64,{encoded_background_app}" if encoded_background_app else None
+    background_sidebar_url = f"data:image/jpeg;base64,{encoded_background_sidebar}" if encoded_background_sidebar else None
 
 css_string = """
 <style>
 /* Estilo para o fundo principal do aplicativo */
 """
-if encoded_background_app:
+if background_app_url:
     css_string += f"""
     .stApp {{
-        background-image: url("data:image/jpeg;base64,{encoded_background_app}");
+        background-image: url("{background_app_url}");
         background-size: cover;
         background-position: center;
         background-repeat: no-repeat;
@@ -45,10 +82,10 @@ else:
 css_string += """
 /* Estilo para o fundo da sidebar */
 """
-if encoded_background_sidebar:
+if background_sidebar_url:
     css_string += f"""
     .stSidebar {{
-        background-image: url("data:image/jpeg;base64,{encoded_background_sidebar}");
+        background-image: url("{background_sidebar_url}");
         background-size: cover;
         background-position: center;
         background-repeat: no-repeat;
@@ -101,84 +138,30 @@ st.markdown("Explore dados sobre lançamentos, gêneros, desenvolvedores e preç
 
 
 
-# --- Carregar e Preparar os Dados (Diretamente no Streamlit) ---
-@st.cache_data(show_spinner="Carregando e processando dados base...") # Cachear com spinner
-def load_and_preprocess_data():
-    """Carrega o dataset e realiza todas as etapas de pré-processamento."""
+# --- Motor, backend e versões do dataset (ver dados_dashboard) ---
+# A carga, as consultas em cache e o pré-aquecimento ficam em dados_dashboard, no nível do processo:
+# com `python servidor.py` o dataset já está carregado quando a primeira sessão chega.
+for aviso in dados_dashboard.AVISOS:
+    st.sidebar.warning(aviso)
+motor_dados = dados_dashboard.motor_dados
+use_duckdb_backend = dados_dashboard.use_duckdb_backend
+
+# Carrega e pré-processa os dados base (ou pega a versão já carregada). O contador de hit/miss é do
+# gerenciador (um miss por processo, nenhum quando o servidor.py já o criou); cada carga de versão,
+# inclusive as recargas, fica no histograma dashboard_carga_dados_segundos (gerenciador_dataset)
+with instrumentacao.etapa('load_and_preprocess_data') as medida, metricas.chamada_cache('dataset_manager'):
     try:
-        # ATENÇÃO: Verifique o nome do seu arquivo CSV.
-        df = pd.read_csv('DB_completo.csv')
+        with st.spinner("Carregando e processando dados base..."):
+            dataset_version = dados_dashboard.gerenciador().atual()
     except FileNotFoundError:
         st.error("ERRO: O arquivo CSV ('DB.csv') não encontrado. Por favor, certifique-se de que o arquivo está na mesma pasta do script.")
         st.stop()
-
-    df.drop_duplicates(inplace=True)
-
-    # Limpeza de caracteres não ASCII para evitar erros de codificação em gráficos
-    def remove_non_ascii(text):
-        if isinstance(text, str):
-            return re.sub(r'[^\x00-\x7F]+', '', text)
-        return text
-
-    df['title'] = df['title'].apply(remove_non_ascii)
-    df['platform'] = df['platform'].apply(remove_non_ascii)
-    df['developers'] = df['developers'].apply(remove_non_ascii)
-    df['publishers'] = df['publishers'].apply(remove_non_ascii)
-
-    genre_columns = [col for col in df.columns if col.startswith('genre_')]
-    df['genre_list'] = df.apply( # Renomeado para genre_list para evitar confusão com 'genre' da explosão
-        lambda row: [col.replace('genre_', '') for col in genre_columns if row[col]],
-        axis=1
-    )
-    # Se a lista de gêneros for vazia, atribui ['Desconhecido']
-    df['genre_list'] = df['genre_list'].apply(lambda x: x if x else ['Desconhecido'])
-
-    # Converter a lista de gêneros para tupla para melhorar o hashing do Pandas (útil para cache)
-    df['genre_list'] = df['genre_list'].apply(tuple)
-
-    # Processamento de Datas
-    df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce').fillna(0).astype(int)
-    df['release_month'] = pd.to_numeric(df['release_month'], errors='coerce').fillna(1).astype(int)
-    df['release_date'] = pd.to_datetime(
-        df['release_year'].astype(str) + '-' +
-        df['release_month'].astype(str).str.zfill(2) + '-01',
-        errors='coerce'
-    )
-    df.dropna(subset=['release_date'], inplace=True) # Remover linhas com datas inválidas
-
-    # Definir Períodos da Pandemia baseando-se nas datas
-    pandemic_start_date = pd.Timestamp('2020-04-01')
-    pandemic_end_date = pd.Timestamp('2022-03-31')
-    post_pandemic_start_date = pd.Timestamp('2022-04-01')
-
-    def assign_period_with_dates(date):
-        if date < pandemic_start_date:
-            return 'Pré-Pandemia'
-        elif pandemic_start_date <= date <= pandemic_end_date:
-            return 'Pandemia'
-        elif date >= post_pandemic_start_date:
-            return 'Pós-Pandemia'
-        return 'Desconhecido'
-
-    df['periodo'] = df['release_date'].apply(assign_period_with_dates)
-
-    # Garantir colunas de preço numéricas e preencher NaNs
-    df['preco_dolar'] = pd.to_numeric(df['preco_dolar'], errors='coerce')
-    df['preco_euro'] = pd.to_numeric(df['preco_euro'], errors='coerce')
-    df.dropna(subset=['preco_dolar', 'preco_euro'], inplace=True)
-
-    # Corrigir nomes de colunas e preencher NaNs para 'developers' e 'platform'
-    df['developers'] = df['developers'].fillna('Desconhecido')
-    df['platform'] = df['platform'].fillna('Outra')
-
-    # Obter anos mínimo e máximo do dataset completo
-    min_overall_year = int(df['release_year'].min())
-    max_overall_year = int(df['release_year'].max())
-
-    return df, min_overall_year, max_overall_year
-
-# Carrega e pré-processa os dados base
-df_main, min_overall_year, max_overall_year = load_and_preprocess_data()
+    query_database = dataset_version.dados['query_database']
+    df_main = dataset_version.dados['df_main']
+    year_cube = dataset_version.dados['year_cube']
+    min_overall_year, max_overall_year = dataset_version.dados['anos']
+    if df_main is not None:
+        medida.linhas = len(df_main)
 #st.sidebar.success("Dados base carregados e pré-processados!")
 
 # Criando duas colunas na barra lateral
@@ -195,84 +178,34 @@ with col2:
 st.sidebar.header("Filtros Globais")
 
 # Filtro Global de Plataforma
-all_platforms = ['Todas'] + sorted(df_main['platform'].unique().tolist())
+if use_duckdb_backend:
+    all_platforms = ['Todas'] + query_database.plataformas()
+else:
+    all_platforms = ['Todas'] + motor_dados.plataformas(df_main)
 selected_platform_global = st.sidebar.selectbox("Filtrar por Plataforma:", all_platforms, key='global_platform')
 
 # Filtro Global de Gênero
-# Para o multiselect de gênero, precisamos dos gêneros únicos do df principal, não do explodido
-all_genres_from_main = set()
-for genres_tuple in df_main['genre_list']:
-    for genre_item in genres_tuple:
-        all_genres_from_main.add(genre_item)
-all_genres_global_options = ['Todos'] + sorted(list(all_genres_from_main))
+all_genres_global_options = genre_options(dataset_version)
 selected_genre_global = st.sidebar.multiselect("Filtrar por Gênero:", all_genres_global_options, default=all_genres_global_options, key='global_genre')
 
 # Filtros Globais de Período da Pandemia
 selected_pandemic_periods_global = st.sidebar.multiselect(
     "Período da Pandemia:",
-    options=['Pré-Pandemia', 'Pandemia', 'Pós-Pandemia'],
-    default=['Pré-Pandemia', 'Pandemia', 'Pós-Pandemia'],
+    options=pipeline_dados.PERIODOS_PANDEMIA,
+    default=pipeline_dados.PERIODOS_PANDEMIA,
     key='global_pandemic_periods'
 )
 
-# --- Função para aplicar TODOS os filtros globais (Plataforma, Gênero, Período, Ano) ---
-@st.cache_data(show_spinner="Aplicando filtros e preparando dados para gráficos...")
-def apply_all_global_filters(df_base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter):
-    df_filtered = df_base.copy()
-
-    # 1. Filtrar por Plataforma
-    if platform_filter != 'Todas':
-        df_filtered = df_filtered[df_filtered['platform'] == platform_filter]
-
-    # 2. Filtrar por Período da Pandemia
-    if pandemic_periods_filter:
-        df_filtered = df_filtered[df_filtered['periodo'].isin(pandemic_periods_filter)]
-    else:
-        st.warning("Nenhum 'Período da Pandemia' selecionado nos filtros globais. Isso pode resultar em dados vazios.")
-        return pd.DataFrame(), pd.DataFrame(), None, None # Retorna DFs vazios e None para anos
-
-    # 3. Filtrar por Gênero (usando 'genre_list' para jogos com múltiplos gêneros)
-    if genre_filter and 'Todos' not in genre_filter:
-        df_filtered = df_filtered[
-            df_filtered['genre_list'].apply(lambda genres_in_row_tuple: any(g_in_row in genre_filter for g_in_row in genres_in_row_tuple))
-        ]
-
-    # Calcular o range de anos dinâmico *APÓS* os filtros de plataforma, gênero e pandemia
-    if not df_filtered.empty:
-        dynamic_min_year_calculated = int(df_filtered['release_year'].min())
-        dynamic_max_year_calculated = int(df_filtered['release_year'].max())
-    else:
-        # Se os filtros anteriores resultarem em DataFrame vazio, use o range geral para o slider
-        dynamic_min_year_calculated = min_overall_year
-        dynamic_max_year_calculated = max_overall_year
-
-    # Aplicar filtro de range de anos
-    min_year_slider, max_year_slider = current_years_filter
-    df_filtered = df_filtered[
-        (df_filtered['release_year'] >= min_year_slider) &
-        (df_filtered['release_year'] <= max_year_slider)
-    ]
-
-    # Agora, e SOMENTE AGORA, explodimos para a versão por gênero se necessário
-    # Crie df_genres_exploded_filtered aqui
-    if not df_filtered.empty:
-        df_genres_exploded_filtered = df_filtered.explode('genre_list')
-        df_genres_exploded_filtered.rename(columns={'genre_list': 'genre'}, inplace=True)
-    else:
-        df_genres_exploded_filtered = pd.DataFrame() # Retorna DF vazio se o original for vazio
-
-    return df_filtered, df_genres_exploded_filtered, dynamic_min_year_calculated, dynamic_max_year_calculated
-
 # --- Lógica do Slider de Ano e Reaplicação dos Filtros ---
 # Esta parte é um pouco complexa devido à natureza do Streamlit e o slider dinâmico.
 # Precisamos de um valor inicial para o slider ANTES de aplicar o filtro de ano,
 # e depois ajustá-lo com base nos dados filtrados pelos outros critérios.
 
 # Primeiro, obtenha o range dinâmico baseado nos filtros de plataforma/gênero/pandemia (sem o filtro de ano)
-df_temp_for_year_range, _, dynamic_min_year_calculated_initial, dynamic_max_year_calculated_initial = apply_all_global_filters(
-    df_main, selected_platform_global, selected_genre_global, selected_pandemic_periods_global,
-    (min_overall_year, max_overall_year) # Passa o range completo temporariamente
-)
+with instrumentacao.etapa('filtros_globais_sem_anos'):
+    dynamic_min_year_calculated_initial, dynamic_max_year_calculated_initial = dynamic_year_range(
+        dataset_version, selected_platform_global, selected_genre_global, selected_pandemic_periods_global
+    )
 
 # Definir os limites min/max do slider
 slider_min_val = dynamic_min_year_calculated_initial if dynamic_min_year_calculated_initial is not None else min_overall_year
@@ -296,19 +229,99 @@ selected_years_global = st.sidebar.slider(
     key='global_years' # Keep the same key for the slider
 )
 
+# Log de uso dos filtros (DASH_USO_LOG, ver aquecimento): um registro por estado novo na sessão, não
+# por rerun (os widgets das abas também disparam reruns com os mesmos filtros)
+usage_state = (selected_platform_global, list(selected_genre_global), list(selected_pandemic_periods_global),
+               tuple(selected_years_global))
+if st.session_state.get('_last_usage_state') != usage_state:
+    st.session_state['_last_usage_state'] = usage_state
+    aquecimento.registrar_uso(selected_platform_global, selected_genre_global, selected_pandemic_periods_global,
+                              selected_years_global)
+
 # RE-APLICAR todos os filtros, agora com o valor FINAL do slider de anos
-df_global_filtered, df_genres_global_filtered, _, _ = apply_all_global_filters(
-    df_main, selected_platform_global, selected_genre_global, selected_pandemic_periods_global, selected_years_global
-)
+with instrumentacao.etapa('filtros_globais') as medida:
+    agregacoes, filtered_games_count, df_global_filtered, df_genres_global_filtered = filtered_results(
+        dataset_version, selected_platform_global, selected_genre_global, selected_pandemic_periods_global,
+        selected_years_global
+    )
+    medida.linhas = filtered_games_count
+
+# Todo jogo tem ao menos um gênero ('Desconhecido'): a base por gênero é vazia só quando a por jogo é
+has_filtered_data = filtered_games_count > 0
+
+# --- Construção dos gráficos das Abas 1 a 6 em paralelo (ver pipeline_graficos) ---
+# Tudo é submetido aqui, antes das abas; os blocos de cada aba só esperam o próprio resultado e
+# exibem, na ordem do script. Os widgets das abas ainda não foram criados neste ponto, mas seus
+# valores já estão no session_state (ou são os padrões, na primeira execução). Gráficos já
+# construídos para esses filtros (reruns anteriores ou o pré-aquecimento) não são submetidos.
+graficos = pipeline_graficos.PipelineGraficos(agregacoes)
+
+# --- Renderização progressiva (DASH_GRAFICOS_PROGRESSIVOS, ver amostra_progressiva) ---
+# Nos gráficos escolhidos, com seleções grandes, o espaço do gráfico mostra primeiro a prévia da
+# amostra estratificada (sorteada uma vez na carga) e é substituído pela figura exata quando ela
+# fica pronta. Só no motor pandas, que tem o df principal na memória.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_preview_sample(_df_main, dataset_number, fracao):
+    metricas.registrar_miss()
+    return amostra_progressiva.AmostraEstratificada(_df_main, fracao)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def preview_aggregations(dataset_number, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                         _amostra):
+    return _amostra.resultados(platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                               min_overall_year, max_overall_year)
+
+preview_results = None
+if (configuracao.GRAFICOS_PROGRESSIVOS and not use_duckdb_backend and motor_dados is pipeline_dados
+        and filtered_games_count > configuracao.LIMITE_PROGRESSIVO):
+    with instrumentacao.etapa('amostra_progressiva'):
+        preview_results = preview_aggregations(
+            dataset_version.numero, selected_platform_global, selected_genre_global, selected_pandemic_periods_global,
+            selected_years_global, load_preview_sample(df_main, dataset_version.numero, configuracao.FRACAO_AMOSTRA)
+        )
+
+def chart_with_preview(id_grafico, base=None, top_n=None):
+    """(df, figura, espaço do gráfico); nos progressivos ainda não prontos, o espaço mostra antes a prévia."""
+    chart_slot = st.empty()
+    if (preview_results is not None and id_grafico in configuracao.GRAFICOS_PROGRESSIVOS
+            and not graficos.pronto(id_grafico, base, top_n)):
+        with instrumentacao.etapa(f'previa_{id_grafico}'):
+            _, fig_preview = amostra_progressiva.figura_previa(preview_results, id_grafico, base, top_n)
+            if fig_preview is not None:
+                instrumentacao.plotly_chart(fig_preview, container=chart_slot, use_container_width=True)
+    df, fig = graficos.obter(id_grafico, base, top_n)
+    return df, fig, chart_slot
+
+if has_filtered_data:
+    base_tab3_atual = price_base_key(st.session_state.get('price_analysis_base_tab3', 'Uma Entrada por Jogo'))
+    for pedido in chart_requests(st.session_state.get('top_devs_tab2', TOP_N_DEVS_PADRAO), base_tab3_atual,
+                                 st.session_state.get('trend_option_tab8', 'Plataforma')):
+        graficos.submeter(*pedido)
+
+# --- Indicadores do recorte filtrado ---
+# Desenvolvedores/publicadoras distintos saem da mesma API dos gráficos (agregacoes.distintos): com
+# o cubo são estimativas de HyperLogLog, sem ele contagens exatas.
+if has_filtered_data:
+    distinct_estimated = year_cube is not None and year_cube.hll is not None
+    distinct_help = (f"Estimativa (HyperLogLog, erro padrão ~{year_cube.hll.erro_padrao():.0%})"
+                     if distinct_estimated else None)
+    kpi_games, kpi_developers, kpi_publishers = st.columns(3)
+    with instrumentacao.etapa('indicadores'):
+        kpi_games.metric("Jogos", f"{filtered_games_count:,}")
+        kpi_developers.metric("Desenvolvedores distintos", f"{agregacoes.distintos('developers'):,}", help=distinct_help)
+        kpi_publishers.metric("Publicadoras distintas", f"{agregacoes.distintos('publishers'):,}", help=distinct_help)
 
 # --- Geração e Exibição dos Gráficos com Plotly.express em ABAS ---
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab_reviews, tab_relacionados, tab_coortes, tab7 = st.tabs([
     "Visão Geral de Lançamentos e Gêneros",
     "Análise por Plataforma e Desenvolvedor",
     "Distribuição de Preços e Tendências",
     "Tendências de Lançamento por Período",
     "Visão Hierárquica",
     "Heatmap de Preços",
+    "Reviews",
+    "Jogos Relacionados",
+    "Coortes de Jogadores",
     "Info Adicional"
 ])
 
@@ -316,47 +329,34 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
 # --- TAB 1: Visão Geral de Lançamentos e Gêneros ---
 with tab1:
     st.header("Visão Geral de Lançamentos e Gêneros")
-    df_tab_current = df_genres_global_filtered # Esta aba usa o df com gêneros explodidos
-
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Gráficos da Visão Geral..."):
             with st.container():
                 col4, col5, col6 = st.columns(3)
                 with col4:
                     st.subheader("1. Jogos Lançados por Ano")
-                    df_jogos_por_ano = df_tab_current.groupby('release_year').size().reset_index(name='count')
-                    if not df_jogos_por_ano.empty:
-                        fig1 = px.bar(df_jogos_por_ano, x='release_year', y='count', title='Jogos Lançados por Ano')
-                        fig1.update_xaxes(dtick=1, tickformat="%Y")
-                        st.plotly_chart(fig1, use_container_width=True)
-                    else:
-                        st.info("Nenhum dado de jogos lançados por ano com os filtros selecionados.")
+                    with instrumentacao.etapa('exibir_grafico_1'):
+                        df_jogos_por_ano, fig1, chart_slot = chart_with_preview('grafico_1')
+                        if fig1 is not None:
+                            instrumentacao.plotly_chart(fig1, container=chart_slot, use_container_width=True)
+                        else:
+                            st.info("Nenhum dado de jogos lançados por ano com os filtros selecionados.")
                 with col5:
                     st.subheader("2. Top 10 Gêneros por Número de Lançamentos")
-                    df_generos_count = df_tab_current['genre'].value_counts().nlargest(10).reset_index()
-                    df_generos_count.columns = ['genre', 'count']
-                    if not df_generos_count.empty:
-                        fig2 = px.bar(df_generos_count, x='genre', y='count',
-                                        title='Top 10 Gêneros por Número de Lançamentos')
-                        st.plotly_chart(fig2, use_container_width=True)
-                    else:
-                        st.info("Nenhum dado de top 10 gêneros com os filtros selecionados.")
+                    with instrumentacao.etapa('exibir_grafico_2'):
+                        df_generos_count, fig2, chart_slot = chart_with_preview('grafico_2')
+                        if fig2 is not None:
+                            instrumentacao.plotly_chart(fig2, container=chart_slot, use_container_width=True)
+                        else:
+                            st.info("Nenhum dado de top 10 gêneros com os filtros selecionados.")
                 with col6:
                     st.subheader("3. Distribuição de Preços por Gênero")
-                    if not df_tab_current.empty:
-                        top_genres = df_tab_current['genre'].value_counts().nlargest(10).index
-                        df_price_genre = df_tab_current[df_tab_current['genre'].isin(top_genres)]
-
-                        if not df_price_genre.empty:
-                            fig3 = px.box(df_price_genre, x='genre', y='preco_dolar',
-                                            title='Distribuição de Preços (Dólar) por Gênero (Top 10)',
-                                            labels={'preco_dolar': 'Preço (Dólar)'},
-                                            height=500)
-                            st.plotly_chart(fig3, use_container_width=True)
+                    with instrumentacao.etapa('exibir_grafico_3'):
+                        df_price_genre, fig3, chart_slot = chart_with_preview('grafico_3')
+                        if fig3 is not None:
+                            instrumentacao.plotly_chart(fig3, container=chart_slot, use_container_width=True)
                         else:
                             st.info("Nenhum dado de distribuição de preços por gênero com os filtros selecionados.")
-                    else:
-                        st.info("Nenhum dado de distribuição de preços por gênero com os filtros selecionados.")
     else:
         st.info("Nenhum dado para exibir na Visão Geral de Lançamentos e Gêneros com os filtros globais selecionados.")
 
@@ -364,51 +364,36 @@ with tab1:
 # --- Tab 2: Análise por Plataforma e Desenvolvedor ---
 with tab2:
     st.header("Análise por Plataforma e Desenvolvedor")
-    df_tab_current = df_global_filtered # Esta aba usa o df principal filtrado
-
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Gráficos de Plataforma e Desenvolvedor..."):
             # Gráfico 4: Lançamentos por Plataforma ao Longo do Tempo (Gráfico de Linha)
             st.subheader("4. Lançamentos por Plataforma ao Longo do Tempo")
-            df_platform_releases_over_time = df_tab_current.groupby(['release_year', 'platform']).size().reset_index(name='count')
-            if not df_platform_releases_over_time.empty:
-                fig4 = px.line(df_platform_releases_over_time, x='release_year', y='count', color='platform',
-                                title='Lançamentos por Plataforma ao Longo do Tempo',
-                                labels={'release_year': 'Ano de Lançamento', 'count': 'Número de Lançamentos'})
-                fig4.update_xaxes(dtick=1, tickformat="%Y")
-                st.plotly_chart(fig4, use_container_width=True)
-            else:
-                st.info("Nenhum dado de lançamentos por plataforma ao longo do tempo com os filtros selecionados.")
+            with instrumentacao.etapa('exibir_grafico_4'):
+                df_platform_releases_over_time, fig4, chart_slot = chart_with_preview('grafico_4')
+                if fig4 is not None:
+                    instrumentacao.plotly_chart(fig4, container=chart_slot, use_container_width=True)
+                else:
+                    st.info("Nenhum dado de lançamentos por plataforma ao longo do tempo com os filtros selecionados.")
 
             # Gráfico 5: Top 10 Desenvolvedores por Número de Lançamentos
             st.subheader("5. Top 10 Desenvolvedores por Número de Lançamentos")
-            top_n_devs = st.slider("Mostrar Top N Desenvolvedores:", 5, 20, 10, key='top_devs_tab2')
-
-            df_dev_count = df_tab_current['developers'].value_counts().nlargest(top_n_devs).reset_index()
-            df_dev_count.columns = ['developers', 'count']
-            if not df_dev_count.empty:
-                fig5 = px.bar(df_dev_count, x='developers', y='count',
-                                title=f'Top {top_n_devs} Desenvolvedores por Número de Lançamentos')
-                st.plotly_chart(fig5, use_container_width=True)
-            else:
-                st.info("Nenhum dado de top desenvolvedores com os filtros selecionados.")
+            top_n_devs = st.slider("Mostrar Top N Desenvolvedores:", 5, 20, TOP_N_DEVS_PADRAO, key='top_devs_tab2')
+
+            with instrumentacao.etapa('exibir_grafico_5'):
+                df_dev_count, fig5, chart_slot = chart_with_preview('grafico_5', top_n=top_n_devs)
+                if fig5 is not None:
+                    instrumentacao.plotly_chart(fig5, container=chart_slot, use_container_width=True)
+                else:
+                    st.info("Nenhum dado de top desenvolvedores com os filtros selecionados.")
 
             # Gráfico 6: Distribuição de Preços por Plataforma (Box Plot)
             st.subheader("6. Distribuição de Preços por Plataforma")
-            if not df_tab_current.empty:
-                top_platforms = df_tab_current['platform'].value_counts().nlargest(10).index
-                df_price_platform = df_tab_current[df_tab_current['platform'].isin(top_platforms)]
-
-                if not df_price_platform.empty:
-                    fig6 = px.box(df_price_platform, x='platform', y='preco_dolar',
-                                    title='Distribuição de Preços (Dólar) por Plataforma (Top 10)',
-                                    labels={'preco_dolar': 'Preço (Dólar)'},
-                                    height=500)
-                    st.plotly_chart(fig6, use_container_width=True)
+            with instrumentacao.etapa('exibir_grafico_6'):
+                df_price_platform, fig6, chart_slot = chart_with_preview('grafico_6')
+                if fig6 is not None:
+                    instrumentacao.plotly_chart(fig6, container=chart_slot, use_container_width=True)
                 else:
                     st.info("Nenhum dado de distribuição de preços por plataforma com os filtros selecionados.")
-            else:
-                st.info("Nenhum dado de distribuição de preços por plataforma com os filtros selecionados.")
     else:
         st.info("Nenhum dado para exibir na Análise por Plataforma e Desenvolvedor com os filtros globais selecionados.")
 
@@ -427,19 +412,18 @@ with tab3:
         key='price_analysis_base_tab3'
     )
 
-    df_tab_current = df_global_filtered if price_analysis_base_selection == 'Uma Entrada por Jogo' else df_genres_global_filtered
+    base_tab3 = price_base_key(price_analysis_base_selection)
 
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Gráficos de Distribuição de Preços e Tendências..."):
             # Gráfico 7: Histograma Geral de Preços em Dólar
             st.subheader("7. Histograma Geral de Preços em Dólar")
-            if not df_tab_current.empty:
-                fig7 = px.histogram(df_tab_current, x='preco_dolar', nbins=50,
-                                    title='Distribuição de Preços em Dólar',
-                                    labels={'preco_dolar': 'Preço (Dólar)'})
-                st.plotly_chart(fig7, use_container_width=True)
-            else:
-                st.info("Nenhum dado de histograma geral de preços com os filtros selecionados.")
+            with instrumentacao.etapa('exibir_grafico_7'):
+                _, fig7, chart_slot = chart_with_preview('grafico_7', base=base_tab3)
+                if fig7 is not None:
+                    instrumentacao.plotly_chart(fig7, container=chart_slot, use_container_width=True)
+                else:
+                    st.info("Nenhum dado de histograma geral de preços com os filtros selecionados.")
 
             # Gráfico 8: Tendência de Preços Médios ao Longo do Tempo (por Plataforma ou Gênero)
             st.subheader("8. Tendência de Preços Médios ao Longo do Tempo")
@@ -449,77 +433,37 @@ with tab3:
                 key='trend_option_tab8'
             )
 
-            if not df_tab_current.empty:
-                if trend_by_option_tab8 == 'Plataforma':
-                    df_line_chart_data = df_tab_current.groupby(['release_year', 'platform'])['preco_dolar'].mean().reset_index()
-                    color_by_line = 'platform'
-                    title_suffix_line = 'por Plataforma'
-                else: # trend_by_option_tab8 == 'Gênero'
-                    # Certificar-se de usar df_genres_global_filtered para análise por Gênero
-                    df_line_chart_data = df_genres_global_filtered.groupby(['release_year', 'genre'])['preco_dolar'].mean().reset_index()
-                    color_by_line = 'genre'
-                    title_suffix_line = 'por Gênero'
-
-                if not df_line_chart_data.empty:
-                    fig8 = px.line(
-                        df_line_chart_data,
-                        x='release_year',
-                        y='preco_dolar',
-                        color=color_by_line,
-                        title=f'Tendência de Preços Médios {title_suffix_line}',
-                        labels={'release_year': 'Ano de Lançamento', 'preco_dolar': 'Preço Médio (Dólar)'},
-                        height=500
-                    )
-                    fig8.update_xaxes(dtick=1, tickformat="%Y", showgrid=True)
-                    st.plotly_chart(fig8, use_container_width=True)
+            with instrumentacao.etapa('exibir_grafico_8'):
+                df_line_chart_data, fig8, chart_slot = chart_with_preview(*trend_chart_request(trend_by_option_tab8, base_tab3))
+                if fig8 is not None:
+                    instrumentacao.plotly_chart(fig8, container=chart_slot, use_container_width=True)
                 else:
                     st.info("Nenhum dado para exibir para a Tendência de Preços com os filtros selecionados.")
-            else:
-                st.info("Nenhum dado para exibir para a Tendência de Preços com os filtros selecionados.")
     else:
         st.info("Nenhum dado para exibir na Distribuição de Preços e Tendências com os filtros globais selecionados.")
 
 # --- Tab 4: Tendências de Lançamento por Período ---
 with tab4:
     st.header("Tendências de Lançamento por Período")
-    df_tab_current = df_genres_global_filtered # Esta aba usa o df com gêneros explodidos
-
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Gráficos de Tendências de Lançamento por Período..."):
             # Gráfico 9: Lançamentos Anuais por Gênero (Gráfico de Barras Empilhadas)
             st.subheader("9. Lançamentos Anuais por Gênero")
-            df_genre_releases_annual = df_tab_current.groupby(['release_year', 'genre']).size().reset_index(name='count')
-            if not df_genre_releases_annual.empty:
-                fig9 = px.bar(df_genre_releases_annual, x='release_year', y='count', color='genre',
-                                title='Lançamentos Anuais por Gênero',
-                                labels={'release_year': 'Ano de Lançamento', 'count': 'Número de Lançamentos'},
-                                hover_name='genre')
-                fig9.update_xaxes(dtick=1, tickformat="%Y")
-                st.plotly_chart(fig9, use_container_width=True)
-            else:
-                st.info("Nenhum dado de lançamentos anuais por gênero com os filtros selecionados.")
+            with instrumentacao.etapa('exibir_grafico_9'):
+                df_genre_releases_annual, fig9, chart_slot = chart_with_preview('grafico_9')
+                if fig9 is not None:
+                    instrumentacao.plotly_chart(fig9, container=chart_slot, use_container_width=True)
+                else:
+                    st.info("Nenhum dado de lançamentos anuais por gênero com os filtros selecionados.")
 
             # Gráfico 10: Top 5 Gêneros por Período de Lançamento (Comparativo)
             st.subheader("10. Top 5 Gêneros por Período de Lançamento (Comparativo)")
-            df_genre_period = df_tab_current.groupby(['periodo', 'genre']).size().reset_index(name='count')
-
-            if not df_genre_period.empty:
-                # Lógica corrigida para obter Top N por grupo, preservando a coluna 'periodo'
-                top_genres_by_period = df_genre_period.sort_values(by=['periodo', 'count'], ascending=[True, False]) \
-                                                        .groupby('periodo') \
-                                                        .head(5)
-
-                if not top_genres_by_period.empty:
-                    fig10 = px.bar(top_genres_by_period, x='genre', y='count', color='periodo', # 'periodo' agora está presente
-                                    barmode='group',
-                                    title='Top Gêneros por Período de Lançamento',
-                                    labels={'genre': 'Gênero', 'count': 'Número de Lançamentos', 'periodo': 'Período'},
-                                    height=500)
-                    st.plotly_chart(fig10, use_container_width=True)
+            with instrumentacao.etapa('exibir_grafico_10'):
+                top_genres_by_period, fig10, chart_slot = chart_with_preview('grafico_10')
+                if fig10 is not None:
+                    instrumentacao.plotly_chart(fig10, container=chart_slot, use_container_width=True)
                 else:
                     st.info("Nenhum dado de top gêneros por período para exibir com os filtros selecionados.")
-            else:
-                st.info("Nenhum dado de top gêneros por período para exibir com os filtros selecionados.")
     else:
         st.info("Nenhum dado para exibir nas Tendências de Lançamento por Período com os filtros globais selecionados.")
 
@@ -528,33 +472,29 @@ with tab4:
 with tab5:
     st.header("Visão Hierárquica")
     st.markdown("Explore a distribuição de jogos hierarquicamente.")
-    df_tab_current = df_genres_global_filtered # Esta aba usa o df com gêneros explodidos
-
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Gráficos da Visão Hierárquica..."):
             col_s1, col_s2 = st.columns(2)
 
             # Gráfico Sunburst para Gênero -> Plataforma -> Número de Lançamentos
             with col_s1:
                 st.subheader("11. Gênero -> Plataforma (Lançamentos)")
-                df_sunburst1 = df_tab_current.groupby(['genre', 'platform']).size().reset_index(name='count')
-                if not df_sunburst1.empty:
-                    fig11 = px.sunburst(df_sunburst1, path=['genre', 'platform'], values='count',
-                                        title='Distribuição de Lançamentos por Gênero e Plataforma')
-                    st.plotly_chart(fig11, use_container_width=True)
-                else:
-                    st.info("Nenhum dado para o Sunburst Gênero -> Plataforma com os filtros selecionados.")
+                with instrumentacao.etapa('exibir_grafico_11'):
+                    df_sunburst1, fig11, chart_slot = chart_with_preview('grafico_11')
+                    if fig11 is not None:
+                        instrumentacao.plotly_chart(fig11, container=chart_slot, use_container_width=True)
+                    else:
+                        st.info("Nenhum dado para o Sunburst Gênero -> Plataforma com os filtros selecionados.")
 
             # Gráfico Sunburst para Período -> Gênero -> Número de Lançamentos
             with col_s2:
                 st.subheader("12. Período -> Gênero (Lançamentos)")
-                df_sunburst2_agg = df_tab_current.groupby(['periodo', 'genre']).size().reset_index(name='count')
-                if not df_sunburst2_agg.empty:
-                    fig12 = px.sunburst(df_sunburst2_agg, path=['periodo', 'genre'], values='count',
-                                        title='Distribuição de Lançamentos por Período e Gênero')
-                    st.plotly_chart(fig12, use_container_width=True)
-                else:
-                    st.info("Nenhum dado para o Sunburst Período -> Gênero com os filtros selecionados.")
+                with instrumentacao.etapa('exibir_grafico_12'):
+                    df_sunburst2_agg, fig12, chart_slot = chart_with_preview('grafico_12')
+                    if fig12 is not None:
+                        instrumentacao.plotly_chart(fig12, container=chart_slot, use_container_width=True)
+                    else:
+                        st.info("Nenhum dado para o Sunburst Período -> Gênero com os filtros selecionados.")
 
             st.markdown("---") # Divisor visual
             col_s3, col_s4 = st.columns(2)
@@ -562,24 +502,22 @@ with tab5:
             # Gráfico Sunburst para Desenvolvedor -> Gênero -> Número de Lançamentos
             with col_s3:
                 st.subheader("13. Desenvolvedor -> Gênero (Lançamentos)")
-                df_sunburst3 = df_tab_current.groupby(['developers', 'genre']).size().reset_index(name='count')
-                if not df_sunburst3.empty:
-                    fig13 = px.sunburst(df_sunburst3, path=['developers', 'genre'], values='count',
-                                        title='Distribuição de Lançamentos por Desenvolvedor e Gênero')
-                    st.plotly_chart(fig13, use_container_width=True)
-                else:
-                    st.info("Nenhum dado para o Sunburst Desenvolvedor -> Gênero com os filtros selecionados.")
+                with instrumentacao.etapa('exibir_grafico_13'):
+                    df_sunburst3, fig13, chart_slot = chart_with_preview('grafico_13')
+                    if fig13 is not None:
+                        instrumentacao.plotly_chart(fig13, container=chart_slot, use_container_width=True)
+                    else:
+                        st.info("Nenhum dado para o Sunburst Desenvolvedor -> Gênero com os filtros selecionados.")
 
             # Gráfico Sunburst para Gênero -> Preço Médio (Total)
             with col_s4:
                 st.subheader("14. Gênero -> Preço Médio (Total)")
-                df_sunburst4 = df_tab_current.groupby('genre')['preco_dolar'].sum().reset_index()
-                if not df_sunburst4.empty:
-                    fig14 = px.sunburst(df_sunburst4, path=['genre'], values='preco_dolar',
-                                        title='Total de Preços (Dólar) por Gênero')
-                    st.plotly_chart(fig14, use_container_width=True)
-                else:
-                    st.info("Nenhum dado para o Sunburst Gênero -> Preço Médio com os filtros selecionados.")
+                with instrumentacao.etapa('exibir_grafico_14'):
+                    df_sunburst4, fig14, chart_slot = chart_with_preview('grafico_14')
+                    if fig14 is not None:
+                        instrumentacao.plotly_chart(fig14, container=chart_slot, use_container_width=True)
+                    else:
+                        st.info("Nenhum dado para o Sunburst Gênero -> Preço Médio com os filtros selecionados.")
 
     else:
         st.info("Nenhum dado para exibir na Visão Hierárquica com os filtros globais selecionados.")
@@ -588,30 +526,155 @@ with tab5:
 with tab6:
     st.header("Heatmap de Preços Médios por Gênero e Ano")
     st.markdown("Visualize o preço médio dos jogos por gênero em diferentes anos.")
-    df_tab_current = df_genres_global_filtered # Esta aba usa o df com gêneros explodidos
-
-    if not df_tab_current.empty:
+    if has_filtered_data:
         with st.spinner("Carregando Heatmap de Preços Médios..."):
-            df_heatmap_data = df_tab_current.groupby(['release_year', 'genre'])['preco_dolar'].mean().reset_index()
-            if not df_heatmap_data.empty:
-                fig_heatmap = px.density_heatmap(
-                    df_heatmap_data,
-                    x='release_year',
-                    y='genre',
-                    z='preco_dolar',
-                    title='Preço Médio por Gênero e Ano',
-                    labels={'release_year': 'Ano de Lançamento', 'genre': 'Gênero', 'preco_dolar': 'Preço Médio (Dólar)'},
-                    height=600,
-                    color_continuous_scale=px.colors.sequential.Viridis
-                )
-                fig_heatmap.update_xaxes(dtick=1, tickformat="%Y")
-                fig_heatmap.update_yaxes(categoryorder='total ascending')
-                st.plotly_chart(fig_heatmap, use_container_width=True)
-            else:
-                st.info("Nenhum dado para o Heatmap de Preços com os filtros selecionados.")
+            with instrumentacao.etapa('exibir_heatmap'):
+                df_heatmap_data, fig_heatmap, chart_slot = chart_with_preview('heatmap')
+                if fig_heatmap is not None:
+                    instrumentacao.plotly_chart(fig_heatmap, container=chart_slot, use_container_width=True)
+                else:
+                    st.info("Nenhum dado para o Heatmap de Preços com os filtros selecionados.")
     else:
         st.info("Nenhum dado para exibir no Heatmap de Preços com os filtros globais selecionados.")
 
+# --- Tab Reviews: agregados por jogo pré-calculados pelo pipeline_reviews ---
+# A assinatura dos agregados e da tabela games entra na chave: rodar o pipeline (ou trocar a tabela)
+# passa a valer no rerun seguinte, sem reiniciar o servidor
+@st.cache_data(show_spinner="Carregando agregados de reviews...")
+def load_reviews_per_title(assinatura):
+    return agregados_por_titulo(carregar_agregados_reviews("steam"), "steam")
+
+with tab_reviews:
+    st.header("Reviews dos Jogos (Steam)")
+    df_reviews_per_title = load_reviews_per_title(assinatura_reviews("steam"))
+
+    if df_reviews_per_title is None:
+        st.info("Os agregados de reviews ainda não foram calculados. Execute `python pipeline_reviews.py` na pasta do dashboard.")
+    elif not has_filtered_data:
+        st.info("Nenhum dado para exibir em Reviews com os filtros globais selecionados.")
+    else:
+        # Junta os números pré-agregados aos jogos filtrados. O df filtrado tem uma linha por
+        # (título, plataforma) e as reviews são por título: uma linha por título antes de somar
+        if df_global_filtered is None:
+            df_filtered_titles = agregacoes.colunas_jogos(['title', 'platform', 'genre_list'])
+        else:
+            df_filtered_titles = df_global_filtered[['title', 'platform', 'genre_list']]
+        df_reviews_games = df_filtered_titles.drop_duplicates('title').merge(df_reviews_per_title, on='title', how='inner')
+        if not df_reviews_games.empty:
+            col_r1, col_r2 = st.columns(2)
+            with col_r1:
+                st.subheader("Jogos com Mais Reviews")
+                df_top_reviewed = df_reviews_games.nlargest(15, 'n_reviews')
+                fig_reviews_top = px.bar(df_top_reviewed, x='n_reviews', y='title', orientation='h',
+                                         hover_data=['helpful', 'funny', 'comprimento_medio'],
+                                         title='Top 15 Jogos por Número de Reviews',
+                                         labels={'n_reviews': 'Reviews', 'title': 'Jogo'})
+                fig_reviews_top.update_yaxes(categoryorder='total ascending')
+                st.plotly_chart(fig_reviews_top, use_container_width=True)
+            with col_r2:
+                st.subheader("Reviews por Gênero")
+                df_reviews_genre = df_reviews_games.explode('genre_list').rename(columns={'genre_list': 'genre'}) \
+                                                   .groupby('genre')[['n_reviews', 'helpful']].sum().reset_index()
+                df_reviews_genre['helpful_por_review'] = df_reviews_genre['helpful'] / df_reviews_genre['n_reviews']
+                fig_reviews_genre = px.bar(df_reviews_genre, x='genre', y='n_reviews', color='helpful_por_review',
+                                           title='Reviews e Votos "Útil" por Review, por Gênero',
+                                           labels={'genre': 'Gênero', 'n_reviews': 'Reviews', 'helpful_por_review': 'Útil por Review'})
+                st.plotly_chart(fig_reviews_genre, use_container_width=True)
+        else:
+            st.info("Nenhum jogo filtrado possui reviews agregadas.")
+
+# --- Tab Jogos Relacionados: "quem tem X também tem Y" (vizinhos pré-calculados) ---
+# A assinatura do índice e das tabelas de origem entra na chave: recalcular o índice ou trocar as
+# tabelas (o que reconstrói o CSR) abre de novo em vez de servir vizinhos desalinhados
+@st.cache_resource(max_entries=1)
+def load_related_games_index(assinatura):
+    return IndiceRelacionados.abrir("steam")
+
+# Mesmo motivo: a assinatura da tabela games na chave faz a tabela criada ou trocada valer sem reiniciar
+@st.cache_data
+def load_steam_game_titles(assinatura):
+    if assinatura is None:
+        return None
+    df_titles = pd.read_csv(assinatura['caminho'], usecols=['gameid', 'title']).dropna()
+    return df_titles.drop_duplicates('gameid').set_index('gameid')['title']
+
+with tab_relacionados:
+    st.header("Jogos Relacionados")
+    st.markdown("Jogadores que possuem o jogo selecionado também possuem estes jogos (bibliotecas do Steam).")
+    related_index = load_related_games_index(assinatura_indice("steam"))
+    steam_titles = load_steam_game_titles(configuracao.assinatura_arquivo(configuracao.caminho_tabela("steam", "games")))
+
+    if related_index is None or steam_titles is None:
+        st.info("Os jogos relacionados ainda não foram calculados (ou as tabelas do Steam mudaram desde o cálculo). Execute `python jogos_relacionados.py` na pasta do dashboard.")
+    else:
+        titles_with_neighbors = steam_titles[steam_titles.index.isin(related_index.game_ids)]
+        if titles_with_neighbors.empty:
+            st.info("Nenhum jogo da tabela games do Steam está no índice de jogos relacionados.")
+        else:
+            selected_game_title = st.selectbox("Jogo em foco:", sorted(titles_with_neighbors.unique().tolist()), key='related_game')
+            max_related = int(related_index.meta['k'])
+            if max_related > 1:
+                top_related = st.slider("Número de jogos relacionados:", 1, max_related, min(10, max_related), key='related_top')
+            else:
+                # Índice calculado com --k 1: o slider exige mínimo menor que o máximo
+                top_related = max_related
+
+            focus_gameid = int(titles_with_neighbors[titles_with_neighbors == selected_game_title].index[0])
+            df_related = related_index.relacionados(focus_gameid, top=top_related)
+            if not df_related.empty:
+                df_related['title'] = df_related['gameid'].map(steam_titles)
+                fig_related = px.bar(df_related, x='score', y='title', orientation='h',
+                                     hover_data=['coproprietarios'],
+                                     title=f"Jogos relacionados a '{selected_game_title}' ({related_index.meta['metrica']})",
+                                     labels={'score': 'Similaridade', 'title': 'Jogo', 'coproprietarios': 'Jogadores em comum'})
+                fig_related.update_yaxes(categoryorder='total ascending')
+                st.plotly_chart(fig_related, use_container_width=True)
+            else:
+                st.info("Nenhum jogo relacionado encontrado para o jogo selecionado.")
+
+# --- Tab Coortes de Jogadores: matrizes coorte x mês pré-calculadas (módulo coortes) ---
+# As assinaturas de players/history/purchased_games entram na chave, como no cache em disco do módulo
+@st.cache_data(show_spinner="Carregando coortes de jogadores...")
+def load_player_cohorts(granularidade, relativo, assinatura):
+    return calcular_coortes("steam", granularidade=granularidade, relativo=relativo)
+
+with tab_coortes:
+    st.header("Coortes de Jogadores (Steam)")
+    st.markdown("Jogadores agrupados por país e ano de criação da conta.")
+
+    if not os.path.exists(configuracao.caminho_tabela("steam", "players")):
+        st.info("A tabela players do Steam não foi encontrada na pasta de dados.")
+    else:
+        cohort_month_mode = st.radio("Meses:", ('Desde a criação da conta', 'Calendário'), key='cohort_month_mode', horizontal=True)
+        cohorts = load_player_cohorts('ano', cohort_month_mode == 'Desde a criação da conta', assinatura_origem("steam"))
+
+        if cohorts['atividade'] is not None:
+            st.subheader("Conquistas Desbloqueadas por Jogador, por Coorte e Mês")
+            cohort_sizes = np.maximum(cohorts['tamanhos'], 1)[:, None]
+            activity_per_player = cohorts['atividade'] / cohort_sizes
+            active_months = np.flatnonzero(cohorts['atividade'].sum(axis=0))
+            if len(active_months):
+                month_slice = slice(active_months[0], active_months[-1] + 1)
+                if cohorts['relativo']:
+                    month_labels = list(range(month_slice.start, month_slice.stop))
+                else:
+                    month_labels = [f"{(MES_BASE_CALENDARIO + m) // 12}-{(MES_BASE_CALENDARIO + m) % 12 + 1:02d}" for m in range(month_slice.start, month_slice.stop)]
+                fig_cohorts = go.Figure(go.Heatmap(
+                    z=activity_per_player[:, month_slice], x=month_labels, y=cohorts['rotulos'],
+                    colorscale='Viridis', colorbar={'title': 'Conquistas/Jogador'}
+                ))
+                fig_cohorts.update_layout(title='Atividade por Coorte', height=max(400, 18 * len(cohorts['rotulos'])),
+                                          xaxis_title='Meses desde a criação da conta' if cohorts['relativo'] else 'Mês')
+                st.plotly_chart(fig_cohorts, use_container_width=True)
+            else:
+                st.info("Nenhuma conquista associada às coortes de jogadores.")
+
+        if cohorts['bibliotecas'] is not None:
+            st.subheader("Tamanho Médio da Biblioteca por Coorte")
+            fig_cohort_libraries = px.bar(cohorts['bibliotecas'], x='coorte', y='media_jogos', hover_data=['jogadores'],
+                                          labels={'coorte': 'Coorte', 'media_jogos': 'Jogos por Jogador', 'jogadores': 'Jogadores'})
+            st.plotly_chart(fig_cohort_libraries, use_container_width=True)
+
 # --- Tab 7: Informações Adicionais (Pode ser removida se não for usada) ---
 with tab7:
     st.header("Informações Adicionais")
@@ -626,4 +689,10 @@ st.sidebar.markdown("---")
 st.sidebar.info(
     "Este dashboard interativo permite explorar dados de jogos, incluindo tendências de lançamento, "
     "preferências de gênero, atividades de desenvolvedores e distribuição de preços."
-)
\ No newline at end of file
+)
+
+# Painel de depuração (só aparece com a instrumentação ativa)
+instrumentacao.renderizar_painel_sidebar()
+
+metricas.DURACAO_RERUN.observar(time.perf_counter() - inicio_rerun)
+metricas.exportar_arquivo()
@@ -0,0 +1,302 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+import configuracao
+import instrumentacao
+import pipeline_dados
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.dataset
+except ImportError:  # dependência opcional: sem ela o dashboard usa o motor pandas
+    pyarrow = None
+
+# --- Dataset pré-processado particionado em disco (opcional, DASH_MOTOR=particionado) ---
+# O df principal é gravado uma vez como Parquet particionado no estilo hive
+# (platform=<p>/release_year=<a>/parte-0.parquet), com um manifesto JSON que guarda, por arquivo,
+# os valores da partição, o número de linhas, mínimos/máximos de algumas colunas e quais gêneros
+# aparecem em cada período. Os filtros globais consultam só o manifesto para descartar partições
+# (plataforma, faixa de anos, períodos e gêneros) e leem apenas os arquivos restantes; o range
+# dinâmico do slider também sai do manifesto. O df principal nunca é carregado por inteiro
+# (modo de pouca memória). Mesmo contrato de pipeline_dados (load_and_preprocess_data /
+# apply_all_global_filters), com as mesmas saídas: a filtragem linha a linha continua sendo a
+# de pipeline_dados, aplicada só às partições lidas.
+
+COLUNAS_PARTICAO = ['platform', 'release_year']
+COLUNAS_ESTATISTICAS = ['release_month', 'preco_dolar', 'preco_euro']
+COLUNA_INDICE = '__indice'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+VERSAO_FORMATO = 1
+SEPARADOR_GENEROS = '\x1f'
+
+
+def disponivel():
+    return pyarrow is not None
+
+
+def _exigir_pyarrow():
+    if pyarrow is None:
+        raise ImportError("O dataset particionado precisa do pacote pyarrow (pip install pyarrow).")
+
+
+def _valor_json(valor):
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+# --- Gravação ---
+def gravar_dataset(df_main, pasta, min_overall_year, max_overall_year, assinatura=None):
+    """Grava o df principal particionado em `pasta`; o manifesto é escrito por último (atomicamente)."""
+    _exigir_pyarrow()
+    arquivos = []
+    with instrumentacao.etapa('gravar_particoes', linhas=len(df_main)):
+        for (plataforma, ano), grupo in df_main.groupby(COLUNAS_PARTICAO, sort=True):
+            relativo = os.path.join(f'platform={quote(str(plataforma), safe="")}', f'release_year={int(ano)}',
+                                    'parte-0.parquet')
+            caminho = os.path.join(pasta, relativo)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+            # As colunas da partição ficam só no caminho (e no manifesto), como no layout hive
+            tabela = grupo.drop(columns=COLUNAS_PARTICAO).rename_axis(COLUNA_INDICE).reset_index()
+            tabela['genre_list'] = tabela['genre_list'].map(list)
+            tabela.to_parquet(caminho, index=False)
+
+            explodido = grupo[['periodo', 'genre_list']].explode('genre_list')
+            arquivos.append({
+                'caminho': relativo,
+                'platform': plataforma,
+                'release_year': int(ano),
+                'linhas': len(grupo),
+                'bytes': os.path.getsize(caminho),
+                'min': {coluna: _valor_json(grupo[coluna].min()) for coluna in COLUNAS_ESTATISTICAS},
+                'max': {coluna: _valor_json(grupo[coluna].max()) for coluna in COLUNAS_ESTATISTICAS},
+                'generos_por_periodo': {
+                    periodo: sorted(generos.unique().tolist())
+                    for periodo, generos in explodido.groupby('periodo')['genre_list']
+                },
+            })
+
+    manifesto = {
+        'versao_formato': VERSAO_FORMATO,
+        'assinatura': assinatura,
+        'colunas': list(df_main.columns),
+        'tipos': {coluna: str(tipo) for coluna, tipo in df_main.dtypes.items()},
+        'linhas': len(df_main),
+        'min_year': int(min_overall_year),
+        'max_year': int(max_overall_year),
+        'arquivos': arquivos,
+    }
+    temporario = os.path.join(pasta, f'{ARQUIVO_MANIFESTO}.{os.getpid()}.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+    os.replace(temporario, os.path.join(pasta, ARQUIVO_MANIFESTO))
+    return manifesto
+
+
+def _resumo(valor):
+    return hashlib.sha1(json.dumps(valor, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def _pasta_versao(caminho_csv):
+    """(pasta do CSV, chave da versão atual, assinatura): uma subpasta por versão do arquivo."""
+    assinatura = configuracao.assinatura_arquivo(caminho_csv)
+    return configuracao.pasta_cache('particionado', _resumo(assinatura['caminho'])), _resumo(assinatura), assinatura
+
+
+def abrir(caminho_csv=pipeline_dados.CAMINHO_DADOS, remover_anteriores=True):
+    """DatasetParticionado do CSV, gravando-o (a partir do pipeline pandas) se o CSV mudou ou é novo.
+
+    Sem `remover_anteriores` (recarga a quente), as versões anteriores ficam até serem liberadas.
+    """
+    _exigir_pyarrow()
+    if not os.path.exists(caminho_csv):
+        raise FileNotFoundError(caminho_csv)
+    raiz, chave, assinatura = _pasta_versao(caminho_csv)
+    pasta = os.path.join(raiz, chave)
+    if not os.path.exists(os.path.join(pasta, ARQUIVO_MANIFESTO)):
+        shutil.rmtree(pasta, ignore_errors=True)
+        df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho_csv)
+        gravar_dataset(df_main, pasta, min_year, max_year, assinatura)
+        del df_main
+    # Versões anteriores do mesmo CSV não são mais usadas (inclusive as que uma recarga deixou)
+    if remover_anteriores:
+        for outra in os.listdir(raiz):
+            if outra != chave:
+                shutil.rmtree(os.path.join(raiz, outra), ignore_errors=True)
+    return DatasetParticionado(pasta)
+
+
+# --- Leitura com poda de partições ---
+PARTICIONAMENTO_HIVE = pyarrow.dataset.partitioning(
+    pyarrow.schema([('platform', pyarrow.string()), ('release_year', pyarrow.int64())]), flavor='hive'
+) if pyarrow is not None else None
+
+
+def _tuplas_generos(listas):
+    """genre_list (lista do Arrow) como array de tuplas, uma tupla por combinação distinta de gêneros."""
+    chaves = pyarrow.compute.binary_join(listas, SEPARADOR_GENEROS).combine_chunks().dictionary_encode()
+    tabela_tuplas = np.empty(len(chaves.dictionary), dtype=object)
+    tabela_tuplas[:] = [tuple(chave.split(SEPARADOR_GENEROS)) for chave in chaves.dictionary.to_pylist()]
+    return tabela_tuplas[chaves.indices.to_numpy()]
+
+
+class DatasetParticionado:
+    """Manifesto de um dataset gravado; lê só os arquivos das partições selecionadas."""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        with open(os.path.join(pasta, ARQUIVO_MANIFESTO), encoding='utf-8') as arquivo:
+            self.manifesto = json.load(arquivo)
+        self.arquivos = self.manifesto['arquivos']
+
+    def __reduce__(self):
+        # A pasta identifica a versão gravada: é o que o st.cache_data guarda (pickle) e usa no hash
+        return DatasetParticionado, (self.pasta,)
+
+    def __len__(self):
+        return self.manifesto['linhas']
+
+    def selecionar(self, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter=None):
+        """Arquivos que podem ter linhas que passam nos filtros (pelas estatísticas do manifesto)."""
+        periodos = set(pandemic_periods_filter or ())
+        generos = set(genre_filter) if genre_filter and 'Todos' not in genre_filter else None
+        selecionados = []
+        for arquivo in self.arquivos:
+            if platform_filter != 'Todas' and arquivo['platform'] != platform_filter:
+                continue
+            if current_years_filter is not None and \
+                    not current_years_filter[0] <= arquivo['release_year'] <= current_years_filter[1]:
+                continue
+            # Precisa existir, no mesmo período, algum gênero selecionado (a mesma linha pode ter os dois)
+            if not any(periodo in periodos and (generos is None or generos.intersection(generos_periodo))
+                       for periodo, generos_periodo in arquivo['generos_por_periodo'].items()):
+                continue
+            selecionados.append(arquivo)
+        return selecionados
+
+    def ler(self, arquivos):
+        """DataFrame no formato do df principal (colunas, tipos, índice e ordem) com as linhas dos arquivos."""
+        if not arquivos:
+            return pd.DataFrame({
+                coluna: pd.Series(dtype=tipo if coluna != 'genre_list' else object)
+                for coluna, tipo in self.manifesto['tipos'].items()
+            })
+        # Uma leitura só (em várias threads) dos arquivos escolhidos; platform e release_year vêm do caminho
+        dataset = pyarrow.dataset.dataset(
+            [os.path.join(self.pasta, arquivo['caminho']) for arquivo in arquivos], format='parquet',
+            partitioning=PARTICIONAMENTO_HIVE, partition_base_dir=self.pasta,
+        )
+        tabela = dataset.to_table()
+        generos = tabela['genre_list']
+        df = tabela.drop_columns(['genre_list']).to_pandas()
+        df['genre_list'] = _tuplas_generos(generos)
+        df = df.set_index(COLUNA_INDICE).sort_index()
+        df.index.name = None
+        return df[self.manifesto['colunas']]
+
+    def intervalo_anos(self, platform_filter, genre_filter, pandemic_periods_filter):
+        """Anos mínimo e máximo das partições que passam nos filtros (sem o de ano), ou None."""
+        anos = [arquivo['release_year'] for arquivo in
+                self.selecionar(platform_filter, genre_filter, pandemic_periods_filter)]
+        return (min(anos), max(anos)) if anos else None
+
+
+def load_and_preprocess_data(caminho=pipeline_dados.CAMINHO_DADOS, remover_anteriores=True):
+    """Abre (gravando na primeira vez) o dataset particionado; devolve (dataset, ano mínimo, ano máximo).
+
+    Levanta FileNotFoundError se o CSV não existir (o dashboard mostra o erro ao usuário).
+    """
+    dataset = abrir(caminho, remover_anteriores)
+    return dataset, dataset.manifesto['min_year'], dataset.manifesto['max_year']
+
+
+def apply_all_global_filters(df_base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                             min_overall_year, max_overall_year):
+    """Mesmo contrato de pipeline_dados.apply_all_global_filters, com `df_base` sendo um DatasetParticionado."""
+    if not pandemic_periods_filter:
+        return pd.DataFrame(), pd.DataFrame(), None, None
+
+    intervalo = df_base.intervalo_anos(platform_filter, genre_filter, pandemic_periods_filter)
+    dynamic_min_year_calculated, dynamic_max_year_calculated = intervalo or (min_overall_year, max_overall_year)
+
+    with instrumentacao.etapa('ler_particoes') as medida:
+        arquivos = df_base.selecionar(platform_filter, genre_filter, pandemic_periods_filter, current_years_filter)
+        df_lido = df_base.ler(arquivos)
+        medida.linhas = len(df_lido)
+
+    # As partições lidas ainda podem ter linhas de outros períodos/gêneros: filtro linha a linha do pipeline
+    df_filtered, df_genres_exploded_filtered, _, _ = pipeline_dados.apply_all_global_filters(
+        df_lido, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+        min_overall_year, max_overall_year
+    )
+    return df_filtered, df_genres_exploded_filtered, dynamic_min_year_calculated, dynamic_max_year_calculated
+
+
+def plataformas(df_main):
+    """Plataformas únicas, ordenadas, para o selectbox de plataforma."""
+    return sorted({arquivo['platform'] for arquivo in df_main.arquivos})
+
+
+def all_genres(df_main):
+    """Gêneros únicos do dataset, para o multiselect de gênero."""
+    return sorted({genero for arquivo in df_main.arquivos
+                   for generos in arquivo['generos_por_periodo'].values() for genero in generos})
+
+
+# --- Conferência contra o pipeline pandas e fração lida ---
+def conferir(caminho_csv):
+    """Compara as saídas com pipeline_dados em alguns filtros; devolve [(filtros, arquivos lidos, linhas lidas)]."""
+    dataset, min_year, max_year = load_and_preprocess_data(caminho_csv)
+    df_main, _, _ = pipeline_dados.load_and_preprocess_data(caminho_csv)
+    assert plataformas(dataset) == pipeline_dados.plataformas(df_main)
+    assert all_genres(dataset) == pipeline_dados.all_genres(df_main)
+
+    plataforma = df_main['platform'].value_counts().index[0]
+    generos = pipeline_dados.all_genres(df_main)
+    cenarios = [
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year)),
+        (plataforma, ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (max_year - 4, max_year)),
+        (plataforma, generos[:2], ['Pandemia', 'Pós-Pandemia'], (max_year - 4, max_year)),
+        ('Todas', generos[-1:], ['Pré-Pandemia'], (min_year, max_year)),
+        ('Todas', ['Todos'], [], (min_year, max_year)),
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (max_year + 1, max_year + 2)),
+    ]
+    leituras = []
+    for filtros in cenarios:
+        esperado = pipeline_dados.apply_all_global_filters(df_main, *filtros, min_year, max_year)
+        obtido = apply_all_global_filters(dataset, *filtros, min_year, max_year)
+        assert obtido[2:] == esperado[2:], f'{filtros}: anos dinâmicos {obtido[2:]} != {esperado[2:]}'
+        for df_obtido, df_esperado in zip(obtido[:2], esperado[:2]):
+            if df_esperado.empty:
+                assert df_obtido.empty, f'{filtros}: esperado DataFrame vazio'
+            else:
+                pd.testing.assert_frame_equal(df_obtido, df_esperado)
+        arquivos = dataset.selecionar(*filtros) if filtros[2] else []
+        leituras.append((filtros, len(arquivos), sum(arquivo['linhas'] for arquivo in arquivos)))
+    return dataset, leituras
+
+
+if __name__ == '__main__':
+    import dados_sinteticos
+
+    parser = argparse.ArgumentParser(description='Grava o dataset particionado e confere contra o pipeline pandas.')
+    parser.add_argument('csv', nargs='?', help='CSV no formato do DB_completo (padrão: dataset sintético).')
+    parser.add_argument('--linhas', type=int, default=100_000, help='Tamanho do dataset sintético.')
+    args = parser.parse_args()
+
+    caminho = args.csv or dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    inicio = time.perf_counter()
+    dataset, leituras = conferir(caminho)
+    print(f'{len(dataset.arquivos)} partições, {len(dataset)} linhas em {dataset.pasta} '
+          f'({time.perf_counter() - inicio:.1f}s com a conferência).')
+    print('Saídas idênticas às do pipeline pandas.')
+    for filtros, n_arquivos, n_linhas in leituras:
+        print(f'{n_arquivos:>5} arquivos {n_linhas:>9} linhas ({n_linhas / max(len(dataset), 1):6.1%})  {filtros}')
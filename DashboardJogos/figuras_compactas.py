@@ -0,0 +1,95 @@
+import argparse
+
+import numpy as np
+import plotly.io as pio
+
+# --- Pós-processamento das figuras antes do st.plotly_chart (payload menor no navegador) ---
+# O Plotly (6+) já serializa arrays NumPy como typed arrays (base64 binário com dtype), mas só
+# arrays NumPy: listas e tuplas vão como listas JSON, e float64 ocupa o dobro do necessário para
+# desenhar. Aqui, em cada traço:
+# - x/y/z numéricos viram arrays NumPy, float64 rebaixado para float32 (inteiros o Plotly já
+#   reduz ao menor dtype que cabe), e seguem como typed arrays;
+# - hovertext/text iguais em todos os pontos (ex.: hover_name da cor no gráfico 9) viram um valor
+#   só, em vez de uma string repetida por ponto.
+# Os gráficos de linhas são por ano (algumas dezenas de pontos por traço), tamanho em que o SVG
+# desenha tão rápido quanto o WebGL (Scattergl), que ainda gastaria um contexto WebGL do navegador
+# por gráfico: os traços ficam no tipo original.
+# O corte no número de séries (o resto vira "Outros") é feito antes, nos dados: ver
+# registro_graficos._agrupar_outros.
+
+EIXOS_NUMERICOS = ('x', 'y', 'z')
+TEXTOS_POR_PONTO = ('hovertext', 'text')
+
+
+def _rebaixar(valores):
+    """Array NumPy compacto para valores numéricos (float64 -> float32); None para os demais."""
+    if valores is None or isinstance(valores, str):
+        return None
+    array = np.asarray(valores)
+    if array.dtype.kind == 'f':
+        return array.astype(np.float32)
+    if array.dtype.kind in 'iub':
+        return array
+    return None
+
+
+def _valor_unico(valores):
+    """O valor quando todos os pontos têm o mesmo (texto por ponto redundante); None caso contrário."""
+    if valores is None or isinstance(valores, str) or len(valores) == 0:
+        return None
+    primeiro = valores[0]
+    if isinstance(primeiro, str) and all(valor == primeiro for valor in valores):
+        return primeiro
+    return None
+
+
+def compactar(fig):
+    """Compacta os traços da figura (no lugar) e a devolve."""
+    for traco in fig.data:
+        for eixo in EIXOS_NUMERICOS:
+            if eixo in traco:
+                compacto = _rebaixar(traco[eixo])
+                if compacto is not None:
+                    traco[eixo] = compacto
+        for propriedade in TEXTOS_POR_PONTO:
+            if propriedade in traco:
+                unico = _valor_unico(traco[propriedade])
+                if unico is not None:
+                    traco[propriedade] = unico
+    return fig
+
+
+def tamanho_json(fig):
+    """Bytes do JSON que o st.plotly_chart envia ao navegador."""
+    return len(pio.to_json(fig, validate=False).encode())
+
+
+if __name__ == '__main__':
+    import configuracao
+    import dados_sinteticos
+    import pipeline_dados
+    import registro_graficos
+
+    parser = argparse.ArgumentParser(
+        description='Compara o tamanho das figuras antes e depois da compactação (DASH_MAX_SERIES).'
+    )
+    parser.add_argument('--linhas', type=int, default=200_000, help='Tamanho do dataset sintético.')
+    args = parser.parse_args()
+
+    caminho = dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho)
+    df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(
+        df_main, 'Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year), min_year, max_year
+    )
+    resultados = registro_graficos.ResultadosPlano(registro_graficos.PLANO, {'jogo': df_games, 'genero': df_genres})
+    total_original = total_compacto = 0
+    for id_grafico in registro_graficos.GRAFICOS:
+        df = resultados.obter(id_grafico)
+        original = registro_graficos.figura(id_grafico, df, compacta=False)
+        compacta = registro_graficos.figura(id_grafico, df)
+        tamanho_original, tamanho_compacto = tamanho_json(original), tamanho_json(compacta)
+        total_original += tamanho_original
+        total_compacto += tamanho_compacto
+        print(f'{id_grafico:<22} {len(original.data):>3} traço(s) {tamanho_original / 1024:8.1f} KiB -> '
+              f'{len(compacta.data):>3} traço(s) {tamanho_compacto / 1024:8.1f} KiB')
+    print(f'{"total":<22} {total_original / 1024:21.1f} KiB -> {total_compacto / 1024:21.1f} KiB')
@@ -0,0 +1,187 @@
+import argparse
+import itertools
+import threading
+import time
+import traceback
+import weakref
+
+import configuracao
+import metricas
+
+# --- Recarga do dataset sem reiniciar o servidor: versões imutáveis trocadas de uma vez ---
+# O gerenciador carrega o dataset (o que o `carregar` do dashboard devolver: df principal, cubo,
+# banco DuckDB...) numa VersaoDataset numerada. Uma thread de fundo consulta a assinatura do
+# arquivo de origem (caminho, mtime e tamanho) a cada `intervalo` segundos; quando ela muda e
+# fica igual em duas consultas seguidas (o arquivo terminou de ser gravado), a nova versão é
+# construída na própria thread e só então substitui a atual, numa única atribuição. Cada rerun
+# pega a versão atual uma vez, no início, e usa só ela até o fim: reruns em andamento terminam na
+# versão antiga, os seguintes já veem a nova. O número da versão entra nas chaves dos caches do
+# dashboard. A versão antiga é liberada (com o `liberar` do carregador, ex.: fechar o banco ou
+# apagar os arquivos dela) quando deixa de ser referenciada, isto é, quando o último rerun que a
+# usava termina e os caches que a guardavam a descartam. Se a carga falhar, a versão atual segue
+# valendo e a mesma assinatura não é tentada de novo. Com `aquecer` (pré-aquecimento dos caches do
+# dashboard, ver aquecimento), a thread aquece a primeira versão assim que inicia (logo depois da
+# carga inicial) e cada versão nova antes da troca, de modo que o primeiro rerun depois dela já
+# encontra os caches prontos.
+
+_numeros = itertools.count(1)
+
+
+class VersaoDataset:
+    """Uma versão carregada do dataset: número (crescente no processo), assinatura da origem e dados."""
+
+    def __init__(self, assinatura, dados):
+        self.numero = next(_numeros)
+        self.assinatura = assinatura
+        self.dados = dados
+        self.carregada_em = time.time()
+
+    def __repr__(self):
+        return f'VersaoDataset({self.numero}, {self.assinatura})'
+
+
+class GerenciadorDataset:
+    """Versão atual do dataset de `caminho`, recarregada em segundo plano quando o arquivo muda.
+
+    - carregar(caminho, inicial): devolve os dados de uma versão; `inicial` é True só na primeira
+      carga do processo (quando nenhuma sessão usa versões anteriores).
+    - liberar(dados): opcional, chamada quando uma versão substituída deixa de ser referenciada.
+    - aquecer(versao): opcional, chamada na thread de fundo com a primeira versão e com cada
+      versão nova antes de ela virar a atual; falhas só são registradas.
+    """
+
+    def __init__(self, caminho, carregar, liberar=None, intervalo=None, aquecer=None):
+        self.caminho = caminho
+        self.carregar = carregar
+        self.liberar = liberar
+        self.aquecer = aquecer
+        self.intervalo = configuracao.INTERVALO_RECARGA if intervalo is None else intervalo
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._falhou = None
+        self._atual = self._construir(configuracao.assinatura_arquivo(caminho), inicial=True)
+
+    def atual(self):
+        """Versão atual; o rerun deve guardá-la e usá-la até o fim."""
+        return self._atual
+
+    def _construir(self, assinatura, inicial=False):
+        with metricas.DURACAO_CARGA.cronometrar():
+            versao = VersaoDataset(assinatura, self.carregar(self.caminho, inicial))
+        if self.liberar is not None:
+            # O finalizador guarda os dados (não a versão): eles vivem até a versão ser coletada. Na
+            # saída do processo não libera (a versão atual é reaproveitada na próxima inicialização)
+            weakref.finalize(versao, self.liberar, versao.dados).atexit = False
+        return versao
+
+    def recarregar(self, assinatura=None):
+        """Constrói a versão do arquivo atual e troca a referência; devolve a nova versão.
+
+        Recargas simultâneas são serializadas; a troca é uma atribuição (leitores veem a versão
+        antiga ou a nova, nunca um estado intermediário).
+        """
+        with self._trava:
+            assinatura = assinatura or configuracao.assinatura_arquivo(self.caminho)
+            try:
+                nova = self._construir(assinatura)
+            except Exception:
+                self._falhou = assinatura
+                metricas.RECARGAS_DATASET.incrementar(resultado='erro')
+                raise
+            self._aquecer(nova)
+            self._atual = nova
+            metricas.RECARGAS_DATASET.incrementar(resultado='ok')
+            return nova
+
+    def _aquecer(self, versao):
+        if self.aquecer is None:
+            return
+        try:
+            self.aquecer(versao)
+        except Exception:
+            traceback.print_exc()
+
+    def _mudou(self, assinatura):
+        return assinatura is not None and assinatura != self._atual.assinatura and assinatura != self._falhou
+
+    def _vigiar(self):
+        self._aquecer(self._atual)
+        if self.intervalo <= 0:
+            return
+        anterior = None
+        while not self._parar.wait(self.intervalo):
+            assinatura = configuracao.assinatura_arquivo(self.caminho)
+            if not self._mudou(assinatura):
+                anterior = None
+                continue
+            # Só recarrega quando duas consultas seguidas veem a mesma assinatura (gravação terminada)
+            if assinatura != anterior:
+                anterior = assinatura
+                continue
+            anterior = None
+            try:
+                self.recarregar(assinatura)
+            except Exception:
+                traceback.print_exc()
+
+    def iniciar(self):
+        """Inicia a thread de fundo: aquece a versão atual e vigia o arquivo (com intervalo 0, só aquece)."""
+        if self._thread is not None or (self.intervalo <= 0 and self.aquecer is None):
+            return self
+        self._thread = threading.Thread(target=self._vigiar, name='recarga-dataset', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == '__main__':
+    import gc
+    import os
+    import shutil
+    import tempfile
+
+    import dados_sinteticos
+    import pipeline_dados
+
+    parser = argparse.ArgumentParser(description='Simula a troca do CSV com o gerenciador vigiando o arquivo.')
+    parser.add_argument('--linhas', type=int, default=20_000, help='Tamanho do dataset sintético.')
+    parser.add_argument('--intervalo', type=float, default=0.2, help='Intervalo entre as consultas ao arquivo (s).')
+    args = parser.parse_args()
+
+    origem = dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, 'DB_completo.csv')
+    shutil.copyfile(origem, caminho)
+    liberadas = []
+
+    def carregar(caminho_csv, inicial):
+        return pipeline_dados.load_and_preprocess_data(caminho_csv)
+
+    gerenciador = GerenciadorDataset(caminho, carregar, liberar=lambda dados: liberadas.append(len(dados[0])),
+                                     intervalo=args.intervalo).iniciar()
+    em_uso = gerenciador.atual()
+    print(f'versão {em_uso.numero}: {len(em_uso.dados[0])} jogos')
+
+    # Novo arquivo com metade das linhas, gravado ao lado e trocado de uma vez (como num deploy)
+    with open(origem, encoding='utf-8') as arquivo:
+        linhas = arquivo.readlines()
+    with open(f'{caminho}.tmp', 'w', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas[:len(linhas) // 2])
+    inicio = time.perf_counter()
+    os.replace(f'{caminho}.tmp', caminho)
+    while gerenciador.atual() is em_uso:
+        time.sleep(0.05)
+    nova = gerenciador.atual()
+    print(f'versão {nova.numero}: {len(nova.dados[0])} jogos, trocada {time.perf_counter() - inicio:.2f}s depois da gravação')
+    print(f'rerun em andamento ainda usa a versão {em_uso.numero} ({len(em_uso.dados[0])} jogos); liberadas: {liberadas}')
+    del em_uso
+    gc.collect()
+    print(f'depois do fim do rerun antigo, liberadas: {liberadas}')
+    gerenciador.parar()
+    shutil.rmtree(pasta)
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+
+import bibliotecas_csr
+import configuracao
+
+# --- Grafo de amizades do Steam (tabela friends) em adjacência CSR ---
+# Os playerids (int64, esparsos) são remapeados para ids contíguos int32. A adjacência é
+# simetrizada (se A lista B como amigo, B também é amigo de A) e guardada em .npy abertos
+# via memmap, como as bibliotecas em bibliotecas_csr. Todas as análises usam operações
+# esparsas (produtos matriz-vetor/matriz-matriz), sem dicionários de conjuntos em Python.
+
+VERSAO_FORMATO = 1
+
+
+class GrafoAmigos:
+    """Grafo não direcionado de amizades com ids remapeados (posição em `player_ids`)."""
+
+    def __init__(self, indptr, indices, player_ids):
+        self.indptr = indptr
+        self.indices = indices
+        self.player_ids = player_ids
+
+    @property
+    def n_nos(self):
+        return len(self.player_ids)
+
+    @property
+    def n_arestas(self):
+        return len(self.indices) // 2
+
+    def matriz(self, dtype=np.float32):
+        """Adjacência como matriz esparsa do scipy (cópia dos arrays mapeados em memória)."""
+        dados = np.ones(len(self.indices), dtype=dtype)
+        return sp.csr_matrix((dados, np.array(self.indices), np.array(self.indptr)),
+                             shape=(self.n_nos, self.n_nos))
+
+    def posicoes_jogadores(self, playerids):
+        """Converte playerids originais em posições do grafo (-1 para jogadores fora do grafo)."""
+        playerids = np.asarray(playerids, dtype=np.int64)
+        posicoes = np.clip(np.searchsorted(self.player_ids, playerids), 0, max(self.n_nos - 1, 0))
+        encontrados = (self.n_nos > 0) & (np.asarray(self.player_ids)[posicoes] == playerids)
+        return np.where(encontrados, posicoes, -1)
+
+    # --- Análises ---
+    def graus(self):
+        return np.diff(self.indptr)
+
+    def distribuicao_graus(self):
+        """Posição k = número de jogadores com exatamente k amigos."""
+        return np.bincount(self.graus())
+
+    def componentes_conexas(self):
+        """Rótulo da componente de cada nó e o tamanho de cada componente."""
+        _, rotulos = csgraph.connected_components(self.matriz(), directed=False)
+        return rotulos, np.bincount(rotulos)
+
+    def alcance_k_saltos(self, k=2, fontes=None, tamanho_bloco=1024):
+        """Quantos jogadores distintos cada fonte alcança em até k saltos (sem contar a própria fonte).
+
+        As fontes são processadas em blocos: a fronteira de cada bloco é uma matriz esparsa
+        (fontes x nós) expandida k vezes por produto com a adjacência.
+        """
+        adjacencia = self.matriz(dtype=np.int8).astype(bool)
+        fontes = np.arange(self.n_nos) if fontes is None else np.asarray(fontes)
+        alcance = np.zeros(len(fontes), dtype=np.int64)
+        for inicio in range(0, len(fontes), tamanho_bloco):
+            bloco = fontes[inicio:inicio + tamanho_bloco]
+            n_bloco = len(bloco)
+            visitados = sp.csr_matrix((np.ones(n_bloco, dtype=bool), (np.arange(n_bloco), bloco)),
+                                      shape=(n_bloco, self.n_nos))
+            fronteira = visitados
+            for _ in range(k):
+                fronteira = (fronteira @ adjacencia).astype(bool)
+                # Mantém na fronteira só os nós ainda não visitados
+                fronteira = (fronteira > visitados).tocsr()
+                fronteira.eliminate_zeros()
+                if fronteira.nnz == 0:
+                    break
+                visitados = (visitados + fronteira).astype(bool).tocsr()
+            alcance[inicio:inicio + n_bloco] = np.diff(visitados.indptr) - 1
+        return alcance
+
+    def afinidade_generos_amigos(self, bibliotecas, mascaras_generos, nomes_generos):
+        """Compara a participação de cada gênero na biblioteca do jogador com a média dos seus amigos.
+
+        Retorna, por gênero: participação média própria, participação média entre amigos e a
+        correlação entre as duas (homofilia: amigos tendem a ter bibliotecas parecidas?).
+        """
+        n_generos = len(nomes_generos)
+        contagens = bibliotecas.player_genre_counts(mascaras_generos, n_generos).astype(np.float32)
+        totais = contagens.sum(axis=1, keepdims=True)
+        participacao_biblioteca = np.divide(contagens, totais, out=np.zeros_like(contagens), where=totais > 0)
+
+        # Alinha as bibliotecas aos nós do grafo (jogadores sem biblioteca ficam com zeros)
+        posicoes = self.posicoes_jogadores(bibliotecas.player_ids)
+        no_grafo = posicoes >= 0
+        participacao = np.zeros((self.n_nos, n_generos), dtype=np.float32)
+        participacao[posicoes[no_grafo]] = participacao_biblioteca[no_grafo]
+        tem_biblioteca = np.zeros(self.n_nos, dtype=np.float32)
+        tem_biblioteca[posicoes[no_grafo]] = (totais[no_grafo, 0] > 0)
+
+        # Média entre os amigos que têm biblioteca: (A @ S) / (A @ 1_biblioteca)
+        adjacencia = self.matriz()
+        soma_amigos = adjacencia @ participacao
+        amigos_com_biblioteca = adjacencia @ tem_biblioteca
+        validos = (tem_biblioteca > 0) & (amigos_com_biblioteca > 0)
+        proprio = participacao[validos]
+        amigos = soma_amigos[validos] / amigos_com_biblioteca[validos, None]
+
+        proprio_centrado = proprio - proprio.mean(axis=0)
+        amigos_centrado = amigos - amigos.mean(axis=0)
+        denominador = np.sqrt((proprio_centrado ** 2).sum(axis=0) * (amigos_centrado ** 2).sum(axis=0))
+        correlacao = np.divide((proprio_centrado * amigos_centrado).sum(axis=0), denominador,
+                               out=np.full(n_generos, np.nan, dtype=np.float64), where=denominador > 0)
+        return pd.DataFrame({
+            "genre": nomes_generos,
+            "participacao_jogador": proprio.mean(axis=0) if len(proprio) else np.nan,
+            "participacao_amigos": amigos.mean(axis=0) if len(amigos) else np.nan,
+            "correlacao": correlacao,
+            "jogadores": int(validos.sum()),
+        })
+
+    # --- Persistência ---
+    def salvar(self, pasta, metadados=None):
+        # Gravação atômica como a do CSR: sessões com a adjacência anterior aberta via memmap seguem
+        # lendo os arquivos antigos; meta.json vai por último
+        bibliotecas_csr.invalidar(os.path.join(pasta, "meta.json"))
+        for nome in ("indptr", "indices", "player_ids"):
+            bibliotecas_csr.salvar_array(pasta, nome, getattr(self, nome))
+        meta = dict(metadados or {})
+        meta["versao_formato"] = VERSAO_FORMATO
+        bibliotecas_csr.salvar_json(os.path.join(pasta, "meta.json"), meta)
+
+    @classmethod
+    def abrir(cls, pasta):
+        abrir = lambda nome: np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")
+        return cls(abrir("indptr"), abrir("indices"), abrir("player_ids"))
+
+
+def construir_grafo_amigos(caminho_friends, chunksize=200_000):
+    """Lê a tabela friends em blocos e monta a adjacência CSR simétrica com ids int32."""
+    blocos_origem = []
+    blocos_destino = []
+    for bloco in pd.read_csv(caminho_friends, usecols=["playerid", "friends"], chunksize=chunksize):
+        # Linhas sem playerid válido ficam de fora (não viram arestas para um nó fictício)
+        jogadores = pd.to_numeric(bloco["playerid"], errors="coerce")
+        validos = jogadores.notna().to_numpy()
+        tamanhos, amigos = bibliotecas_csr.parse_id_lists(bloco["friends"][validos])
+        blocos_origem.append(np.repeat(jogadores[validos].astype(np.int64).to_numpy(), tamanhos))
+        blocos_destino.append(amigos)
+
+    origem = np.concatenate(blocos_origem) if blocos_origem else np.empty(0, dtype=np.int64)
+    destino = np.concatenate(blocos_destino) if blocos_destino else np.empty(0, dtype=np.int64)
+    del blocos_origem, blocos_destino
+
+    # Remapeia os playerids para 0..n-1 (int32)
+    player_ids, remapeado = np.unique(np.concatenate([origem, destino]), return_inverse=True)
+    if len(player_ids) > bibliotecas_csr.LIMITE_INT32:
+        raise ValueError("Grafo grande demais para ids int32.")
+    remapeado = remapeado.astype(np.int32)
+    origem, destino = remapeado[:len(origem)], remapeado[len(origem):]
+
+    # Simetriza, remove laços e arestas repetidas
+    n_nos = len(player_ids)
+    sem_laco = origem != destino
+    linhas = np.concatenate([origem[sem_laco], destino[sem_laco]])
+    colunas = np.concatenate([destino[sem_laco], origem[sem_laco]])
+    adjacencia = sp.csr_matrix((np.ones(len(linhas), dtype=np.int8), (linhas, colunas)), shape=(n_nos, n_nos))
+    adjacencia.sum_duplicates()
+    adjacencia.sort_indices()
+
+    indptr = adjacencia.indptr.astype(np.int32 if adjacencia.nnz <= bibliotecas_csr.LIMITE_INT32 else np.int64)
+    return GrafoAmigos(indptr, adjacencia.indices.astype(np.int32), player_ids)
+
+
+def carregar_grafo_amigos(plataforma="steam", reconstruir=False):
+    """Abre a adjacência em cache (memmap), reconstruindo-a se a tabela friends mudou."""
+    caminho_friends = configuracao.caminho_tabela(plataforma, "friends")
+    origem = configuracao.assinatura_arquivo(caminho_friends)
+    if origem is None:
+        raise FileNotFoundError(f"Tabela friends não encontrada em '{caminho_friends}'.")
+
+    pasta = configuracao.pasta_cache("amigos", plataforma)
+    caminho_meta = os.path.join(pasta, "meta.json")
+    if not reconstruir and os.path.exists(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        if meta.get("versao_formato") == VERSAO_FORMATO and meta.get("origem") == origem:
+            return GrafoAmigos.abrir(pasta)
+
+    construir_grafo_amigos(caminho_friends).salvar(pasta, {"origem": origem})
+    return GrafoAmigos.abrir(pasta)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula o grafo de amizades (CSR) e resume as análises.")
+    parser.add_argument("--plataforma", default="steam")
+    parser.add_argument("--reconstruir", action="store_true", help="Reconstrói mesmo com o cache válido.")
+    parser.add_argument("--saltos", type=int, default=2, help="Saltos do alcance (amigos de amigos = 2).")
+    parser.add_argument("--amostra", type=int, default=1000, help="Jogadores usados no alcance em k saltos.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    grafo = carregar_grafo_amigos(args.plataforma, args.reconstruir)
+    print(f"Grafo de amizades: {grafo.n_nos} jogadores, {grafo.n_arestas} amizades "
+          f"({time.perf_counter() - inicio:.2f}s).")
+    graus = grafo.graus()
+    if grafo.n_nos:
+        print(f"Amigos por jogador: média {graus.mean():.2f}, mediana {np.median(graus):.0f}, máximo {graus.max()}.")
+    _, tamanhos = grafo.componentes_conexas()
+    if len(tamanhos):
+        print(f"Componentes conexas: {len(tamanhos)} (maior com {tamanhos.max()} jogadores).")
+
+    inicio = time.perf_counter()
+    fontes = np.random.default_rng(0).choice(grafo.n_nos, min(args.amostra, grafo.n_nos), replace=False)
+    alcance = grafo.alcance_k_saltos(args.saltos, fontes)
+    if len(alcance):
+        print(f"Alcance em {args.saltos} saltos ({len(fontes)} jogadores): média {alcance.mean():.1f}, "
+              f"máximo {alcance.max()} ({time.perf_counter() - inicio:.2f}s).")
+
+    # Afinidade de gêneros com os amigos, quando há bibliotecas e a tabela games
+    try:
+        bibliotecas = bibliotecas_csr.carregar_bibliotecas_csr(args.plataforma)
+        mascaras, nomes_generos = bibliotecas_csr.carregar_mascaras_generos(bibliotecas, args.plataforma)
+    except FileNotFoundError as erro:
+        print(f"Afinidade de gêneros não calculada: {erro}")
+    else:
+        afinidade = grafo.afinidade_generos_amigos(bibliotecas, mascaras, nomes_generos)
+        print(afinidade.sort_values("correlacao", ascending=False).head(10).to_string(index=False))
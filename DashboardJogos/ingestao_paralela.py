@@ -0,0 +1,267 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import instrumentacao
+import pipeline_dados
+
+# --- Ingestão paralela do DB_completo (partições de linhas em um pool de processos) ---
+# O CSV é dividido em faixas de bytes alinhadas a fins de linha (fora de aspas). Cada processo lê
+# a sua faixa e aplica as etapas linha a linha do pré-processamento (limpeza ASCII, datas,
+# períodos, preços, gêneros como máscara de bits) e devolve o resultado em um bloco de memória
+# compartilhada: arrays NumPy e, para o texto, bytes UTF-8 separados por \x00. Só metadados
+# pequenos passam por pickle. O processo principal junta os blocos, remove duplicatas (hash da
+# linha bruta, mantendo a primeira ocorrência como o drop_duplicates) e linhas inválidas e monta
+# o mesmo DataFrame de pipeline_dados.preprocess_data.
+
+TAMANHO_MINIMO_PARALELO = 64 * 2 ** 20
+BLOCO_VARREDURA = 64 * 2 ** 20
+PARTICOES_POR_WORKER = 4
+SEPARADOR_TEXTO = '\x00'
+COLUNAS_NUMERICAS_BRUTAS = ['release_year', 'release_month', 'preco_dolar', 'preco_euro']
+CODIGOS_PERIODO = pipeline_dados.PERIODOS_PANDEMIA + ['Desconhecido']
+
+
+# --- Partições ---
+def limites_particoes(caminho, n_particoes):
+    """Faixas [inicio, fim) de bytes com linhas completas (sem cortar campos entre aspas)."""
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+    inicio_dados = len(cabecalho)
+    if tamanho <= inicio_dados:
+        return len(cabecalho), []
+
+    mapa = np.memmap(caminho, dtype=np.uint8, mode='r')
+    alvos = [inicio_dados + (tamanho - inicio_dados) * i // n_particoes for i in range(1, n_particoes)]
+    cortes = [inicio_dados]
+    aspas_antes = 0
+    posicao = inicio_dados
+    for alvo in alvos:
+        if alvo <= cortes[-1]:
+            continue
+        # Paridade de aspas até o alvo: um \n só termina linha se o número de aspas antes dele é par
+        while posicao < alvo:
+            fim = min(posicao + BLOCO_VARREDURA, alvo)
+            aspas_antes += int(np.count_nonzero(mapa[posicao:fim] == ord('"')))
+            posicao = fim
+        corte = None
+        while posicao < tamanho and corte is None:
+            fim = min(posicao + BLOCO_VARREDURA, tamanho)
+            bloco = mapa[posicao:fim]
+            paridade = (aspas_antes + np.cumsum(bloco == ord('"'))) % 2
+            quebras = np.flatnonzero((bloco == ord('\n')) & (paridade == 0))
+            if len(quebras):
+                corte = posicao + int(quebras[0]) + 1
+                aspas_antes += int(np.count_nonzero(bloco[:quebras[0] + 1] == ord('"')))
+                posicao = corte
+            else:
+                aspas_antes += int(np.count_nonzero(bloco == ord('"')))
+                posicao = fim
+        if corte is None or corte >= tamanho:
+            break
+        cortes.append(corte)
+    del mapa
+    cortes.append(tamanho)
+    return len(cabecalho), list(zip(cortes[:-1], cortes[1:]))
+
+
+# --- Trabalho de cada processo ---
+def _hash_linhas_brutas(df):
+    """Hash de cada linha como lida (numéricos normalizados para float, o resto como texto)."""
+    normalizado = pd.DataFrame({
+        coluna: df[coluna].astype('float64') if pd.api.types.is_numeric_dtype(df[coluna]) and df[coluna].dtype != bool
+        else df[coluna].astype(str)
+        for coluna in df.columns
+    })
+    return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+
+def _codificar_texto(serie):
+    nulos = serie.isna().to_numpy()
+    valores = serie.where(~nulos, '').astype(str).tolist()
+    texto = SEPARADOR_TEXTO.join(valores)
+    if texto.count(SEPARADOR_TEXTO) != len(valores) - 1:
+        raise ValueError(f"A coluna '{serie.name}' contém o caractere \\x00; use a ingestão em série.")
+    return np.frombuffer(texto.encode('utf-8'), dtype=np.uint8), nulos
+
+
+def _escrever_memoria_compartilhada(arrays):
+    """Copia os arrays para um único bloco de memória compartilhada; devolve (nome, layout)."""
+    layout = []
+    deslocamento = 0
+    for nome, array in arrays:
+        layout.append((nome, array.dtype.str, array.shape, deslocamento))
+        deslocamento += -(-array.nbytes // 8) * 8
+    bloco = shared_memory.SharedMemory(create=True, size=max(deslocamento, 8))
+    for (nome, dtype, forma, inicio), (_, array) in zip(layout, arrays):
+        np.ndarray(forma, dtype=dtype, buffer=bloco.buf, offset=inicio)[...] = array
+    nome_bloco = bloco.name
+    bloco.close()
+    # O bloco passa a ser do processo principal (que o libera depois de copiar): sem isto o
+    # resource_tracker deste processo tentaria removê-lo ao final
+    resource_tracker.unregister(bloco._name, 'shared_memory')
+    return nome_bloco, layout
+
+
+def processar_particao(caminho, tamanho_cabecalho, inicio, fim):
+    """Lê e pré-processa uma faixa de bytes; devolve o nome do bloco compartilhado e o layout."""
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.read(tamanho_cabecalho)
+        arquivo.seek(inicio)
+        dados = arquivo.read(fim - inicio)
+    df = pd.read_csv(io.BytesIO(cabecalho + dados), dtype={coluna: str for coluna in pipeline_dados.COLUNAS_TEXTO})
+    colunas = list(df.columns)
+    hashes = _hash_linhas_brutas(df)
+
+    pipeline_dados.limpar_textos(df)
+    pipeline_dados.processar_datas(df)
+    pipeline_dados.converter_precos(df)
+    periodo = df['release_date'].apply(pipeline_dados.assign_period_with_dates)
+    validas = df['release_date'].notna() & df['preco_dolar'].notna() & df['preco_euro'].notna()
+
+    # Gêneros como máscara de bits (uma palavra de 64 bits a cada 64 colunas genre_*); a
+    # verdade de cada célula segue o `if row[col]` do pré-processamento em série
+    colunas_generos = [coluna for coluna in df.columns if coluna.startswith('genre_')]
+    mascaras = np.zeros((len(df), max(1, -(-len(colunas_generos) // 64))), dtype=np.uint64)
+    for posicao, coluna in enumerate(colunas_generos):
+        marcados = df[coluna].map(bool).to_numpy(dtype=bool)
+        mascaras[marcados, posicao // 64] |= np.uint64(1) << np.uint64(posicao % 64)
+
+    arrays = [
+        ('hash', hashes),
+        ('validas', validas.to_numpy()),
+        ('release_year', df['release_year'].to_numpy(dtype=np.int64)),
+        ('release_month', df['release_month'].to_numpy(dtype=np.int64)),
+        ('release_date', df['release_date'].to_numpy()),
+        ('preco_dolar', df['preco_dolar'].to_numpy(dtype=np.float64)),
+        ('preco_euro', df['preco_euro'].to_numpy(dtype=np.float64)),
+        ('periodo', pd.Categorical(periodo, categories=CODIGOS_PERIODO).codes.astype(np.int8)),
+        ('generos', mascaras),
+    ]
+    for coluna in pipeline_dados.COLUNAS_TEXTO:
+        texto, nulos = _codificar_texto(df[coluna])
+        arrays += [(f'{coluna}__texto', texto), (f'{coluna}__nulos', nulos)]
+    nome_bloco, layout = _escrever_memoria_compartilhada(arrays)
+    return nome_bloco, layout, colunas, colunas_generos, len(df)
+
+
+# --- Montagem no processo principal ---
+def _ler_memoria_compartilhada(nome_bloco, layout):
+    """Copia os arrays do bloco compartilhado e libera o bloco."""
+    bloco = shared_memory.SharedMemory(name=nome_bloco)
+    try:
+        return {
+            nome: np.ndarray(forma, dtype=dtype, buffer=bloco.buf, offset=inicio).copy()
+            for nome, dtype, forma, inicio in layout
+        }
+    finally:
+        bloco.close()
+        bloco.unlink()
+
+
+def _decodificar_texto(partes, coluna):
+    valores = []
+    for arrays in partes:
+        texto = arrays[f'{coluna}__texto'].tobytes().decode('utf-8')
+        lista = texto.split(SEPARADOR_TEXTO) if len(arrays[f'{coluna}__nulos']) else []
+        valores.extend(np.where(arrays[f'{coluna}__nulos'], None, np.array(lista, dtype=object)))
+    return pd.Series(valores, dtype='str')
+
+
+def montar_dataframe(partes, colunas, colunas_generos):
+    """DataFrame final (mesmas colunas, ordem, índice e tipos do pré-processamento em série)."""
+    def juntar(nome):
+        return np.concatenate([arrays[nome] for arrays in partes])
+
+    hashes = juntar('hash')
+    manter = ~pd.Series(hashes).duplicated().to_numpy() & juntar('validas')
+    posicoes = np.flatnonzero(manter)
+
+    df = pd.DataFrame(index=pd.RangeIndex(len(hashes)))
+    for coluna in colunas:
+        if coluna in pipeline_dados.COLUNAS_TEXTO:
+            df[coluna] = _decodificar_texto(partes, coluna)
+        elif coluna in COLUNAS_NUMERICAS_BRUTAS:
+            df[coluna] = juntar(coluna)
+    mascaras = juntar('generos')
+    for posicao, coluna in enumerate(colunas_generos):
+        df[coluna] = (mascaras[:, posicao // 64] >> np.uint64(posicao % 64)) & np.uint64(1) == 1
+    df = df[colunas].iloc[posicoes]
+
+    # genre_list: uma tupla por combinação distinta de gêneros, não por linha
+    mascaras = mascaras[posicoes]
+    combinacoes, inverso = np.unique(mascaras, axis=0, return_inverse=True)
+    nomes = [coluna.replace('genre_', '') for coluna in colunas_generos]
+    tuplas = [
+        tuple(nome for posicao, nome in enumerate(nomes) if (int(combinacao[posicao // 64]) >> (posicao % 64)) & 1)
+        or ('Desconhecido',)
+        for combinacao in combinacoes
+    ]
+    tabela_tuplas = np.empty(len(tuplas), dtype=object)
+    for posicao, tupla in enumerate(tuplas):
+        tabela_tuplas[posicao] = tupla
+    df['genre_list'] = pd.Series(tabela_tuplas[inverso.ravel()], index=df.index)
+    df['release_date'] = juntar('release_date')[posicoes]
+    df['periodo'] = pd.Series(np.array(CODIGOS_PERIODO, dtype=object)[juntar('periodo')[posicoes]],
+                              index=df.index, dtype='str')
+
+    df['developers'] = df['developers'].fillna('Desconhecido')
+    df['platform'] = df['platform'].fillna('Outra')
+    return df
+
+
+def load_and_preprocess_parallel(caminho, workers=None):
+    """Equivalente paralelo de pipeline_dados.load_and_preprocess_data: (df, ano mínimo, ano máximo)."""
+    workers = workers or os.cpu_count() or 1
+    with instrumentacao.etapa('particoes'):
+        tamanho_cabecalho, faixas = limites_particoes(caminho, workers * PARTICOES_POR_WORKER)
+
+    partes = []
+    with instrumentacao.etapa('processar_particoes') as medida, ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(processar_particao, caminho, tamanho_cabecalho, inicio, fim) for inicio, fim in faixas]
+        erro = None
+        for futuro in futuros:
+            try:
+                nome_bloco, layout, colunas, colunas_generos, _ = futuro.result()
+            except Exception as excecao:
+                erro = erro or excecao
+                continue
+            # Lê (e libera) o bloco mesmo depois de um erro, para não deixar memória compartilhada órfã
+            arrays = _ler_memoria_compartilhada(nome_bloco, layout)
+            if erro is None:
+                partes.append(arrays)
+        if erro is not None:
+            raise erro
+        medida.linhas = sum(len(arrays['hash']) for arrays in partes)
+    if not partes:
+        return pipeline_dados.load_and_preprocess_data(caminho, workers=1)
+
+    with instrumentacao.etapa('montar_dataframe') as medida:
+        df = montar_dataframe(partes, colunas, colunas_generos)
+        medida.linhas = len(df)
+    return df, int(df['release_year'].min()), int(df['release_year'].max())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingestão paralela do DB_completo (compara com a ingestão em série).')
+    parser.add_argument('caminho', nargs='?', default=pipeline_dados.CAMINHO_DADOS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sem-conferencia', action='store_true', help='Não roda a ingestão em série para comparar.')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df_paralelo, ano_min, ano_max = load_and_preprocess_parallel(args.caminho, args.workers)
+    print(f'Paralelo: {len(df_paralelo)} linhas em {time.perf_counter() - inicio:.2f}s (anos {ano_min}-{ano_max}).')
+    if not args.sem_conferencia:
+        inicio = time.perf_counter()
+        df_serie, _, _ = pipeline_dados.load_and_preprocess_data(args.caminho, workers=1)
+        print(f'Em série: {len(df_serie)} linhas em {time.perf_counter() - inicio:.2f}s.')
+        pd.testing.assert_frame_equal(df_paralelo, df_serie)
+        print('Resultados idênticos.')
@@ -0,0 +1,180 @@
+import contextvars
+import json
+import os
+import time
+import tracemalloc
+
+import configuracao
+
+# --- Instrumentação por etapa (tempo, pico de memória e linhas) para depurar reruns lentos ---
+# Ativada pela variável de ambiente DASH_DEBUG=1 (todas as sessões) ou pelo parâmetro de URL
+# ?debug=1 (só a sessão atual). Quando desativada, `etapa()` devolve um objeto nulo
+# compartilhado: o custo é uma leitura de ContextVar por bloco instrumentado.
+# O pico de memória por etapa (tracemalloc) só é medido com DASH_DEBUG_MEMORIA=1, que liga o
+# tracemalloc para o processo inteiro desde a importação: ele encarece todas as alocações de todas
+# as sessões, então um ?debug=1 não o liga. O pico é do processo (reset_peak é global): com sessões
+# ou threads de gráficos rodando ao mesmo tempo, ele inclui as alocações delas e é só indicativo.
+
+ATIVO_POR_AMBIENTE = os.environ.get("DASH_DEBUG", "") == "1"
+MEMORIA = os.environ.get("DASH_DEBUG_MEMORIA", "") == "1"
+ARQUIVO_LOG = os.environ.get("DASH_DEBUG_LOG", os.path.join(configuracao.DIRETORIO_CACHE, "instrumentacao.jsonl"))
+
+if MEMORIA and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_ativo = contextvars.ContextVar("instrumentacao_ativa", default=ATIVO_POR_AMBIENTE)
+_registros = contextvars.ContextVar("instrumentacao_registros", default=None)
+_pilha = contextvars.ContextVar("instrumentacao_pilha", default=())
+
+
+class _EtapaNula:
+    """Usada quando a instrumentação está desligada: não mede nada."""
+
+    linhas = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _EtapaCronometrada:
+    """Com a instrumentação desligada, mas com histograma de métricas: mede só o tempo."""
+
+    def __init__(self, nome, histograma):
+        self.nome = nome
+        self.histograma = histograma
+        self.linhas = None
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self._inicio, grafico=self.nome)
+        return False
+
+
+class _Etapa:
+    def __init__(self, nome, linhas, histograma=None):
+        self.nome = nome
+        self.linhas = linhas
+        self.histograma = histograma
+        self.pico_filhos = 0
+
+    def __enter__(self):
+        self._pilha_anterior = _pilha.get()
+        self._token = _pilha.set(self._pilha_anterior + (self,))
+        if MEMORIA:
+            if self._pilha_anterior:
+                # Preserva no pai o pico observado até aqui antes de zerar o contador
+                pai = self._pilha_anterior[-1]
+                pai.pico_filhos = max(pai.pico_filhos, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._inicio
+        _pilha.reset(self._token)
+        pico_memoria_mb = None
+        if MEMORIA:
+            pico = max(self.pico_filhos, tracemalloc.get_traced_memory()[1])
+            if self._pilha_anterior:
+                pai = self._pilha_anterior[-1]
+                pai.pico_filhos = max(pai.pico_filhos, pico)
+            pico_memoria_mb = max(pico - self._memoria_inicial, 0) / 2 ** 20
+
+        if self.histograma is not None:
+            self.histograma.observar(segundos, grafico=self.nome)
+
+        caminho = "/".join(etapa.nome for etapa in self._pilha_anterior + (self,))
+        registro = {
+            "etapa": caminho,
+            "ms": segundos * 1000,
+            "pico_memoria_mb": pico_memoria_mb,
+            "linhas": self.linhas,
+        }
+        registros = _registros.get()
+        if registros is not None:
+            registros.append(registro)
+        _gravar_log(registro)
+        return False
+
+
+def _gravar_log(registro):
+    try:
+        os.makedirs(os.path.dirname(ARQUIVO_LOG) or ".", exist_ok=True)
+        with open(ARQUIVO_LOG, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(dict(registro, timestamp=time.time(), pid=os.getpid())) + "\n")
+    except OSError:
+        pass
+
+
+def ativa():
+    return _ativo.get()
+
+
+def ativar(valor=True):
+    """Liga/desliga a instrumentação no contexto atual (sessão/rerun); não mexe no tracemalloc."""
+    _ativo.set(valor)
+
+
+def iniciar_rerun(query_params=None):
+    """Chamada no início de cada rerun: decide se a sessão está instrumentada e zera os registros."""
+    valor = ATIVO_POR_AMBIENTE
+    if query_params is not None and query_params.get("debug") == "1":
+        valor = True
+    ativar(valor)
+    _registros.set([] if valor else None)
+    _pilha.set(())
+
+
+def etapa(nome, linhas=None, histograma=None):
+    """Context manager que mede uma etapa; `linhas` pode ser informado depois via `.linhas`.
+
+    Com `histograma` (um metricas.Histograma rotulado por "grafico"), a duração também é
+    observada nas métricas do processo, mesmo com a instrumentação desligada.
+    """
+    if not _ativo.get():
+        return _ETAPA_NULA if histograma is None else _EtapaCronometrada(nome, histograma)
+    return _Etapa(nome, linhas, histograma)
+
+
+def plotly_chart(figura, container=None, **kwargs):
+    """st.plotly_chart medido como sub-etapa (serialização da figura e envio ao front-end).
+
+    `container` (ex.: um st.empty()) recebe o gráfico no lugar do script; desenhar de novo nele substitui o anterior.
+    """
+    import streamlit as st
+
+    with etapa("plotly_chart"):
+        return (container or st).plotly_chart(figura, **kwargs)
+
+
+def registros():
+    """Registros das etapas medidas no rerun atual."""
+    return list(_registros.get() or [])
+
+
+def renderizar_painel_sidebar():
+    """Tabela (ordenável) com as etapas do rerun atual na barra lateral."""
+    if not _ativo.get():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("Depuração: tempos por etapa", expanded=True):
+        colunas = ["etapa", "ms", "pico_memoria_mb", "linhas"] if MEMORIA else ["etapa", "ms", "linhas"]
+        df_etapas = pd.DataFrame(registros(), columns=colunas)
+        st.caption(f"Total medido nas etapas de nível superior: "
+                   f"{df_etapas.loc[~df_etapas['etapa'].str.contains('/'), 'ms'].sum():.1f} ms")
+        st.dataframe(df_etapas.sort_values("ms", ascending=False), hide_index=True, use_container_width=True)
+        st.caption(f"Log em `{ARQUIVO_LOG}`. Etapas dentro de funções em cache só aparecem quando o cache é recalculado.")
+        st.caption("Pico de memória: do processo inteiro (indicativo com sessões simultâneas)." if MEMORIA
+                   else "Pico de memória por etapa: inicie o servidor com DASH_DEBUG_MEMORIA=1.")
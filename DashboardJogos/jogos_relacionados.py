@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import bibliotecas_csr
+import configuracao
+
+# --- "Jogos relacionados": quem tem X também tem Y ---
+# A matriz de co-propriedade jogo x jogo é C = X^T X, onde X é a matriz esparsa jogador x jogo
+# (1 se o jogador possui o jogo). Ela é calculada em blocos de linhas de X^T, em paralelo, e de
+# cada linha guardamos apenas os K vizinhos mais similares (cosseno ou Jaccard). O dashboard
+# consulta os vizinhos de um jogo lendo uma linha dos arrays persistidos: custo O(K).
+
+METRICAS = ("cosseno", "jaccard")
+TAMANHO_BLOCO_PADRAO = 512
+
+# Estado de cada processo do pool (montado uma vez por processo no initializer)
+_matrizes_worker = {}
+
+
+def matriz_jogador_jogo(csr):
+    """Matriz esparsa binária (jogadores x jogos) a partir das bibliotecas em CSR."""
+    # Cópia dos arrays: o scipy ordena os índices no lugar e o memmap é somente leitura
+    dados = np.ones(csr.nnz, dtype=np.float32)
+    matriz = sp.csr_matrix(
+        (dados, np.array(csr.indices), np.array(csr.indptr)),
+        shape=(csr.n_jogadores, csr.n_jogos),
+    )
+    # Jogos repetidos na mesma biblioteca contam uma vez só
+    matriz.sum_duplicates()
+    matriz.data[:] = 1.0
+    return matriz
+
+
+def matriz_coproprietarios(csr):
+    """Matriz jogo x jogo com o número de jogadores que possuem os dois jogos (diagonal = donos)."""
+    x = matriz_jogador_jogo(csr)
+    return (x.T.tocsr() @ x).tocsr()
+
+
+def _preparar_matrizes(csr):
+    x = matriz_jogador_jogo(csr)
+    xt = x.T.tocsr()
+    donos = np.asarray(x.sum(axis=0), dtype=np.float32).ravel()
+    return x, xt, donos
+
+
+def _inicializar_worker(pasta_csr):
+    _matrizes_worker["matrizes"] = _preparar_matrizes(bibliotecas_csr.BibliotecasCSR.abrir(pasta_csr))
+
+
+def _topk_bloco_worker(inicio, fim, k, metrica, min_coproprietarios):
+    x, xt, donos = _matrizes_worker["matrizes"]
+    return inicio, topk_bloco(x, xt, donos, inicio, fim, k, metrica, min_coproprietarios)
+
+
+def topk_bloco(x, xt, donos, inicio, fim, k, metrica="cosseno", min_coproprietarios=1):
+    """Top-K vizinhos das linhas [inicio, fim) da matriz de co-propriedade, sem laços por jogo."""
+    bloco = (xt[inicio:fim] @ x).tocsr()
+    n_linhas = fim - inicio
+    linhas = np.repeat(np.arange(n_linhas, dtype=np.int64), np.diff(bloco.indptr))
+    colunas = bloco.indices.astype(np.int64)
+    coproprietarios = bloco.data
+
+    # Remove o próprio jogo e pares com suporte insuficiente
+    manter = (colunas != linhas + inicio) & (coproprietarios >= min_coproprietarios)
+    linhas, colunas, coproprietarios = linhas[manter], colunas[manter], coproprietarios[manter]
+
+    donos_linha = donos[linhas + inicio]
+    donos_coluna = donos[colunas]
+    if metrica == "cosseno":
+        scores = coproprietarios / np.sqrt(donos_linha * donos_coluna)
+    elif metrica == "jaccard":
+        scores = coproprietarios / (donos_linha + donos_coluna - coproprietarios)
+    else:
+        raise ValueError(f"Métrica desconhecida: '{metrica}'. Use uma de {METRICAS}.")
+
+    # Top-K agrupado: ordena por (linha, -score) e mantém as K primeiras posições de cada linha
+    ordem = np.lexsort((-scores, linhas))
+    linhas_ordenadas = linhas[ordem]
+    inicio_grupo = np.searchsorted(linhas_ordenadas, np.arange(n_linhas))
+    posicao_no_grupo = np.arange(len(ordem)) - inicio_grupo[linhas_ordenadas]
+    selecionados = ordem[posicao_no_grupo < k]
+    posicao_no_grupo = posicao_no_grupo[posicao_no_grupo < k]
+
+    vizinhos = np.full((n_linhas, k), -1, dtype=np.int32)
+    vizinhos_scores = np.zeros((n_linhas, k), dtype=np.float32)
+    vizinhos_co = np.zeros((n_linhas, k), dtype=np.int32)
+    vizinhos[linhas[selecionados], posicao_no_grupo] = colunas[selecionados]
+    vizinhos_scores[linhas[selecionados], posicao_no_grupo] = scores[selecionados]
+    vizinhos_co[linhas[selecionados], posicao_no_grupo] = coproprietarios[selecionados]
+    return vizinhos, vizinhos_scores, vizinhos_co
+
+
+def construir_vizinhos(csr, k=20, metrica="cosseno", min_coproprietarios=1, workers=None,
+                       tamanho_bloco=TAMANHO_BLOCO_PADRAO, pasta_csr=None):
+    """Calcula os K vizinhos de todos os jogos, distribuindo blocos de linhas entre processos.
+
+    Com `pasta_csr` (pasta do CSR em cache) cada processo abre os arrays via memmap em vez de
+    receber cópias serializadas; sem ela, o cálculo roda no processo atual.
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica desconhecida: '{metrica}'. Use uma de {METRICAS}.")
+    n_jogos = csr.n_jogos
+    vizinhos = np.full((n_jogos, k), -1, dtype=np.int32)
+    scores = np.zeros((n_jogos, k), dtype=np.float32)
+    coproprietarios = np.zeros((n_jogos, k), dtype=np.int32)
+    blocos = [(inicio, min(inicio + tamanho_bloco, n_jogos)) for inicio in range(0, n_jogos, tamanho_bloco)]
+
+    def guardar(inicio, resultado):
+        fim = inicio + len(resultado[0])
+        vizinhos[inicio:fim], scores[inicio:fim], coproprietarios[inicio:fim] = resultado
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and pasta_csr is not None and len(blocos) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                 initargs=(pasta_csr,)) as executor:
+            futuros = [
+                executor.submit(_topk_bloco_worker, inicio, fim, k, metrica, min_coproprietarios)
+                for inicio, fim in blocos
+            ]
+            for futuro in futuros:
+                guardar(*futuro.result())
+    else:
+        x, xt, donos = _preparar_matrizes(csr)
+        for inicio, fim in blocos:
+            guardar(inicio, topk_bloco(x, xt, donos, inicio, fim, k, metrica, min_coproprietarios))
+
+    return vizinhos, scores, coproprietarios
+
+
+def _pasta_relacionados(plataforma):
+    return configuracao.pasta_cache("relacionados", plataforma)
+
+
+def gerar_jogos_relacionados(plataforma="steam", k=20, metrica="cosseno", min_coproprietarios=1,
+                             workers=None, salvar_matriz=False):
+    """Calcula e persiste os vizinhos de todos os jogos da plataforma (etapa offline)."""
+    csr = bibliotecas_csr.carregar_bibliotecas_csr(plataforma)
+    pasta_csr = configuracao.pasta_cache("bibliotecas", plataforma)
+    vizinhos, scores, coproprietarios = construir_vizinhos(
+        csr, k=k, metrica=metrica, min_coproprietarios=min_coproprietarios,
+        workers=workers, pasta_csr=pasta_csr,
+    )
+
+    # Mesma gravação atômica do CSR (temporário + os.replace, meta.json por último): sessões com o
+    # índice anterior aberto via memmap seguem lendo os arquivos antigos
+    pasta = _pasta_relacionados(plataforma)
+    caminho_meta = os.path.join(pasta, "meta.json")
+    bibliotecas_csr.invalidar(caminho_meta)
+    bibliotecas_csr.salvar_array(pasta, "vizinhos", vizinhos)
+    bibliotecas_csr.salvar_array(pasta, "scores", scores)
+    bibliotecas_csr.salvar_array(pasta, "coproprietarios", coproprietarios)
+    bibliotecas_csr.salvar_array(pasta, "game_ids", np.asarray(csr.game_ids))
+    if salvar_matriz:
+        caminho_matriz = os.path.join(pasta, "coproprietarios_matriz.npz")
+        with open(f"{caminho_matriz}.{os.getpid()}.tmp", "wb") as arquivo:
+            sp.save_npz(arquivo, matriz_coproprietarios(csr))
+        os.replace(f"{caminho_matriz}.{os.getpid()}.tmp", caminho_matriz)
+    bibliotecas_csr.salvar_json(caminho_meta, {
+        "k": k, "metrica": metrica, "min_coproprietarios": min_coproprietarios, "n_jogos": csr.n_jogos,
+        "origem": bibliotecas_csr.origem_bibliotecas(plataforma),
+    })
+    return IndiceRelacionados.abrir(plataforma)
+
+
+def assinatura_indice(plataforma="steam"):
+    """Identifica o índice em disco e as tabelas de origem atuais (chave de cache do dashboard)."""
+    caminho_meta = os.path.join(_pasta_relacionados(plataforma), "meta.json")
+    return {"indice": configuracao.assinatura_arquivo(caminho_meta), "origem": bibliotecas_csr.origem_bibliotecas(plataforma)}
+
+
+class IndiceRelacionados:
+    """Consulta dos vizinhos pré-calculados de um jogo (arrays abertos via memmap)."""
+
+    def __init__(self, game_ids, vizinhos, scores, coproprietarios, meta):
+        self.game_ids = game_ids
+        self.vizinhos = vizinhos
+        self.scores = scores
+        self.coproprietarios = coproprietarios
+        self.meta = meta
+
+    @classmethod
+    def abrir(cls, plataforma="steam"):
+        """Índice da plataforma; None se ainda não foi calculado ou se as tabelas de origem mudaram
+        depois do cálculo (os vizinhos apontariam para posições de outro catálogo)."""
+        pasta = _pasta_relacionados(plataforma)
+        caminho_meta = os.path.join(pasta, "meta.json")
+        if not os.path.exists(caminho_meta):
+            return None
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        if meta.get("origem") != bibliotecas_csr.origem_bibliotecas(plataforma):
+            return None
+        abrir = lambda nome: np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")
+        return cls(abrir("game_ids"), abrir("vizinhos"), abrir("scores"), abrir("coproprietarios"), meta)
+
+    def relacionados(self, gameid, top=None):
+        """DataFrame (gameid, score, coproprietarios) com os vizinhos do jogo, do mais ao menos similar."""
+        posicao = int(np.searchsorted(self.game_ids, gameid))
+        if posicao >= len(self.game_ids) or self.game_ids[posicao] != gameid:
+            return pd.DataFrame(columns=["gameid", "score", "coproprietarios"])
+        linha = np.asarray(self.vizinhos[posicao][:top])
+        validos = linha >= 0
+        return pd.DataFrame({
+            "gameid": np.asarray(self.game_ids)[linha[validos]],
+            "score": np.asarray(self.scores[posicao][:top])[validos],
+            "coproprietarios": np.asarray(self.coproprietarios[posicao][:top])[validos],
+        })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula os jogos relacionados por co-propriedade.")
+    parser.add_argument("--plataforma", default="steam")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--metrica", choices=METRICAS, default="cosseno")
+    parser.add_argument("--min-coproprietarios", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--salvar-matriz", action="store_true")
+    args = parser.parse_args()
+    indice = gerar_jogos_relacionados(args.plataforma, args.k, args.metrica, args.min_coproprietarios,
+                                      args.workers, args.salvar_matriz)
+    print(f"Vizinhos calculados para {len(indice.game_ids)} jogos ({args.metrica}, K={args.k}).")
@@ -0,0 +1,272 @@
+import bisect
+import contextvars
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Métricas do processo no formato texto do Prometheus ---
+# Contadores e histogramas ficam em memória no processo do Streamlit (compartilhados por todas
+# as sessões/reruns) e são expostos por uma thread HTTP local (DASH_METRICAS_PORTA, ex.: 9464,
+# rota /metrics) e/ou gravados em arquivo ao fim de cada rerun (DASH_METRICAS_ARQUIVO), para o
+# textfile collector do node_exporter. Sem as variáveis, só a coleta em memória acontece.
+
+PORTA_HTTP = os.environ.get("DASH_METRICAS_PORTA")
+ARQUIVO_EXPORTACAO = os.environ.get("DASH_METRICAS_ARQUIVO")
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def rss_atual_bytes():
+    """RSS atual do processo (Linux: /proc/self/statm; outros: pico via getrusage)."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if sys.platform == 'darwin' else maximo * 1024
+
+
+def _formatar_rotulos(nomes, valores, extra=()):
+    pares = list(zip(nomes, valores)) + list(extra)
+    if not pares:
+        return ""
+    conteudo = ",".join(
+        f'{nome}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for nome, valor in pares
+    )
+    return "{" + conteudo + "}"
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def _chave(self, rotulos):
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome}: rótulos esperados {self.rotulos}, recebidos {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def _cabecalho(self):
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    """Contador monotônico, opcionalmente com rótulos."""
+
+    tipo = "counter"
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def valor(self, **rotulos):
+        return self._series.get(self._chave(rotulos), 0)
+
+    def texto(self):
+        linhas = self._cabecalho()
+        with self._trava:
+            series = sorted(self._series.items())
+        for chave, valor in series:
+            linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}")
+        return linhas
+
+
+class Medidor(_Metrica):
+    """Gauge cujo valor é lido de uma função no momento da exportação."""
+
+    tipo = "gauge"
+
+    def __init__(self, nome, descricao, funcao):
+        super().__init__(nome, descricao)
+        self.funcao = funcao
+
+    def texto(self):
+        return self._cabecalho() + [f"{self.nome} {self.funcao()}"]
+
+
+class Histograma(_Metrica):
+    """Histograma com buckets cumulativos (le), soma e contagem por série."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_SEGUNDOS):
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][bisect.bisect_left(self.limites, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def cronometrar(self, **rotulos):
+        """Context manager que observa a duração (segundos) do bloco."""
+        return _Cronometro(self, rotulos)
+
+    def texto(self):
+        linhas = self._cabecalho()
+        with self._trava:
+            series = sorted((chave, [list(serie[0]), serie[1], serie[2]]) for chave, serie in self._series.items())
+        for chave, (buckets, soma, contagem) in series:
+            acumulado = 0
+            for limite, quantidade in zip(self.limites + (float("inf"),), buckets):
+                acumulado += quantidade
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, [('le', le)])} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {contagem}")
+        return linhas
+
+
+class _Cronometro:
+    def __init__(self, histograma, rotulos):
+        self.histograma = histograma
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self._inicio, **self.rotulos)
+        return False
+
+
+# --- Métricas do dashboard ---
+DURACAO_CARGA = Histograma(
+    "dashboard_carga_dados_segundos", "Duração da carga de cada versão do dataset (inicial e recargas).",
+    limites=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+CHAMADAS_CACHE = Contador(
+    "dashboard_cache_chamadas_total", "Chamadas a funções em st.cache_data, por resultado (hit/miss).",
+    ("funcao", "resultado"),
+)
+DURACAO_CACHE = Histograma(
+    "dashboard_cache_chamada_segundos", "Latência das chamadas a funções em st.cache_data, por resultado.",
+    ("funcao", "resultado"),
+)
+DURACAO_GRAFICO = Histograma(
+    "dashboard_grafico_segundos", "Tempo de construção de cada gráfico (agregação, figura e plotly_chart).",
+    ("grafico",),
+)
+DURACAO_RERUN = Histograma("dashboard_rerun_segundos", "Duração total de cada rerun do script.")
+RSS = Medidor("dashboard_processo_rss_bytes", "Memória residente (RSS) do processo.", rss_atual_bytes)
+RECARGAS_DATASET = Contador(
+    "dashboard_recargas_dataset_total", "Recargas do dataset pelo gerenciador_dataset, por resultado (ok/erro).",
+    ("resultado",),
+)
+
+METRICAS = [DURACAO_CARGA, CHAMADAS_CACHE, DURACAO_CACHE, DURACAO_GRAFICO, DURACAO_RERUN, RSS, RECARGAS_DATASET]
+
+
+# --- Hits/misses de st.cache_data ---
+# O st.cache_data não expõe se a chamada foi hit ou miss. `chamada_cache` envolve a chamada e
+# `registrar_miss` é chamada dentro do corpo da função em cache (que só executa em miss).
+_miss_atual = contextvars.ContextVar("metricas_miss_atual", default=None)
+
+
+class _ChamadaCache:
+    def __init__(self, funcao):
+        self.funcao = funcao
+
+    def __enter__(self):
+        self._marcador = []
+        self._token = _miss_atual.set(self._marcador)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._inicio
+        _miss_atual.reset(self._token)
+        resultado = "miss" if self._marcador else "hit"
+        CHAMADAS_CACHE.incrementar(funcao=self.funcao, resultado=resultado)
+        DURACAO_CACHE.observar(segundos, funcao=self.funcao, resultado=resultado)
+        return False
+
+
+def chamada_cache(funcao):
+    """Context manager para a chamada (lado de fora) de uma função em st.cache_data."""
+    return _ChamadaCache(funcao)
+
+
+def registrar_miss():
+    """Marca a chamada em andamento como miss (chamar dentro do corpo da função em cache)."""
+    marcador = _miss_atual.get()
+    if marcador is not None:
+        marcador.append(True)
+
+
+# --- Exportação ---
+def texto_prometheus():
+    """Todas as métricas no formato de exposição texto do Prometheus (versão 0.0.4)."""
+    linhas = []
+    for metrica in METRICAS:
+        linhas.extend(metrica.texto())
+    return "\n".join(linhas) + "\n"
+
+
+def exportar_arquivo(caminho=None):
+    """Grava as métricas em arquivo de forma atômica (escreve em .tmp e renomeia)."""
+    caminho = caminho or ARQUIVO_EXPORTACAO
+    if not caminho:
+        return
+    try:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto_prometheus())
+        os.replace(temporario, caminho)
+    except OSError:
+        pass
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        corpo = texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+_servidor = None
+_trava_servidor = threading.Lock()
+
+
+def iniciar_servidor_http(porta=None, endereco="127.0.0.1"):
+    """Sobe (uma vez por processo) a thread HTTP que serve /metrics. Devolve o servidor ou None."""
+    global _servidor
+    porta = porta if porta is not None else PORTA_HTTP
+    if not porta:
+        return None
+    with _trava_servidor:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((endereco, int(porta)), _HandlerMetricas)
+            except OSError:
+                # Porta ocupada (ex.: outra réplica na mesma máquina): segue sem o endpoint
+                return None
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return _servidor
@@ -0,0 +1,272 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import configuracao
+import instrumentacao
+import pipeline_dados
+
+try:
+    import polars as pl
+except ImportError:  # dependência opcional: sem ela o dashboard usa o motor pandas
+    pl = None
+
+# --- Motor Polars (opcional, DASH_MOTOR=polars) para a carga e os filtros globais ---
+# Mesmo contrato de pipeline_dados: load_and_preprocess_data devolve (df, ano mínimo, ano máximo)
+# e apply_all_global_filters devolve (df filtrado, df explodido por gênero, anos dinâmicos). A
+# diferença é que o df principal fica como DataFrame do Polars e cada etapa é um plano lazy
+# (leitura, deduplicação, limpeza e filtros executados em várias threads pelo Polars); a
+# conversão para pandas acontece só na saída dos filtros, que é o que os gráficos consomem.
+# `python motor_polars.py` confere a saída contra o pipeline pandas e compara os tempos.
+
+COLUNA_INDICE = '__indice'
+VALORES_FALSOS = ['false', '0', '0.0']
+SEPARADOR_GENEROS = '\x1f'
+
+
+def disponivel():
+    return pl is not None
+
+
+def _exigir_polars():
+    if pl is None:
+        raise ImportError("O motor Polars precisa do pacote polars (pip install polars).")
+
+
+def _verdadeiro(coluna, tipo):
+    """Expressão com a verdade de uma célula genre_* como no `if row[col]` do pandas (nulo conta como verdadeiro)."""
+    expressao = pl.col(coluna)
+    if tipo == pl.Boolean:
+        verdade = expressao
+    elif tipo == pl.String:
+        verdade = ~expressao.str.to_lowercase().is_in(VALORES_FALSOS) & (expressao != '')
+    else:
+        verdade = (expressao != 0) & expressao.is_not_nan() if tipo.is_float() else expressao != 0
+    return verdade.fill_null(True)
+
+
+def _numerico(coluna):
+    # Como pd.to_numeric(errors='coerce'): texto inválido vira nulo; NaN também
+    return pl.col(coluna).cast(pl.Float64, strict=False).fill_nan(None)
+
+
+def _data_lancamento():
+    """release_date: primeiro dia do mês, nula quando ano/mês não formam uma data ISO válida."""
+    ano, mes = pl.col('release_year'), pl.col('release_month')
+    validos = ano.is_between(1000, 9999) & mes.is_between(1, 12)
+    return pl.when(validos).then(
+        pl.date(ano.clip(1000, 9999), mes.clip(1, 12), 1).cast(pl.Datetime('us'))
+    ).otherwise(None)
+
+
+def _periodo():
+    data = pl.col('release_date')
+    return pl.when(data < pipeline_dados.PANDEMIC_START_DATE).then(pl.lit('Pré-Pandemia')) \
+             .when(data <= pipeline_dados.PANDEMIC_END_DATE).then(pl.lit('Pandemia')) \
+             .when(data >= pipeline_dados.POST_PANDEMIC_START_DATE).then(pl.lit('Pós-Pandemia')) \
+             .otherwise(pl.lit('Desconhecido'))
+
+
+def plano_preprocessamento(caminho):
+    """LazyFrame com a leitura e todas as etapas de pipeline_dados.preprocess_data."""
+    _exigir_polars()
+    # Esquema inferido sobre o arquivo inteiro (como o read_csv do pandas); texto sempre como String
+    leitura = pl.scan_csv(caminho, infer_schema_length=None,
+                          schema_overrides={coluna: pl.String for coluna in pipeline_dados.COLUNAS_TEXTO})
+    esquema = leitura.collect_schema()
+    colunas = list(esquema.names())
+    colunas_generos = [coluna for coluna in colunas if coluna.startswith('genre_')]
+
+    generos = pl.concat_list([
+        pl.when(_verdadeiro(coluna, esquema[coluna])).then(pl.lit(coluna.replace('genre_', ''))).otherwise(None)
+        for coluna in colunas_generos
+    ]).list.drop_nulls() if colunas_generos else pl.lit([], dtype=pl.List(pl.String))
+
+    return (
+        leitura
+        .with_row_index(COLUNA_INDICE)
+        # drop_duplicates: primeira ocorrência de cada linha, na ordem do arquivo
+        .unique(subset=colunas, keep='first', maintain_order=True)
+        .with_columns(
+            [pl.col(coluna).str.replace_all(r'[^\x00-\x7F]+', '') for coluna in pipeline_dados.COLUNAS_TEXTO]
+            + [pl.when(generos.list.len() > 0).then(generos).otherwise(pl.lit(['Desconhecido'])).alias('genre_list')]
+        )
+        .with_columns(
+            _numerico('release_year').fill_null(0).cast(pl.Int64).alias('release_year'),
+            _numerico('release_month').fill_null(1).cast(pl.Int64).alias('release_month'),
+        )
+        .with_columns(_data_lancamento().alias('release_date'))
+        .filter(pl.col('release_date').is_not_null())
+        .with_columns(
+            _periodo().alias('periodo'),
+            _numerico('preco_dolar').alias('preco_dolar'),
+            _numerico('preco_euro').alias('preco_euro'),
+        )
+        .filter(pl.col('preco_dolar').is_not_null() & pl.col('preco_euro').is_not_null())
+        .with_columns(
+            pl.col('developers').fill_null('Desconhecido'),
+            pl.col('platform').fill_null('Outra'),
+        )
+        .select([COLUNA_INDICE] + colunas + ['genre_list', 'release_date', 'periodo'])
+    )
+
+
+def load_and_preprocess_data(caminho=pipeline_dados.CAMINHO_DADOS):
+    """Carrega e pré-processa o dataset; o df devolvido é um DataFrame do Polars.
+
+    Levanta FileNotFoundError se o CSV não existir (o dashboard mostra o erro ao usuário).
+    """
+    _exigir_polars()
+    with instrumentacao.etapa('polars_preprocessamento') as medida:
+        df = plano_preprocessamento(caminho).collect()
+        medida.linhas = len(df)
+    anos = df.select(pl.col('release_year').min().alias('min'), pl.col('release_year').max().alias('max')).row(0)
+    return df, int(anos[0]), int(anos[1])
+
+
+def _tuplas_generos(serie):
+    """genre_list como array de tuplas, criando uma tupla por combinação distinta de gêneros."""
+    chaves = serie.list.join(SEPARADOR_GENEROS)
+    codigos = (chaves.rank('dense') - 1).cast(pl.Int64).to_numpy()
+    unicas = chaves.unique().sort().to_list()
+    tabela_tuplas = np.empty(len(unicas), dtype=object)
+    tabela_tuplas[:] = [tuple(chave.split(SEPARADOR_GENEROS)) for chave in unicas]
+    return tabela_tuplas[codigos]
+
+
+def para_pandas(df):
+    """Converte para pandas no formato de pipeline_dados (índice original, genre_list como tuplas)."""
+    tem_generos = 'genre_list' in df.columns
+    df_pandas = df.drop(COLUNA_INDICE, 'genre_list', strict=False).to_pandas()
+    df_pandas.index = pd.Index(df[COLUNA_INDICE].to_numpy().astype('int64'))
+    if tem_generos:
+        df_pandas.insert(df.columns.index('genre_list') - 1, 'genre_list', _tuplas_generos(df['genre_list']))
+    return df_pandas
+
+
+def apply_all_global_filters(df_base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                             min_overall_year, max_overall_year):
+    """Mesmo contrato de pipeline_dados.apply_all_global_filters; as saídas são DataFrames do pandas."""
+    consulta = df_base.lazy()
+
+    # 1. Filtrar por Plataforma
+    if platform_filter != 'Todas':
+        consulta = consulta.filter(pl.col('platform') == platform_filter)
+
+    # 2. Filtrar por Período da Pandemia
+    if pandemic_periods_filter:
+        consulta = consulta.filter(pl.col('periodo').is_in(list(pandemic_periods_filter)))
+    else:
+        return pd.DataFrame(), pd.DataFrame(), None, None
+
+    # 3. Filtrar por Gênero (algum gênero do jogo na seleção)
+    if genre_filter and 'Todos' not in genre_filter:
+        consulta = consulta.filter(
+            pl.col('genre_list').list.eval(pl.element().is_in(list(genre_filter))).list.any()
+        )
+
+    # Range dinâmico e linhas filtradas por ano no mesmo collect (o Polars executa os filtros comuns uma vez)
+    min_year_slider, max_year_slider = current_years_filter
+    anos = consulta.select(pl.col('release_year').min().alias('min'), pl.col('release_year').max().alias('max'))
+    filtrado = consulta.filter(pl.col('release_year').is_between(min_year_slider, max_year_slider))
+    with instrumentacao.etapa('polars_filtros') as medida:
+        anos, filtrado = pl.collect_all([anos, filtrado])
+        medida.linhas = len(filtrado)
+
+    dynamic_min_year_calculated, dynamic_max_year_calculated = anos.row(0)
+    if dynamic_min_year_calculated is None:
+        dynamic_min_year_calculated, dynamic_max_year_calculated = min_overall_year, max_overall_year
+
+    with instrumentacao.etapa('polars_para_pandas', linhas=len(filtrado)):
+        df_filtered = para_pandas(filtrado)
+        if len(filtrado):
+            explodido = filtrado.explode('genre_list').rename({'genre_list': 'genre'})
+            df_genres_exploded_filtered = para_pandas(explodido)
+        else:
+            df_genres_exploded_filtered = pd.DataFrame()
+
+    return (df_filtered, df_genres_exploded_filtered,
+            int(dynamic_min_year_calculated), int(dynamic_max_year_calculated))
+
+
+def plataformas(df_main):
+    """Plataformas únicas, ordenadas, para o selectbox de plataforma."""
+    return df_main['platform'].unique().sort().to_list()
+
+
+def all_genres(df_main):
+    """Gêneros únicos do df principal (não do explodido), para o multiselect de gênero."""
+    return df_main['genre_list'].explode().unique().drop_nulls().sort().to_list()
+
+
+# --- Conferência e comparação com o motor pandas ---
+def _cenarios(df_pandas, min_year, max_year):
+    generos = pipeline_dados.all_genres(df_pandas)
+    plataforma = df_pandas['platform'].value_counts().index[0]
+    return [
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year)),
+        ('Todas', generos[:2], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year)),
+        (plataforma, generos[:2], ['Pandemia', 'Pós-Pandemia'], (max_year - 4, max_year)),
+        ('Todas', [], ['Pré-Pandemia'], (min_year, max_year)),
+        ('Todas', ['Todos'], [], (min_year, max_year)),
+        ('Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (max_year + 1, max_year + 2)),
+    ]
+
+
+def _conferir_frames(obtido, esperado):
+    if esperado.empty:
+        assert obtido.empty and list(obtido.columns) == list(esperado.columns), 'esperado DataFrame vazio'
+        return
+    pd.testing.assert_frame_equal(obtido, esperado, check_index_type=False)
+
+
+def comparar_com_pandas(caminho, repeticoes=3):
+    """Confere carga e filtros contra pipeline_dados e devolve os tempos (melhor de N) de cada motor."""
+    _exigir_polars()
+    tempos = {}
+
+    def cronometrar(nome, funcao, *args):
+        melhor, resultado = None, None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao(*args)
+            segundos = time.perf_counter() - inicio
+            melhor = segundos if melhor is None else min(melhor, segundos)
+        tempos[nome] = melhor
+        return resultado
+
+    df_pandas, min_year, max_year = cronometrar('pandas:carga', pipeline_dados.load_and_preprocess_data, caminho)
+    df_polars, min_polars, max_polars = cronometrar('polars:carga', load_and_preprocess_data, caminho)
+    assert (min_polars, max_polars) == (min_year, max_year), 'anos mínimo/máximo diferentes'
+    pd.testing.assert_frame_equal(para_pandas(df_polars), df_pandas, check_index_type=False)
+    assert plataformas(df_polars) == sorted(df_pandas['platform'].unique().tolist())
+    assert all_genres(df_polars) == pipeline_dados.all_genres(df_pandas)
+
+    for posicao, filtros in enumerate(_cenarios(df_pandas, min_year, max_year)):
+        esperado = cronometrar(f'pandas:filtros[{posicao}]', pipeline_dados.apply_all_global_filters,
+                               df_pandas, *filtros, min_year, max_year)
+        obtido = cronometrar(f'polars:filtros[{posicao}]', apply_all_global_filters,
+                             df_polars, *filtros, min_year, max_year)
+        assert obtido[2:] == esperado[2:], f'cenário {posicao}: anos dinâmicos {obtido[2:]} != {esperado[2:]}'
+        _conferir_frames(obtido[0], esperado[0])
+        _conferir_frames(obtido[1], esperado[1])
+    return tempos
+
+
+if __name__ == '__main__':
+    import dados_sinteticos
+
+    parser = argparse.ArgumentParser(description='Confere o motor Polars contra o pandas e compara os tempos.')
+    parser.add_argument('csv', nargs='?', help='CSV no formato do DB_completo (padrão: dataset sintético).')
+    parser.add_argument('--linhas', type=int, default=100_000, help='Tamanho do dataset sintético.')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    caminho = args.csv or dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    tempos = comparar_com_pandas(caminho, args.repeticoes)
+    print('Saídas idênticas às do pipeline pandas.')
+    for etapa in sorted({nome.split(':', 1)[1] for nome in tempos}, key=lambda etapa: (etapa != 'carga', etapa)):
+        pandas_s, polars_s = tempos[f'pandas:{etapa}'], tempos[f'polars:{etapa}']
+        print(f'{etapa:<12} pandas {pandas_s:8.4f}s  polars {polars_s:8.4f}s  ({pandas_s / polars_s:5.1f}x)')
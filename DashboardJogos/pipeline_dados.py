@@ -0,0 +1,193 @@
+import os
+import re
+
+import pandas as pd
+
+import configuracao
+import instrumentacao
+
+# --- Carga, pré-processamento e filtros globais do DB_completo (sem dependência do Streamlit) ---
+# O dashboard envolve estas funções com st.cache_data e cuida das mensagens ao usuário; aqui
+# fica só a lógica de dados, para poder ser usada também pelos benchmarks e scripts offline.
+
+CAMINHO_DADOS = configuracao.CAMINHO_DB_COMPLETO
+
+PERIODOS_PANDEMIA = ['Pré-Pandemia', 'Pandemia', 'Pós-Pandemia']
+COLUNAS_TEXTO = ['title', 'platform', 'developers', 'publishers']
+PANDEMIC_START_DATE = pd.Timestamp('2020-04-01')
+PANDEMIC_END_DATE = pd.Timestamp('2022-03-31')
+POST_PANDEMIC_START_DATE = pd.Timestamp('2022-04-01')
+
+
+def remove_non_ascii(text):
+    """Limpeza de caracteres não ASCII para evitar erros de codificação em gráficos."""
+    if isinstance(text, str):
+        return re.sub(r'[^\x00-\x7F]+', '', text)
+    return text
+
+
+def assign_period_with_dates(date):
+    """Período da pandemia (Pré-Pandemia, Pandemia ou Pós-Pandemia) de uma data de lançamento."""
+    if date < PANDEMIC_START_DATE:
+        return 'Pré-Pandemia'
+    elif PANDEMIC_START_DATE <= date <= PANDEMIC_END_DATE:
+        return 'Pandemia'
+    elif date >= POST_PANDEMIC_START_DATE:
+        return 'Pós-Pandemia'
+    return 'Desconhecido'
+
+
+def limpar_textos(df):
+    """Remove caracteres não ASCII das colunas de texto (no lugar)."""
+    for coluna in COLUNAS_TEXTO:
+        df[coluna] = df[coluna].apply(remove_non_ascii)
+
+
+def processar_datas(df):
+    """Ano/mês numéricos e release_date (NaT quando inválida); não remove linhas."""
+    df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce').fillna(0).astype(int)
+    df['release_month'] = pd.to_numeric(df['release_month'], errors='coerce').fillna(1).astype(int)
+    df['release_date'] = pd.to_datetime(
+        df['release_year'].astype(str) + '-' +
+        df['release_month'].astype(str).str.zfill(2) + '-01',
+        errors='coerce'
+    )
+
+
+def converter_precos(df):
+    """Colunas de preço numéricas (NaN quando inválidas); não remove linhas."""
+    df['preco_dolar'] = pd.to_numeric(df['preco_dolar'], errors='coerce')
+    df['preco_euro'] = pd.to_numeric(df['preco_euro'], errors='coerce')
+
+
+def preprocess_data(df):
+    """Realiza todas as etapas de pré-processamento sobre o DataFrame bruto lido do CSV."""
+    with instrumentacao.etapa('drop_duplicates'):
+        df.drop_duplicates(inplace=True)
+
+    with instrumentacao.etapa('remove_non_ascii', linhas=len(df)):
+        limpar_textos(df)
+
+    with instrumentacao.etapa('genre_list', linhas=len(df)):
+        genre_columns = [col for col in df.columns if col.startswith('genre_')]
+        df['genre_list'] = df.apply( # Renomeado para genre_list para evitar confusão com 'genre' da explosão
+            lambda row: [col.replace('genre_', '') for col in genre_columns if row[col]],
+            axis=1
+        )
+        # Se a lista de gêneros for vazia, atribui ['Desconhecido']
+        df['genre_list'] = df['genre_list'].apply(lambda x: x if x else ['Desconhecido'])
+
+        # Converter a lista de gêneros para tupla para melhorar o hashing do Pandas (útil para cache)
+        df['genre_list'] = df['genre_list'].apply(tuple)
+
+    # Processamento de Datas
+    with instrumentacao.etapa('datas') as medida:
+        processar_datas(df)
+        df.dropna(subset=['release_date'], inplace=True) # Remover linhas com datas inválidas
+        medida.linhas = len(df)
+
+    # Definir Períodos da Pandemia baseando-se nas datas
+    with instrumentacao.etapa('periodo', linhas=len(df)):
+        df['periodo'] = df['release_date'].apply(assign_period_with_dates)
+
+    # Garantir colunas de preço numéricas e preencher NaNs
+    with instrumentacao.etapa('precos') as medida:
+        converter_precos(df)
+        df.dropna(subset=['preco_dolar', 'preco_euro'], inplace=True)
+        medida.linhas = len(df)
+
+    # Corrigir nomes de colunas e preencher NaNs para 'developers' e 'platform'
+    df['developers'] = df['developers'].fillna('Desconhecido')
+    df['platform'] = df['platform'].fillna('Outra')
+
+    # Obter anos mínimo e máximo do dataset completo
+    min_overall_year = int(df['release_year'].min())
+    max_overall_year = int(df['release_year'].max())
+
+    return df, min_overall_year, max_overall_year
+
+
+def load_and_preprocess_data(caminho=CAMINHO_DADOS, workers=None):
+    """Carrega o dataset e realiza todas as etapas de pré-processamento.
+
+    Com mais de um worker (padrão: DASH_INGESTAO_WORKERS) e um CSV grande, usa a ingestão
+    paralela (ingestao_paralela), que devolve o mesmo resultado.
+    Levanta FileNotFoundError se o CSV não existir (o dashboard mostra o erro ao usuário).
+    """
+    workers = configuracao.WORKERS_INGESTAO if workers is None else workers
+    if workers > 1:
+        import ingestao_paralela
+
+        if os.path.getsize(caminho) >= ingestao_paralela.TAMANHO_MINIMO_PARALELO:
+            return ingestao_paralela.load_and_preprocess_parallel(caminho, workers)
+    with instrumentacao.etapa('read_csv') as medida:
+        df = pd.read_csv(caminho)
+        medida.linhas = len(df)
+    return preprocess_data(df)
+
+
+def apply_all_global_filters(df_base, platform_filter, genre_filter, pandemic_periods_filter, current_years_filter,
+                             min_overall_year, max_overall_year):
+    """Aplica os filtros globais (Plataforma, Gênero, Período, Ano) e explode os gêneros.
+
+    Retorna (df filtrado, df explodido por gênero, ano mínimo e máximo dinâmicos antes do filtro de ano).
+    """
+    df_filtered = df_base.copy()
+
+    # 1. Filtrar por Plataforma
+    if platform_filter != 'Todas':
+        df_filtered = df_filtered[df_filtered['platform'] == platform_filter]
+
+    # 2. Filtrar por Período da Pandemia
+    if pandemic_periods_filter:
+        df_filtered = df_filtered[df_filtered['periodo'].isin(pandemic_periods_filter)]
+    else:
+        return pd.DataFrame(), pd.DataFrame(), None, None # Retorna DFs vazios e None para anos
+
+    # 3. Filtrar por Gênero (usando 'genre_list' para jogos com múltiplos gêneros)
+    if genre_filter and 'Todos' not in genre_filter:
+        with instrumentacao.etapa('filtro_genero', linhas=len(df_filtered)):
+            df_filtered = df_filtered[
+                df_filtered['genre_list'].apply(lambda genres_in_row_tuple: any(g_in_row in genre_filter for g_in_row in genres_in_row_tuple))
+            ]
+
+    # Calcular o range de anos dinâmico *APÓS* os filtros de plataforma, gênero e pandemia
+    if not df_filtered.empty:
+        dynamic_min_year_calculated = int(df_filtered['release_year'].min())
+        dynamic_max_year_calculated = int(df_filtered['release_year'].max())
+    else:
+        # Se os filtros anteriores resultarem em DataFrame vazio, use o range geral para o slider
+        dynamic_min_year_calculated = min_overall_year
+        dynamic_max_year_calculated = max_overall_year
+
+    # Aplicar filtro de range de anos
+    min_year_slider, max_year_slider = current_years_filter
+    df_filtered = df_filtered[
+        (df_filtered['release_year'] >= min_year_slider) &
+        (df_filtered['release_year'] <= max_year_slider)
+    ]
+
+    # Agora, e SOMENTE AGORA, explodimos para a versão por gênero se necessário
+    if not df_filtered.empty:
+        with instrumentacao.etapa('explode_generos') as medida:
+            df_genres_exploded_filtered = df_filtered.explode('genre_list')
+            df_genres_exploded_filtered.rename(columns={'genre_list': 'genre'}, inplace=True)
+            medida.linhas = len(df_genres_exploded_filtered)
+    else:
+        df_genres_exploded_filtered = pd.DataFrame() # Retorna DF vazio se o original for vazio
+
+    return df_filtered, df_genres_exploded_filtered, dynamic_min_year_calculated, dynamic_max_year_calculated
+
+
+def plataformas(df_main):
+    """Plataformas únicas do df principal, ordenadas, para o selectbox de plataforma."""
+    return sorted(df_main['platform'].unique().tolist())
+
+
+def all_genres(df_main):
+    """Gêneros únicos do df principal (não do explodido), para o multiselect de gênero."""
+    all_genres_from_main = set()
+    for genres_tuple in df_main['genre_list']:
+        for genre_item in genres_tuple:
+            all_genres_from_main.add(genre_item)
+    return sorted(all_genres_from_main)
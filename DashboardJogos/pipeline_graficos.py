@@ -0,0 +1,117 @@
+import contextvars
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.io as pio
+
+import configuracao
+import instrumentacao
+import metricas
+import registro_graficos
+
+# --- Construção dos gráficos em paralelo (pool de threads compartilhado pelo processo) ---
+# Logo depois dos filtros globais o script submete a agregação e a montagem da figura de todos os
+# gráficos das Abas 1 a 6; cada bloco do script depois só espera o seu resultado e chama
+# st.plotly_chart, na ordem de exibição. groupby/reduções do pandas e NumPy liberam o GIL em
+# boa parte do tempo, então com vários núcleos os gráficos ficam prontos juntos em vez de um
+# por vez. As threads do pool não chamam st.* (não têm o contexto do script).
+
+# O template padrão do Plotly é carregado sob demanda: carrega aqui, antes de as threads o usarem
+pio.templates[pio.templates.default]
+
+_executor = None
+_trava_executor = threading.Lock()
+
+# Gráficos já construídos, por objeto de resultados (um por estado de filtros, guardado no cache
+# do script): reruns com os mesmos filtros e o pré-aquecimento (aquecimento) reaproveitam o
+# DataFrame e a figura em vez de montá-los de novo. As figuras não são alteradas depois de
+# construídas; as entradas somem junto com o objeto de resultados quando ele sai do cache. Uma
+# trava por gráfico: quem pede um gráfico que outra thread está construindo (ex.: o primeiro
+# rerun enquanto o aquecimento ainda roda) espera por ele em vez de montá-lo de novo.
+_construidos = weakref.WeakKeyDictionary()
+_trava_construidos = threading.Lock()
+
+
+def executor():
+    """Pool de threads do processo (None quando configurado para rodar em série)."""
+    global _executor
+    if configuracao.WORKERS_GRAFICOS <= 1:
+        return None
+    with _trava_executor:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=configuracao.WORKERS_GRAFICOS, thread_name_prefix="graficos")
+    return _executor
+
+
+def _construidos_de(resultados):
+    with _trava_construidos:
+        return _construidos.setdefault(resultados, ({}, {}))[0]
+
+
+def _trava_de(resultados, chave):
+    with _trava_construidos:
+        travas = _construidos.setdefault(resultados, ({}, {}))[1]
+        return travas.setdefault(chave, threading.Lock())
+
+
+def construido(resultados, id_grafico, base=None, top_n=None):
+    """Se o gráfico já foi construído para esses resultados (por um rerun anterior ou pelo aquecimento)."""
+    return (id_grafico, base, top_n) in _construidos_de(resultados)
+
+
+def construir_grafico(resultados, id_grafico, base=None, top_n=None):
+    """(DataFrame, figura) de um gráfico; a figura é None quando não há dados."""
+    construidos = _construidos_de(resultados)
+    chave = (id_grafico, base, top_n)
+    if chave in construidos:
+        return construidos[chave]
+    with _trava_de(resultados, chave):
+        if chave in construidos:
+            return construidos[chave]
+        with instrumentacao.etapa(id_grafico, histograma=metricas.DURACAO_GRAFICO) as medida:
+            df = resultados.obter(id_grafico, base=base, top_n=top_n)
+            medida.linhas = len(df)
+            if df.empty:
+                construidos[chave] = (df, None)
+            else:
+                parametros = {'top_n': top_n} if top_n is not None else {}
+                construidos[chave] = (df, registro_graficos.figura(id_grafico, df, **parametros))
+    return construidos[chave]
+
+
+class PipelineGraficos:
+    """Gráficos submetidos ao pool para um rerun; `obter` devolve o resultado na ordem do script.
+
+    Pedidos não submetidos (ou com parâmetros diferentes dos submetidos, ex.: um widget que mudou
+    de valor depois da submissão) são construídos na hora, na thread do script.
+    """
+
+    def __init__(self, resultados):
+        self.resultados = resultados
+        self._futuros = {}
+
+    def submeter(self, id_grafico, base=None, top_n=None):
+        pool = executor()
+        if pool is None or construido(self.resultados, id_grafico, base, top_n):
+            return
+        # Cada tarefa roda numa cópia do contexto atual: a instrumentação (ativa ou não, lista de
+        # registros do rerun) vale também dentro das threads. O pico de memória medido pelo
+        # tracemalloc é do processo, então com tarefas simultâneas ele é apenas indicativo.
+        contexto = contextvars.copy_context()
+        self._futuros[(id_grafico, base, top_n)] = pool.submit(
+            contexto.run, construir_grafico, self.resultados, id_grafico, base, top_n
+        )
+
+    def pronto(self, id_grafico, base=None, top_n=None):
+        """Se o gráfico já está construído (False quando não foi submetido nem construído antes: `obter` o constrói na hora)."""
+        futuro = self._futuros.get((id_grafico, base, top_n))
+        if futuro is None:
+            return construido(self.resultados, id_grafico, base, top_n)
+        return futuro.done()
+
+    def obter(self, id_grafico, base=None, top_n=None):
+        futuro = self._futuros.pop((id_grafico, base, top_n), None)
+        if futuro is None:
+            return construir_grafico(self.resultados, id_grafico, base, top_n)
+        return futuro.result()
@@ -0,0 +1,213 @@
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import bibliotecas_csr
+import configuracao
+
+# --- Pipeline em streaming para a tabela reviews do Steam ---
+# A tabela reviews(review_id, playerid, gameid, review, helpful, funny, awards, posted) é lida em
+# blocos por geradores encadeados (leitura -> tokenização -> agregação). Só os acumuladores por
+# jogo ficam em memória, então o consumo é limitado pelo número de jogos, não de reviews.
+# O resultado por jogo é salvo no cache e pode ser juntado ao DB_completo pelo título.
+
+COLUNAS_REVIEWS = ["gameid", "review", "helpful", "funny", "awards"]
+COLUNAS_SOMA = ["n_reviews", "helpful", "funny", "awards", "comprimento_soma", "comprimento_quadrados", "tokens_soma"]
+PADRAO_TOKEN = r"\w+"
+N_FEATURES_PADRAO = 2 ** 18
+LIMITE_TRIPLAS_BOW = 5_000_000
+
+
+def ler_reviews_em_blocos(caminho_reviews, chunksize=100_000):
+    """Gera blocos da tabela reviews com as colunas numéricas já convertidas."""
+    for bloco in pd.read_csv(caminho_reviews, usecols=COLUNAS_REVIEWS, chunksize=chunksize):
+        bloco["gameid"] = pd.to_numeric(bloco["gameid"], errors="coerce")
+        bloco = bloco.dropna(subset=["gameid"])
+        bloco["gameid"] = bloco["gameid"].astype(np.int64)
+        for coluna in ("helpful", "funny", "awards"):
+            bloco[coluna] = pd.to_numeric(bloco[coluna], errors="coerce").fillna(0)
+        bloco["review"] = bloco["review"].fillna("").astype(str)
+        yield bloco
+
+
+def tokenizar_blocos(blocos):
+    """Acrescenta a cada bloco a lista de tokens (minúsculas) e o comprimento da review."""
+    for bloco in blocos:
+        bloco["tokens"] = bloco["review"].str.lower().str.findall(PADRAO_TOKEN)
+        bloco["comprimento"] = bloco["review"].str.len()
+        bloco["comprimento_quadrado"] = bloco["comprimento"].astype(np.float64) ** 2
+        bloco["n_tokens"] = bloco["tokens"].str.len()
+        yield bloco
+
+
+def features_hash(tokens, n_features=N_FEATURES_PADRAO):
+    """Coluna do bag-of-words de cada token (hash estável entre processos, ao contrário de hash())."""
+    return (pd.util.hash_array(np.asarray(tokens, dtype=object)) % np.uint64(n_features)).astype(np.int64)
+
+
+def bow_do_bloco(bloco, n_features=N_FEATURES_PADRAO):
+    """Triplas (gameid, feature, contagem) do bag-of-words com hashing de um bloco tokenizado."""
+    explodido = bloco[["gameid", "tokens"]].explode("tokens").dropna(subset=["tokens"])
+    if explodido.empty:
+        return pd.DataFrame({"gameid": [], "feature": [], "contagem": []})
+    explodido["feature"] = features_hash(explodido["tokens"].to_numpy(), n_features)
+    return explodido.groupby(["gameid", "feature"]).size().rename("contagem").reset_index()
+
+
+class AgregadorReviews:
+    """Acumula, bloco a bloco, as estatísticas por jogo e o bag-of-words por jogo."""
+
+    def __init__(self, n_features=N_FEATURES_PADRAO, com_bow=True):
+        self.n_features = n_features
+        self.com_bow = com_bow
+        self.somas = pd.DataFrame(columns=COLUNAS_SOMA, dtype=np.float64)
+        self.comprimento_max = pd.Series(dtype=np.float64)
+        self.triplas_bow = []
+        self.n_triplas_bow = 0
+        self.n_triplas_compactadas = 0
+
+    def consumir(self, bloco):
+        parcial = bloco.groupby("gameid").agg(
+            n_reviews=("review", "size"),
+            helpful=("helpful", "sum"),
+            funny=("funny", "sum"),
+            awards=("awards", "sum"),
+            comprimento_soma=("comprimento", "sum"),
+            comprimento_quadrados=("comprimento_quadrado", "sum"),
+            tokens_soma=("n_tokens", "sum"),
+        ).astype(np.float64)
+        self.somas = self.somas.add(parcial, fill_value=0)
+        maximo = bloco.groupby("gameid")["comprimento"].max().astype(np.float64)
+        atual, novo = self.comprimento_max.align(maximo, fill_value=0)
+        self.comprimento_max = pd.Series(np.fmax(atual.to_numpy(), novo.to_numpy()), index=atual.index)
+
+        if self.com_bow:
+            triplas = bow_do_bloco(bloco, self.n_features)
+            self.triplas_bow.append(triplas)
+            self.n_triplas_bow += len(triplas)
+            # Compacta só quando o acumulador passou do limite e dobrou desde a última compactação:
+            # cada tripla é reagrupada O(log) vezes em vez de a cada bloco (custo total linear)
+            if self.n_triplas_bow > max(LIMITE_TRIPLAS_BOW, 2 * self.n_triplas_compactadas):
+                self._compactar_bow()
+
+    def _compactar_bow(self):
+        if len(self.triplas_bow) > 1:
+            juntas = pd.concat(self.triplas_bow, ignore_index=True)
+            self.triplas_bow = [juntas.groupby(["gameid", "feature"], as_index=False)["contagem"].sum()]
+            self.n_triplas_bow = self.n_triplas_compactadas = len(self.triplas_bow[0])
+
+    def por_jogo(self):
+        """Estatísticas finais por jogo (contagens, somas e comprimento médio/desvio/máximo)."""
+        resultado = self.somas.copy()
+        n = resultado["n_reviews"]
+        resultado["comprimento_medio"] = resultado["comprimento_soma"] / n
+        variancia = resultado["comprimento_quadrados"] / n - resultado["comprimento_medio"] ** 2
+        resultado["comprimento_desvio"] = np.sqrt(variancia.clip(lower=0))
+        resultado["comprimento_max"] = self.comprimento_max.reindex(resultado.index)
+        resultado["tokens_medio"] = resultado["tokens_soma"] / n
+        resultado = resultado.drop(columns=["comprimento_soma", "comprimento_quadrados", "tokens_soma"])
+        for coluna in ("n_reviews", "helpful", "funny", "awards"):
+            resultado[coluna] = resultado[coluna].astype(np.int64)
+        resultado.index.name = "gameid"
+        return resultado.reset_index()
+
+    def bow_por_jogo(self):
+        """Matriz esparsa (jogos x features) e os gameids de cada linha."""
+        self._compactar_bow()
+        if not self.triplas_bow:
+            return sp.csr_matrix((0, self.n_features), dtype=np.float32), np.empty(0, dtype=np.int64)
+        triplas = self.triplas_bow[0]
+        gameids, linhas = np.unique(triplas["gameid"].to_numpy(dtype=np.int64), return_inverse=True)
+        matriz = sp.csr_matrix(
+            (triplas["contagem"].to_numpy(dtype=np.float32), (linhas, triplas["feature"].to_numpy())),
+            shape=(len(gameids), self.n_features),
+        )
+        return matriz, gameids
+
+
+def processar_reviews(caminho_reviews, chunksize=100_000, n_features=N_FEATURES_PADRAO, com_bow=True):
+    """Executa o pipeline completo sobre o arquivo de reviews e devolve o agregador preenchido."""
+    agregador = AgregadorReviews(n_features=n_features, com_bow=com_bow)
+    for bloco in tokenizar_blocos(ler_reviews_em_blocos(caminho_reviews, chunksize)):
+        agregador.consumir(bloco)
+    return agregador
+
+
+def _pasta_reviews(plataforma):
+    return configuracao.pasta_cache("reviews", plataforma)
+
+
+def _salvar_atomico(caminho, gravar):
+    """Grava em `caminho`.<pid>.tmp e renomeia por cima do anterior (os.replace), como os salvar_* de
+    bibliotecas_csr: quem lê durante a gravação vê a versão anterior inteira, nunca um arquivo truncado."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        gravar(arquivo)
+    os.replace(temporario, caminho)
+
+
+def assinatura_reviews(plataforma="steam"):
+    """Identifica os agregados em disco e a tabela games usada para os títulos (chave de cache do dashboard)."""
+    return (configuracao.assinatura_arquivo(os.path.join(_pasta_reviews(plataforma), "por_jogo.csv")),
+            configuracao.assinatura_arquivo(configuracao.caminho_tabela(plataforma, "games")))
+
+
+def gerar_agregados_reviews(plataforma="steam", chunksize=100_000, n_features=N_FEATURES_PADRAO, com_bow=True):
+    """Processa a tabela reviews e salva os agregados por jogo (CSV) e o bag-of-words (npz) no cache."""
+    caminho_reviews = configuracao.caminho_tabela(plataforma, "reviews")
+    if not os.path.exists(caminho_reviews):
+        raise FileNotFoundError(f"Tabela reviews não encontrada em '{caminho_reviews}'.")
+    agregador = processar_reviews(caminho_reviews, chunksize, n_features, com_bow)
+    pasta = _pasta_reviews(plataforma)
+    por_jogo = agregador.por_jogo()
+    if com_bow:
+        matriz, gameids = agregador.bow_por_jogo()
+        bibliotecas_csr.salvar_array(pasta, "bow_gameids", gameids)
+        _salvar_atomico(os.path.join(pasta, "bow_por_jogo.npz"), lambda arquivo: sp.save_npz(arquivo, matriz))
+    # O CSV (o que o dashboard lê) por último: quando ele muda, o bag-of-words da mesma execução já está gravado
+    _salvar_atomico(os.path.join(pasta, "por_jogo.csv"), lambda arquivo: por_jogo.to_csv(arquivo, index=False))
+    return por_jogo
+
+
+def carregar_agregados_reviews(plataforma="steam"):
+    """Agregados por jogo já calculados, ou None se o pipeline ainda não foi executado."""
+    caminho = os.path.join(_pasta_reviews(plataforma), "por_jogo.csv")
+    if not os.path.exists(caminho):
+        return None
+    return pd.read_csv(caminho)
+
+
+def agregados_por_titulo(por_jogo, plataforma="steam"):
+    """Converte os agregados por gameid em agregados por título, a chave usada no DB_completo."""
+    caminho_games = configuracao.caminho_tabela(plataforma, "games")
+    if por_jogo is None or not os.path.exists(caminho_games):
+        return None
+    titulos = pd.read_csv(caminho_games, usecols=["gameid", "title"]).dropna()
+    # Mesma limpeza de caracteres não ASCII aplicada aos títulos em load_and_preprocess_data
+    titulos["title"] = titulos["title"].astype(str).apply(lambda texto: re.sub(r'[^\x00-\x7F]+', '', texto))
+    juntado = por_jogo.merge(titulos, on="gameid", how="inner")
+    juntado["comprimento_soma"] = juntado["comprimento_medio"] * juntado["n_reviews"]
+    por_titulo = juntado.groupby("title").agg(
+        n_reviews=("n_reviews", "sum"),
+        helpful=("helpful", "sum"),
+        funny=("funny", "sum"),
+        awards=("awards", "sum"),
+        comprimento_soma=("comprimento_soma", "sum"),
+    )
+    por_titulo["comprimento_medio"] = por_titulo["comprimento_soma"] / por_titulo["n_reviews"]
+    return por_titulo.drop(columns="comprimento_soma").reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrega a tabela reviews por jogo em memória limitada.")
+    parser.add_argument("--plataforma", default="steam")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--n-features", type=int, default=N_FEATURES_PADRAO)
+    parser.add_argument("--sem-bow", action="store_true")
+    args = parser.parse_args()
+    resultado = gerar_agregados_reviews(args.plataforma, args.chunksize, args.n_features, not args.sem_bow)
+    print(f"Agregados de reviews salvos para {len(resultado)} jogos.")
@@ -0,0 +1,459 @@
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import agregacoes_graficos
+import configuracao
+import figuras_compactas
+import instrumentacao
+import topk
+
+# --- Registro declarativo dos gráficos das Abas 1 a 6 e plano de agregações compartilhadas ---
+# Cada gráfico é declarado como uma especificação (base, dimensões, medidas, top-N) mais a
+# função que monta a figura. O plano junta as especificações que agrupam pelas mesmas colunas e
+# deriva os agrupamentos mais grossos dos mais finos (somando contagens e somas; médias saem de
+# soma/contagem), de modo que cada agrupamento distinto é calculado uma vez por estado de filtros.
+# Ex.: os gráficos 8 (por gênero), 9 e o heatmap usam a mesma tabela (release_year, genre), e os
+# gráficos 1 e 2 derivam dela; os gráficos 10 e 12 compartilham (periodo, genre).
+
+CONTAGEM = 'contagem'
+OUTROS = 'Outros'
+
+
+def soma(coluna):
+    return ('soma', coluna)
+
+
+def media(coluna):
+    return ('media', coluna)
+
+
+def _colunas_medidas(medidas):
+    return {medida[1] for medida in medidas if medida != CONTAGEM}
+
+
+class EspecificacaoGrafico:
+    """Declaração de um gráfico: o que agregar e como desenhar.
+
+    - bases: bases aceitas ('jogo' = df_global_filtered, 'genero' = df explodido); a primeira é a padrão.
+    - dimensoes: colunas do agrupamento (None = linhas da base sem agregação, ex.: histograma).
+    - medidas: CONTAGEM (coluna 'count'), soma(col) e media(col) (coluna com o nome de col).
+    - top_n / top_por: mantém os N grupos com maior primeira medida (dentro de cada `top_por`).
+    - linhas: devolve as linhas da base cujos valores da dimensão estão no top-N (box plots).
+    - colunas: colunas que a figura usa quando o gráfico desenha linhas (backends que projetam).
+    - serie: dimensão desenhada como uma série por valor (cor); além de configuracao.MAX_SERIES
+      séries, as menores viram "Outros" (exige a medida CONTAGEM, que pondera as médias).
+    """
+
+    def __init__(self, id_grafico, bases, dimensoes=None, medidas=(CONTAGEM,), top_n=None, top_por=None,
+                 linhas=False, colunas=None, serie=None, figura=None):
+        self.id_grafico = id_grafico
+        self.bases = tuple(bases)
+        self.dimensoes = tuple(dimensoes) if dimensoes is not None else None
+        self.medidas = tuple(medidas)
+        self.top_n = top_n
+        self.top_por = top_por
+        self.linhas = linhas
+        self.colunas = tuple(colunas) if colunas is not None else None
+        self.serie = serie
+        self._figura = figura
+
+    def figura(self, df, **parametros):
+        return self._figura(df, **parametros)
+
+
+# --- Plano: quais agrupamentos calcular a partir das linhas e quais derivar de outros ---
+class PlanoAgregacoes:
+    """Agrupamentos distintos (base, conjunto de dimensões) das especificações e a origem de cada um."""
+
+    def __init__(self, especificacoes):
+        self.especificacoes = {espec.id_grafico: espec for espec in especificacoes}
+        # chave (base, frozenset(dimensões)) -> [dimensões na ordem da primeira especificação, colunas]
+        self.agrupamentos = {}
+        self.usuarios = {}
+        for espec in self.especificacoes.values():
+            if espec.dimensoes is None:
+                continue
+            for base in espec.bases:
+                chave = (base, frozenset(espec.dimensoes))
+                agrupamento = self.agrupamentos.setdefault(chave, [espec.dimensoes, set()])
+                agrupamento[1] |= _colunas_medidas(espec.medidas)
+                self.usuarios.setdefault(chave, []).append(espec.id_grafico)
+
+        # Do mais fino para o mais grosso: cada agrupamento contido (estritamente) em uma raiz da
+        # mesma base é derivado dela; os demais viram raízes, calculadas das linhas. Entre várias
+        # raízes possíveis, prefere a usada por mais gráficos (a que mais provavelmente já foi
+        # calculada, já que a execução é sob demanda) e, no empate, a de menos dimensões
+        self.origem = {}
+        raizes = []
+        for chave in sorted(self.agrupamentos, key=lambda chave: -len(chave[1])):
+            candidatas = [raiz for raiz in raizes if raiz[0] == chave[0] and chave[1] < raiz[1]]
+            if candidatas:
+                raiz = min(candidatas, key=lambda raiz: (-len(self.usuarios[raiz]), len(raiz[1])))
+                self.origem[chave] = raiz
+                self.agrupamentos[raiz][1] |= self.agrupamentos[chave][1]
+            else:
+                self.origem[chave] = None
+                raizes.append(chave)
+
+    def descrever(self):
+        """Uma linha por agrupamento: de onde vem e quais gráficos o usam."""
+        linhas = []
+        for chave, (dimensoes, colunas) in self.agrupamentos.items():
+            origem = self.origem[chave]
+            de_onde = 'linhas' if origem is None else f"derivado de ({', '.join(self.agrupamentos[origem][0])})"
+            linhas.append(f"[{chave[0]}] ({', '.join(dimensoes)}) <- {de_onde}; "
+                          f"somas: {sorted(colunas) or '-'}; gráficos: {', '.join(self.usuarios[chave])}")
+        return linhas
+
+
+def _agregar_linhas(df, dimensoes, colunas):
+    """Tabela de um agrupamento raiz: __n (linhas), e soma/contagem de não nulos de cada coluna."""
+    agregacoes = {'__n': (dimensoes[0], 'size')}
+    for coluna in sorted(colunas):
+        agregacoes[f'{coluna}__soma'] = (coluna, 'sum')
+        agregacoes[f'{coluna}__n'] = (coluna, 'count')
+    # dropna=False: grupos com chave nula ainda contam quando derivamos agrupamentos mais grossos
+    return df.groupby(list(dimensoes), dropna=False, observed=True).agg(**agregacoes).reset_index()
+
+
+def _derivar(tabela, dimensoes, dimensoes_origem):
+    if tuple(dimensoes) == tuple(dimensoes_origem):
+        return tabela.dropna(subset=list(dimensoes)).reset_index(drop=True)
+    colunas = [coluna for coluna in tabela.columns if coluna not in dimensoes_origem]
+    return tabela.groupby(list(dimensoes), observed=True)[colunas].sum().reset_index()
+
+
+def _aplicar_medidas(tabela, dimensoes, medidas):
+    saida = tabela[list(dimensoes)].copy()
+    for medida in medidas:
+        if medida == CONTAGEM:
+            saida['count'] = tabela['__n']
+        elif medida[0] == 'soma':
+            saida[medida[1]] = tabela[f'{medida[1]}__soma']
+        else:
+            saida[medida[1]] = tabela[f'{medida[1]}__soma'] / tabela[f'{medida[1]}__n']
+    return saida
+
+
+def _aplicar_top_n(espec, saida, top_n):
+    """Mantém os `top_n` grupos com maior primeira medida (dentro de cada `top_por`); a tabela vem ordenada pelas dimensões."""
+    if not top_n:
+        return saida
+    valores = saida[saida.columns[len(espec.dimensoes)]].to_numpy()
+    if espec.top_por:
+        grupos = pd.factorize(saida[espec.top_por], sort=True)[0]
+        return saida.iloc[topk.top_k_por_grupo(grupos, valores, top_n)]
+    return saida.iloc[topk.top_k(valores, top_n)].reset_index(drop=True)
+
+
+def _agrupar_outros(espec, saida, max_series):
+    """Junta as séries além das `max_series` - 1 com mais lançamentos em OUTROS (médias ponderadas pela contagem)."""
+    serie = espec.serie
+    if not serie or not max_series or saida.empty or saida[serie].nunique() <= max_series:
+        return saida
+    totais = saida.groupby(serie, observed=True)['count'].sum().sort_values(ascending=False, kind='stable')
+    cauda = ~saida[serie].isin(totais.index[:max_series - 1])
+    medias = [medida[1] for medida in espec.medidas if medida != CONTAGEM and medida[0] == 'media']
+    outros = saida[cauda].copy()
+    outros[medias] = outros[medias].mul(outros['count'], axis=0)
+    eixos = [dimensao for dimensao in espec.dimensoes if dimensao != serie]
+    outros = outros.drop(columns=serie).groupby(eixos, observed=True).sum().reset_index()
+    outros[medias] = outros[medias].div(outros['count'], axis=0)
+    outros[serie] = OUTROS
+    return pd.concat([saida[~cauda], outros[saida.columns]], ignore_index=True)
+
+
+class ResultadosPlano:
+    """Executa o plano sobre as bases de um estado de filtros, sob demanda e uma vez por agrupamento.
+
+    Seguro para uso concorrente: há uma trava por agrupamento, então gráficos diferentes podem
+    pedir agrupamentos diferentes ao mesmo tempo e um mesmo agrupamento nunca é calculado duas vezes.
+    `bases` é o dicionário {base: DataFrame} ou uma função sem argumentos que o devolve: nesse caso
+    as linhas filtradas só são montadas (uma vez) quando algum gráfico ou indicador precisa delas.
+    """
+
+    def __init__(self, plano, bases):
+        self.plano = plano
+        self._bases = None if callable(bases) else bases
+        self._montar_bases = bases if callable(bases) else None
+        self._trava_bases = threading.Lock()
+        self._tabelas = {}
+        self._saidas = {}
+        self._travas = {chave: threading.Lock() for chave in plano.agrupamentos}
+
+    @property
+    def bases(self):
+        if self._bases is None:
+            with self._trava_bases:
+                if self._bases is None:
+                    self._bases = self._montar_bases()
+        return self._bases
+
+    def _tabela(self, chave):
+        with self._travas[chave]:
+            if chave not in self._tabelas:
+                dimensoes, colunas = self.plano.agrupamentos[chave]
+                origem = self.plano.origem[chave]
+                if origem is None:
+                    base = self.bases[chave[0]]
+                    with instrumentacao.etapa(f"agrupamento[{chave[0]}:{','.join(dimensoes)}]", linhas=len(base)):
+                        tabela = _agregar_linhas(base, dimensoes, colunas)
+                    # Nas raízes as chaves nulas ficam para as derivações; aqui são removidas
+                    self._tabelas[(chave, 'raiz')] = tabela
+                    tabela = tabela.dropna(subset=list(dimensoes)).reset_index(drop=True)
+                else:
+                    tabela = _derivar(self._tabela_raiz(origem), dimensoes, self.plano.agrupamentos[origem][0])
+                self._tabelas[chave] = tabela
+            return self._tabelas[chave]
+
+    def _tabela_raiz(self, chave):
+        self._tabela(chave)
+        return self._tabelas[(chave, 'raiz')]
+
+    def distintos(self, coluna):
+        """Número de valores distintos (não nulos) de `coluna` nos jogos filtrados (indicadores)."""
+        df_base = self.bases['jogo']
+        return 0 if df_base.empty else int(df_base[coluna].nunique())
+
+    def colunas_jogos(self, colunas):
+        """Colunas das linhas filtradas (uma por jogo), como em backend_duckdb.ResultadosDuckDB."""
+        return self.bases['jogo'][list(colunas)]
+
+    def obter(self, id_grafico, base=None, top_n=None):
+        """DataFrame que o gráfico desenha; `base` e `top_n` substituem os padrões da especificação."""
+        espec = self.plano.especificacoes[id_grafico]
+        base = base or espec.bases[0]
+        if base not in espec.bases:
+            raise ValueError(f"O gráfico '{id_grafico}' não aceita a base '{base}' (aceita: {espec.bases}).")
+        df_base = self.bases[base]
+        if espec.dimensoes is None:
+            return df_base
+        if df_base.empty:
+            return pd.DataFrame(columns=list(espec.dimensoes))
+
+        # Medidas por gráfico e base guardadas antes do top-N: mudar o N (slider do gráfico 5) só
+        # refaz o top-K sobre o vetor já calculado
+        saida = self._saidas.get((id_grafico, base))
+        if saida is None:
+            chave = (base, frozenset(espec.dimensoes))
+            tabela = self._tabela(chave)
+            if tuple(espec.dimensoes) != tuple(self.plano.agrupamentos[chave][0]):
+                tabela = _derivar(tabela, espec.dimensoes, self.plano.agrupamentos[chave][0])
+            saida = self._saidas[(id_grafico, base)] = _aplicar_medidas(tabela, espec.dimensoes, espec.medidas)
+        saida = _aplicar_top_n(espec, saida, top_n or espec.top_n)
+        if espec.linhas:
+            dimensao = espec.dimensoes[0]
+            return df_base[df_base[dimensao].isin(saida[dimensao])]
+        return saida
+
+
+# --- Figuras ---
+def _figura_1(df):
+    fig = px.bar(df, x='release_year', y='count', title='Jogos Lançados por Ano')
+    fig.update_xaxes(dtick=1, tickformat="%Y")
+    return fig
+
+
+def _figura_2(df):
+    return px.bar(df, x='genre', y='count', title='Top 10 Gêneros por Número de Lançamentos')
+
+
+def _figura_box(dimensao, title):
+    def construir(df):
+        if 'median' not in df.columns:
+            return px.box(df, x=dimensao, y='preco_dolar', title=title,
+                          labels={'preco_dolar': 'Preço (Dólar)'},
+                          height=500)
+        # Estatísticas já calculadas (sketches de quantis do cubo_anos): caixas e cercas, sem outliers
+        fig = go.Figure(go.Box(x=df[dimensao], q1=df['q1'], median=df['median'], q3=df['q3'],
+                               lowerfence=df['lowerfence'], upperfence=df['upperfence'], name='preco_dolar'))
+        fig.update_layout(title=title, height=500, xaxis_title=dimensao, yaxis_title='Preço (Dólar)')
+        return fig
+    return construir
+
+
+def _figura_4(df):
+    fig = px.line(df, x='release_year', y='count', color='platform',
+                  title='Lançamentos por Plataforma ao Longo do Tempo',
+                  labels={'release_year': 'Ano de Lançamento', 'count': 'Número de Lançamentos'})
+    fig.update_xaxes(dtick=1, tickformat="%Y")
+    return fig
+
+
+def _figura_5(df, top_n=10):
+    return px.bar(df, x='developers', y='count', title=f'Top {top_n} Desenvolvedores por Número de Lançamentos')
+
+
+def _figura_7(df):
+    return px.histogram(df, x='preco_dolar', nbins=50,
+                        title='Distribuição de Preços em Dólar',
+                        labels={'preco_dolar': 'Preço (Dólar)'})
+
+
+def _figura_tendencia(color_by_line, title_suffix_line):
+    def construir(df):
+        fig = px.line(
+            df,
+            x='release_year',
+            y='preco_dolar',
+            color=color_by_line,
+            title=f'Tendência de Preços Médios {title_suffix_line}',
+            labels={'release_year': 'Ano de Lançamento', 'preco_dolar': 'Preço Médio (Dólar)'},
+            height=500
+        )
+        fig.update_xaxes(dtick=1, tickformat="%Y", showgrid=True)
+        return fig
+    return construir
+
+
+def _figura_9(df):
+    fig = px.bar(df, x='release_year', y='count', color='genre',
+                 title='Lançamentos Anuais por Gênero',
+                 labels={'release_year': 'Ano de Lançamento', 'count': 'Número de Lançamentos'},
+                 hover_name='genre')
+    fig.update_xaxes(dtick=1, tickformat="%Y")
+    return fig
+
+
+def _figura_10(df):
+    return px.bar(df, x='genre', y='count', color='periodo',
+                  barmode='group',
+                  title='Top Gêneros por Período de Lançamento',
+                  labels={'genre': 'Gênero', 'count': 'Número de Lançamentos', 'periodo': 'Período'},
+                  height=500)
+
+
+def _figura_sunburst(path, values, title):
+    def construir(df):
+        return px.sunburst(df, path=path, values=values, title=title)
+    return construir
+
+
+def _matriz(df, linhas, colunas, valores):
+    """Pivota o DataFrame longo (uma linha por célula) numa matriz densa (rótulos das linhas, das colunas, matriz); NaN sem dado."""
+    codigos_linhas, rotulos_linhas = pd.factorize(df[linhas], sort=True)
+    codigos_colunas, rotulos_colunas = pd.factorize(df[colunas], sort=True)
+    matriz = np.full((len(rotulos_linhas), len(rotulos_colunas)), np.nan, dtype=np.float32)
+    matriz[codigos_linhas, codigos_colunas] = df[valores].to_numpy(dtype=np.float32)
+    return rotulos_linhas, rotulos_colunas, matriz
+
+
+def _figura_heatmap(df):
+    # As médias já vêm ponderadas (soma / contagem por célula); o go.Heatmap desenha a matriz como
+    # está, sem re-agrupar em bins (o px.density_heatmap somava as médias que caíssem no mesmo bin)
+    generos, anos, matriz = _matriz(df, 'genre', 'release_year', 'preco_dolar')
+    # Gêneros de baixo para cima pela soma das médias (a ordem 'total ascending' de antes)
+    ordem = np.argsort(np.nansum(matriz, axis=1), kind='stable')
+    fig = go.Figure(go.Heatmap(
+        x=np.asarray(anos), y=np.asarray(generos[ordem], dtype=object), z=matriz[ordem],
+        colorscale=px.colors.sequential.Viridis, colorbar={'title': {'text': 'Preço Médio (Dólar)'}},
+        hovertemplate='Ano de Lançamento=%{x}<br>Gênero=%{y}<br>Preço Médio (Dólar)=%{z:.2f}<extra></extra>',
+        hoverongaps=False
+    ))
+    fig.update_layout(title='Preço Médio por Gênero e Ano', height=600,
+                      xaxis_title='Ano de Lançamento', yaxis_title='Gênero')
+    fig.update_xaxes(dtick=1, tickformat="%Y")
+    return fig
+
+
+# --- Registro (ordem de exibição) ---
+# 'jogo' = uma linha por jogo (df_global_filtered); 'genero' = uma linha por gênero do jogo
+AMBAS_BASES = ('jogo', 'genero')
+
+GRAFICOS = {espec.id_grafico: espec for espec in [
+    EspecificacaoGrafico('grafico_1', ['genero'], ['release_year'], figura=_figura_1),
+    EspecificacaoGrafico('grafico_2', ['genero'], ['genre'], top_n=10, figura=_figura_2),
+    EspecificacaoGrafico('grafico_3', ['genero'], ['genre'], top_n=10, linhas=True,
+                         colunas=['genre', 'preco_dolar'],
+                         figura=_figura_box('genre', 'Distribuição de Preços (Dólar) por Gênero (Top 10)')),
+    EspecificacaoGrafico('grafico_4', ['jogo'], ['release_year', 'platform'], serie='platform', figura=_figura_4),
+    EspecificacaoGrafico('grafico_5', ['jogo'], ['developers'], top_n=10, figura=_figura_5),
+    EspecificacaoGrafico('grafico_6', ['jogo'], ['platform'], top_n=10, linhas=True,
+                         colunas=['platform', 'preco_dolar'],
+                         figura=_figura_box('platform', 'Distribuição de Preços (Dólar) por Plataforma (Top 10)')),
+    EspecificacaoGrafico('grafico_7', AMBAS_BASES, colunas=['preco_dolar'], figura=_figura_7),
+    EspecificacaoGrafico('grafico_8_plataforma', AMBAS_BASES, ['release_year', 'platform'],
+                         [media('preco_dolar'), CONTAGEM], serie='platform',
+                         figura=_figura_tendencia('platform', 'por Plataforma')),
+    EspecificacaoGrafico('grafico_8_genero', ['genero'], ['release_year', 'genre'], [media('preco_dolar'), CONTAGEM],
+                         serie='genre', figura=_figura_tendencia('genre', 'por Gênero')),
+    EspecificacaoGrafico('grafico_9', ['genero'], ['release_year', 'genre'], serie='genre', figura=_figura_9),
+    EspecificacaoGrafico('grafico_10', ['genero'], ['periodo', 'genre'], top_n=5, top_por='periodo',
+                         figura=_figura_10),
+    EspecificacaoGrafico('grafico_11', ['genero'], ['genre', 'platform'],
+                         figura=_figura_sunburst(['genre', 'platform'], 'count',
+                                                 'Distribuição de Lançamentos por Gênero e Plataforma')),
+    EspecificacaoGrafico('grafico_12', ['genero'], ['periodo', 'genre'],
+                         figura=_figura_sunburst(['periodo', 'genre'], 'count',
+                                                 'Distribuição de Lançamentos por Período e Gênero')),
+    EspecificacaoGrafico('grafico_13', ['genero'], ['developers', 'genre'],
+                         figura=_figura_sunburst(['developers', 'genre'], 'count',
+                                                 'Distribuição de Lançamentos por Desenvolvedor e Gênero')),
+    EspecificacaoGrafico('grafico_14', ['genero'], ['genre'], [soma('preco_dolar')],
+                         figura=_figura_sunburst(['genre'], 'preco_dolar', 'Total de Preços (Dólar) por Gênero')),
+    EspecificacaoGrafico('heatmap', ['genero'], ['release_year', 'genre'], [media('preco_dolar')],
+                         figura=_figura_heatmap),
+]}
+
+PLANO = PlanoAgregacoes(GRAFICOS.values())
+
+
+def figura(id_grafico, df, compacta=True, **parametros):
+    """Figura Plotly do gráfico a partir do DataFrame devolvido por ResultadosPlano.obter.
+
+    Com `compacta`, junta as séries além de configuracao.MAX_SERIES em "Outros" e compacta os
+    traços (figuras_compactas) para o envio ao navegador.
+    """
+    espec = GRAFICOS[id_grafico]
+    if not compacta:
+        return espec.figura(df, **parametros)
+    fig = espec.figura(_agrupar_outros(espec, df, configuracao.MAX_SERIES), **parametros)
+    return figuras_compactas.compactar(fig)
+
+
+# --- Conferência contra as agregações diretas (agregacoes_graficos.AGREGACOES_TABS) ---
+def normalizar(df):
+    # Ordem de linhas entre grupos empatados no top-N pode variar; compara como conjunto
+    df = df.reset_index(drop=True)
+    return df.sort_values(list(df.columns), kind='stable').reset_index(drop=True)
+
+
+def conferir(bases):
+    """Compara cada gráfico do plano com a agregação direta; devolve a lista de divergências."""
+    resultados = ResultadosPlano(PLANO, bases)
+    divergencias = []
+    for id_grafico, (base, funcao) in agregacoes_graficos.AGREGACOES_TABS.items():
+        esperado = normalizar(funcao(bases[base]))
+        # Medidas a mais da especificação (ex.: a contagem que pondera "Outros") ficam de fora
+        obtido = normalizar(resultados.obter(id_grafico, base=base)[list(esperado.columns)])
+        try:
+            pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, check_index_type=False)
+        except AssertionError as erro:
+            divergencias.append((id_grafico, str(erro).splitlines()[0]))
+    return divergencias
+
+
+if __name__ == '__main__':
+    import dados_sinteticos
+    import pipeline_dados
+
+    parser = argparse.ArgumentParser(description='Mostra o plano de agregações e confere contra as agregações diretas.')
+    parser.add_argument('--linhas', type=int, default=20_000, help='Tamanho do dataset sintético usado na conferência.')
+    args = parser.parse_args()
+
+    for linha in PLANO.descrever():
+        print(linha)
+    caminho = dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    df_main, min_year, max_year = pipeline_dados.load_and_preprocess_data(caminho)
+    df_games, df_genres, _, _ = pipeline_dados.apply_all_global_filters(
+        df_main, 'Todas', ['Todos'], pipeline_dados.PERIODOS_PANDEMIA, (min_year, max_year), min_year, max_year
+    )
+    divergencias = conferir({'jogo': df_games, 'genero': df_genres})
+    for id_grafico, mensagem in divergencias:
+        print(f'DIVERGÊNCIA {id_grafico}: {mensagem}')
+    print('Plano confere com as agregações diretas.' if not divergencias else f'{len(divergencias)} divergência(s).')
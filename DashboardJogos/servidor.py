@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+import dados_dashboard
+
+# --- Subida do dashboard com o dataset já carregado ---
+# `python servidor.py [opções do streamlit run]` carrega a primeira versão do dataset (e dispara o
+# pré-aquecimento dos caches em segundo plano, DASH_AQUECIMENTO) e só então sobe o servidor do
+# Streamlit, no mesmo processo: o script encontra o gerenciador e os caches de dados_dashboard já
+# criados, e a primeira sessão não paga a carga. Com `streamlit run` direto a carga fica para o
+# primeiro rerun.
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_jogos_streamlit_v11.py')
+
+
+if __name__ == '__main__':
+    from streamlit.web import cli as stcli
+
+    inicio = time.perf_counter()
+    try:
+        versao = dados_dashboard.gerenciador().atual()
+        print(f'dataset carregado (versão {versao.numero}): {time.perf_counter() - inicio:.2f}s', flush=True)
+    except FileNotFoundError as erro:
+        # O script mostra o erro na página e tenta a carga de novo a cada rerun
+        print(f'dataset não carregado: {erro}', file=sys.stderr, flush=True)
+
+    sys.argv = ['streamlit', 'run', SCRIPT, *sys.argv[1:]]
+    sys.exit(stcli.main())
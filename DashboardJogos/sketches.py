@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# --- Sketches mergeáveis guardados por célula do cubo (cubo_anos) ---
+# Quantis: sketch de baldes logarítmicos (como o DDSketch) com erro relativo `alfa`. Cada valor
+# positivo cai no balde k = ceil(log_γ(v)), com γ = (1 + α) / (1 - α), e o representante do balde,
+# 2γ^k / (γ + 1), está a no máximo α (relativo) de qualquer valor dentro dele. Juntar sketches é
+# somar as contagens por balde, então eles acumulam por ano exatamente como as contagens do cubo
+# e qualquer combinação de filtros sai da soma dos sketches das células selecionadas. Valores
+# abaixo de VALOR_MINIMO (jogos gratuitos) ficam num balde próprio, o 0, representado por 0.
+# Distintos: HyperLogLog com 2^precisao registradores (erro padrão ~1,04 / sqrt(2^precisao)). Juntar
+# é o máximo por registrador, que não se desfaz por subtração: o cubo guarda um sketch por
+# (célula, ano), no formato esparso (só os registradores não nulos, no máximo 2^precisao por
+# sketch), e junta os selecionados na consulta.
+
+VALOR_MINIMO = 1e-2
+QUANTIS_BOX = (0.25, 0.5, 0.75)
+
+
+class SketchQuantis:
+    """Mapeamento valor <-> balde de um sketch de quantis com erro relativo `alfa` (histogramas são arrays)."""
+
+    def __init__(self, alfa):
+        if not 0 < alfa < 1:
+            raise ValueError(f"O erro relativo dos quantis deve estar entre 0 e 1 (recebido: {alfa}).")
+        self.alfa = alfa
+        self.gama = (1 + alfa) / (1 - alfa)
+        self._log_gama = np.log(self.gama)
+        # Balde 1 = primeiro balde logarítmico que contém VALOR_MINIMO
+        self._deslocamento = int(np.ceil(np.log(VALOR_MINIMO) / self._log_gama)) - 1
+
+    def baldes(self, valores):
+        """Balde de cada valor: 0 abaixo de VALOR_MINIMO, 1 em diante para os demais."""
+        valores = np.asarray(valores, dtype=np.float64)
+        baldes = np.zeros(len(valores), dtype=np.int64)
+        positivos = valores >= VALOR_MINIMO
+        baldes[positivos] = np.ceil(np.log(valores[positivos]) / self._log_gama).astype(np.int64) - self._deslocamento
+        return baldes
+
+    def valores(self, baldes):
+        """Representante de cada balde."""
+        baldes = np.asarray(baldes)
+        return np.where(baldes == 0, 0.0, 2 * self.gama ** (baldes + self._deslocamento) / (self.gama + 1))
+
+    def quantis(self, histogramas, quantis):
+        """(grupos, len(quantis)) a partir de histogramas (grupos, baldes), pela posição q * (n - 1) de cada quantil."""
+        acumulado = np.cumsum(histogramas, axis=1)
+        posicoes = np.outer(acumulado[:, -1] - 1, quantis)
+        # Primeiro balde cuja contagem acumulada passa da posição (o que contém o elemento)
+        baldes = (acumulado[:, None, :] <= np.floor(posicoes)[:, :, None]).sum(axis=2)
+        return self.valores(baldes)
+
+    def estatisticas_box(self, histogramas):
+        """q1, mediana, q3 e cercas (valor mais extremo a até 1,5 IQR dos quartis, como no Plotly) por grupo."""
+        q1, mediana, q3 = self.quantis(histogramas, QUANTIS_BOX).T
+        iqr = q3 - q1
+        representantes = self.valores(np.arange(histogramas.shape[1]))
+        ocupados = histogramas > 0
+        dentro_inferior = ocupados & (representantes[None, :] >= (q1 - 1.5 * iqr)[:, None])
+        dentro_superior = ocupados & (representantes[None, :] <= (q3 + 1.5 * iqr)[:, None])
+        ultimo = histogramas.shape[1] - 1
+        return {
+            'q1': q1,
+            'median': mediana,
+            'q3': q3,
+            'lowerfence': representantes[dentro_inferior.argmax(axis=1)],
+            'upperfence': representantes[ultimo - dentro_superior[:, ::-1].argmax(axis=1)],
+        }
+
+
+class SketchHLL:
+    """HyperLogLog com 2^precisao registradores; os valores são identificados pelo hash de 64 bits do pandas."""
+
+    def __init__(self, precisao):
+        if not 4 <= precisao <= 16:
+            raise ValueError(f"A precisão do HyperLogLog deve estar entre 4 e 16 (recebido: {precisao}).")
+        self.precisao = precisao
+        self.registradores = 1 << precisao
+        if self.registradores >= 128:
+            self._alfa = 0.7213 / (1 + 1.079 / self.registradores)
+        else:
+            self._alfa = {16: 0.673, 32: 0.697, 64: 0.709}[self.registradores]
+
+    def erro_padrao(self):
+        return 1.04 / np.sqrt(self.registradores)
+
+    def registros(self, valores):
+        """(registrador, posto) de cada valor: registrador pelos primeiros bits do hash, posto pelos zeros à esquerda do resto."""
+        hashes = pd.util.hash_array(np.asarray(valores, dtype=object))
+        bits_resto = 64 - self.precisao
+        registrador = (hashes >> np.uint64(bits_resto)).astype(np.uint16)
+        resto = hashes & np.uint64((1 << bits_resto) - 1)
+        # Comprimento em bits do resto, exato (metades de 32 bits cabem num float64)
+        alta, baixa = resto >> np.uint64(32), resto & np.uint64(0xFFFFFFFF)
+        comprimento = np.where(alta > 0, 32 + np.frexp(alta.astype(np.float64))[1],
+                               np.frexp(baixa.astype(np.float64))[1])
+        return registrador, (bits_resto - comprimento + 1).astype(np.uint8)
+
+    def juntar(self, registrador, posto):
+        """Registradores densos (máximo do posto por registrador) de um conjunto de registros."""
+        registradores = np.zeros(self.registradores, dtype=np.uint8)
+        np.maximum.at(registradores, registrador, posto)
+        return registradores
+
+    def estimar(self, registradores):
+        """Estimativa do número de distintos, com a correção de contagem linear para cardinalidades pequenas."""
+        m = self.registradores
+        estimativa = self._alfa * m * m / np.sum(np.ldexp(1.0, -registradores.astype(np.int64)))
+        vazios = int(np.count_nonzero(registradores == 0))
+        if estimativa <= 2.5 * m and vazios:
+            estimativa = m * np.log(m / vazios)
+        return int(round(estimativa))
@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+
+# --- Top-K sobre vetores de contagens (ranking dos gráficos 2, 5, 6 e 10) ---
+# Os gráficos de top-N ordenavam a tabela inteira (sort_values) para ficar com N linhas. Aqui o
+# top-K sai de np.argpartition, em tempo linear no número de grupos, e só os K escolhidos são
+# ordenados. Empates seguem a ordem original (o menor índice primeiro), como a ordenação estável
+# de antes: no limite do top-K entram os primeiros empatados. O top-K por grupo (gráfico 10, top 5
+# gêneros por período) é um lexsort único de (grupo, -valor, índice) com o posto dentro do grupo,
+# sem groupby.head. Para categorias codificadas em inteiros, `contagens` é o np.bincount.
+
+
+def contagens(codigos, n_categorias=None):
+    """Vetor de contagens por código (0..n_categorias - 1) de categorias codificadas em inteiros."""
+    return np.bincount(codigos, minlength=n_categorias or 0)
+
+
+def top_k(valores, k):
+    """Índices dos `k` maiores valores, do maior para o menor (empates pelo menor índice)."""
+    valores = np.asarray(valores)
+    if k <= 0 or len(valores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= len(valores):
+        return np.lexsort((np.arange(len(valores)), -valores))
+    # Valor do k-ésimo maior: entram todos os maiores que ele e os primeiros empatados com ele
+    limite = valores[np.argpartition(valores, len(valores) - k)[len(valores) - k]]
+    maiores = np.flatnonzero(valores > limite)
+    empatados = np.flatnonzero(valores == limite)[:k - len(maiores)]
+    escolhidos = np.concatenate([maiores, empatados])
+    return escolhidos[np.lexsort((escolhidos, -valores[escolhidos]))]
+
+
+def top_k_por_grupo(grupos, valores, k):
+    """Índices dos `k` maiores valores de cada grupo, por grupo (crescente) e valor (decrescente)."""
+    grupos = np.asarray(grupos)
+    valores = np.asarray(valores)
+    if k <= 0 or len(valores) == 0:
+        return np.empty(0, dtype=np.int64)
+    ordem = np.lexsort((np.arange(len(valores)), -valores, grupos))
+    grupos_ordenados = grupos[ordem]
+    inicio = np.flatnonzero(np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]])
+    posto = np.arange(len(ordem)) - np.repeat(inicio, np.diff(np.r_[inicio, len(ordem)]))
+    return ordem[posto < k]
+
+
+if __name__ == '__main__':
+    import configuracao
+    import dados_sinteticos
+    import pipeline_dados
+
+    parser = argparse.ArgumentParser(description='Compara o top-K por argpartition com value_counts + head.')
+    parser.add_argument('--linhas', type=int, default=200_000, help='Tamanho do dataset sintético.')
+    parser.add_argument('--repeticoes', type=int, default=200, help='Repetições de cada medida.')
+    args = parser.parse_args()
+
+    caminho = dados_sinteticos.obter_dataset(configuracao.pasta_cache('benchmark'), args.linhas)
+    df_main, _, _ = pipeline_dados.load_and_preprocess_data(caminho)
+    codigos, desenvolvedores = df_main['developers'].factorize(sort=True)
+    vetor = contagens(codigos[codigos >= 0], len(desenvolvedores))
+    print(f'{len(desenvolvedores)} desenvolvedores distintos em {len(df_main)} jogos')
+
+    for k in (5, 10, 20):
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            esperado = df_main['developers'].value_counts().head(k)
+        tempo_pandas = (time.perf_counter() - inicio) / args.repeticoes
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            indices = top_k(vetor, k)
+        tempo_topk = (time.perf_counter() - inicio) / args.repeticoes
+        confere = sorted(vetor[indices]) == sorted(esperado.to_numpy())
+        print(f'top {k:>2}: value_counts + head {tempo_pandas * 1000:7.2f} ms, '
+              f'argpartition no vetor de contagens {tempo_topk * 1000:7.3f} ms ({"confere" if confere else "DIVERGE"})')